@@ -0,0 +1,231 @@
+"""Persistent answer cache for repeated (and reworded) case questions.
+
+Answers are keyed on (model, temperature bucket, system prompt hash,
+normalized question). Lookups try an exact match first, then fall back to
+a near-duplicate match on word unigrams + bigrams so "What on earth
+happened on August 5, 2024?" and "what happened on august 5 2024?" share an
+entry. A near-duplicate must also name the same numbers, the same assets in
+the same order and the same direction words, so "0.25%" never reuses a
+"0.5%" answer, "JPY to MXN" never reuses "JPY to SPX" and "rise" never
+reuses "fall". Storage is a small SQLite file so the cache survives
+restarts and is shared by every session in the process.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "can", "did", "do", "does", "for", "how", "i",
+    "is", "it", "its", "me", "of", "on", "or", "please", "so", "the", "to",
+    "was", "what", "whats", "why", "with", "you", "yes",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+# Canonical key term -> aliases (as normalized text); assets and direction words
+KEY_TERMS: dict[str, tuple[str, ...]] = {
+    "jpy": ("jpy", "yen"),
+    "usd": ("usd", "dollar", "dollars", "greenback"),
+    "spx": ("spx", "s p 500", "s p", "sp500", "sp 500", "spy"),
+    "ndx": ("nasdaq", "ndx", "qqq"),
+    "nikkei": ("nikkei", "nky"),
+    "topix": ("topix",),
+    "vix": ("vix", "volatility index"),
+    "mxn": ("mxn", "peso", "pesos"),
+    "eur": ("eur", "euro"),
+    "chf": ("chf", "franc"),
+    "btc": ("btc", "bitcoin", "crypto"),
+    "gold": ("gold",),
+    "ust": ("treasury", "treasuries", "bonds"),
+    "boj": ("boj", "bank of japan"),
+    "fed": ("fed", "fomc", "federal reserve"),
+    "up": ("rise", "rises", "rising", "rose", "rally", "rallies", "rallied", "gain", "gains", "gained",
+           "surge", "surged", "jump", "jumped", "climb", "climbed", "soar", "soared", "up", "higher",
+           "strengthen", "strengthened", "appreciate", "appreciated"),
+    "down": ("fall", "falls", "falling", "fell", "drop", "drops", "dropped", "crash", "crashed",
+             "decline", "declined", "plunge", "plunged", "tumble", "tumbled", "slump", "slumped",
+             "sink", "sank", "down", "lower", "weaken", "weakened", "depreciate", "depreciated",
+             "sell off", "selloff"),
+    "buy": ("buy", "buying", "bought", "long"),
+    "sell": ("sell", "selling", "sold", "short"),
+}  # fmt: skip
+_KEY_TERM_OF = {alias: term for term, aliases in KEY_TERMS.items() for alias in aliases}
+_KEY_TERM_RE = re.compile(r"\b(" + "|".join(sorted(map(re.escape, _KEY_TERM_OF), key=len, reverse=True)) + r")\b")
+
+
+def normalize_question(text: str) -> str:
+    """Lower-case, strip punctuation/emoji and collapse whitespace."""
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def question_features(normalized: str) -> frozenset[str]:
+    """Content-word unigrams plus bigrams (bigrams keep word order, so
+    "JPY to SPX" and "SPX to JPY" stay distinct)."""
+    words = [w for w in normalized.split() if w not in STOPWORDS]
+    bigrams = [f"{a} {b}" for a, b in pairwise(words)]
+    return frozenset(words + bigrams)
+
+
+def numeric_tokens(normalized: str) -> frozenset[str]:
+    """Tokens containing a digit (dates, rates, levels)."""
+    return frozenset(w for w in normalized.split() if any(c.isdigit() for c in w))
+
+
+def key_terms(normalized: str) -> tuple[str, ...]:
+    """Assets and direction words in order ("from JPY to SPX" -> ``("jpy", "spx")``)."""
+    return tuple(_KEY_TERM_OF[m] for m in _KEY_TERM_RE.findall(normalized))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Jaccard similarity of two feature sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def temperature_bucket(temperature: float) -> str:
+    """Bucket temperature to the sidebar slider's 0.1 step."""
+    return f"{round(temperature, 1):.1f}"
+
+
+def prompt_fingerprint(system_prompt: str) -> str:
+    """Short stable hash of the system prompt."""
+    return hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+
+
+def replay_answer(text: str, words_per_chunk: int = 3, delay: float = 0.01) -> Iterator[str]:
+    """Yield a cached answer in small chunks so st.write_stream still animates."""
+    pieces = re.findall(r"\S+\s*|\s+", text)
+    for i in range(0, len(pieces), words_per_chunk):
+        yield "".join(pieces[i : i + words_per_chunk])
+        if delay:
+            time.sleep(delay)
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.near_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.near_hits) / self.lookups if self.lookups else 0.0
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key        TEXT PRIMARY KEY,
+    scope      TEXT NOT NULL,
+    question   TEXT NOT NULL,
+    answer     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+"""
+
+
+class AnswerCache:
+    """SQLite-backed answer cache with LRU and TTL eviction."""
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_entries: int = 500,
+        ttl_seconds: float = 7 * 24 * 3600,
+        similarity_threshold: float = 0.65,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def _scope(model: str, temperature: float, system_prompt: str) -> str:
+        return f"{model}|{temperature_bucket(temperature)}|{prompt_fingerprint(system_prompt)}"
+
+    @staticmethod
+    def _key(scope: str, normalized: str) -> str:
+        return hashlib.sha256(f"{scope}|{normalized}".encode()).hexdigest()
+
+    def get(self, model: str, temperature: float, system_prompt: str, question: str) -> str | None:
+        """Return a cached answer for this question (or a close rewording)."""
+        scope = self._scope(model, temperature, system_prompt)
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            row = self._db.execute(
+                "SELECT key, answer FROM answers WHERE key = ?",
+                (self._key(scope, normalized),),
+            ).fetchone()
+            if row:
+                self.stats.exact_hits += 1
+                return self._touch(row[0], row[1], now)
+
+            target = question_features(normalized)
+            numbers, terms = numeric_tokens(normalized), key_terms(normalized)
+            best: tuple[float, str, str] | None = None
+            for key, cached_question, answer in self._db.execute(
+                "SELECT key, question, answer FROM answers WHERE scope = ?", (scope,)
+            ):
+                # A different number, asset, direction or order is a different question
+                if numeric_tokens(cached_question) != numbers or key_terms(cached_question) != terms:
+                    continue
+                score = similarity(target, question_features(cached_question))
+                if score >= self.similarity_threshold and (best is None or score > best[0]):
+                    best = (score, key, answer)
+            if best:
+                self.stats.near_hits += 1
+                return self._touch(best[1], best[2], now)
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, model: str, temperature: float, system_prompt: str, question: str, answer: str) -> None:
+        """Store an answer, evicting least-recently-used entries over capacity."""
+        scope = self._scope(model, temperature, system_prompt)
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(scope, normalized), scope, normalized, answer, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def _touch(self, key: str, answer: str, now: float) -> str:
+        self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return answer
+
+    def _expire(self, now: float) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
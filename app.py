@@ -1,20 +1,88 @@
 """Japan Carry Trade Q&A — Creative & Visual Edition."""
 
+import json
+import os
 import random
+from datetime import timedelta
 
+import numpy as np
 import streamlit as st
 from openai import OpenAI
 from pathlib import Path
 from streamlit_lottie import st_lottie
 
+from answer_cache import AnswerCache, replay_answer
+from carry_sim import RETURN_EDGES, CarryPosition, MarketModel, simulate
+from chart_tiles import LODSeries, build_tiles
+from chat_store import ChatStore, new_session_id
+from corpus import Corpus, corpus_fingerprint
+from fact_index import FactIndex
+from history import HistoryState, compact_history, trim_history
+from lottie_assets import LottieStore
+from market_store import MarketStore, from_minutes
+from openai_pool import PoolStats, make_client
+from regime import demo_regime_returns, fit_series, smoothed, transition_breakpoint
+from replay import SPEEDS, ReplayClock, ReplayFrame, ReplayTape, Trigger, clock_for
+from retrieval import BM25Index, load_or_build_index, render_sections
+from rolling import demo_unwind_returns, rolling_series
+from router import AUTO, ModelRouter
+from scheduler import AdmissionScheduler, RateLimits, estimate_request_tokens, merge_limits
+from singleflight import SingleFlight, flight_key
+from stream_render import RenderStats, StreamRenderer
+from streaming import StreamReport, resilient_stream
+from te_matrix import TEMatrix, te_matrix
+from telemetry import Telemetry, timed_stream
+from transfer_entropy import TEResult, demo_contagion_returns, pairwise_te
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
 APP_TITLE = "Japan Carry Trade Q&A"
-CASE_DATA_PATH = Path(__file__).parent / "case_data" / "japan_carry_trade.md"
+CASE_DATA_DIR = Path(__file__).parent / "case_data"
+CASE_DATA_PATH = CASE_DATA_DIR / "japan_carry_trade.md"
+CACHE_DIR = Path(os.environ.get("CARRY_QA_CACHE_DIR", Path(__file__).parent / ".cache"))
+ANSWER_CACHE_PATH = CACHE_DIR / "answers.sqlite3"
+HISTORY_KEEP_TURNS = 4
+CHAT_DB_PATH = CACHE_DIR / "chats.sqlite3"
+CHAT_PAGE = 20  # messages rendered per page
+CHAT_WINDOW = 40  # most recent messages kept in session memory
+CORPUS_INDEX_PATH = CACHE_DIR / "corpus_sections.idx"
+CASE_INDEX_PATH = CACHE_DIR / "bm25_index.json"
+TELEMETRY_PATH = CACHE_DIR / "telemetry.jsonl"
+CONTEXT_MODES = ["Full case", "Top-k sections"]
+MARKET_DATA_DIR = Path(__file__).parent / "data" / "market"
+BLACK_MONDAY = "2024-08-05"
+BOJ_HIKE_DATE = "2024-07-31"
+REGIME_CHART_DAYS = 500
+CARRY_SIM_PATHS = 1_000_000
+CARRY_REGIMES = {"Old matrix: <1% a month": 0.01, "New matrix: 15% a month": 0.15}
+REPLAY_START, REPLAY_END = "2024-07-31", "2024-08-06"
+TIMELINE_CHART_SYMBOLS = {"USDJPY": "USD/JPY", "SPX": "S&P 500", "USDMXN": "USD/MXN", "VIX": "VIX"}
+REPLAY_FRAME_SECONDS = 0.25  # fixed 4 fps; bars in between are coalesced
+
+# Shared OpenAI connection pool (one per process, see get_openai_client)
+OPENAI_MAX_CONNECTIONS = 50
+OPENAI_MAX_KEEPALIVE = 20
+OPENAI_KEEPALIVE_EXPIRY = 90.0
+
+# Account rate limits (tier-1 defaults); the admission scheduler keeps every session
+# under them together. Override per model with an ``[openai_rate_limits]`` table in
+# secrets or CARRY_QA_RATE_LIMITS='{"gpt-4.1": {"rpm": 5000, "tpm": 2000000}}'.
+OPENAI_RATE_LIMITS = {
+    "gpt-4.1": RateLimits(rpm=500, tpm=30_000),
+    "gpt-4.1-mini": RateLimits(rpm=500, tpm=200_000),
+    "gpt-4o-mini": RateLimits(rpm=500, tpm=200_000),
+}
 
+# The case material leads the system prompt so the (large) prefix is
+# byte-identical on every turn and hits the provider's automatic prompt
+# cache; the persona and rules follow it.
 SYSTEM_PROMPT_TEMPLATE = """\
+--- CASE MATERIAL ---
+{case_content}
+--- END CASE MATERIAL ---
+
 You are a funny, slightly sarcastic (but honest and accurate) expert on the \
 Japan Carry Trade case study from MGMT 69000: Mastering AI for Finance at \
 Purdue University. You help students understand the 2024 yen carry trade \
@@ -34,15 +102,11 @@ would: "excuse me WHAT"
 that's not in my case notes — I don't make stuff up, that's not my style"
 
 RULES:
-- Answer using ONLY the case material below. Be precise with data points.
+- Answer using ONLY the case material above. Be precise with data points.
 - When explaining transfer entropy, emphasize directional/asymmetric nature \
 vs. symmetric correlation.
 - Use emojis generously: 📊 data, ⚠️ warnings, 💡 insights, 🔗 connections, \
 📅 dates, 💀 for things that went badly, ✨ for key moments
-
---- CASE MATERIAL ---
-{case_content}
---- END CASE MATERIAL ---
 """
 
 EXAMPLE_QUESTIONS = [
@@ -66,25 +130,58 @@ DID_YOU_KNOW_FACTS = [
     "✨ Transfer entropy literally answers 'who started it' — it's the group chat receipts of finance.",
 ]
 
+# Timeline and ticker text may use {fields} from case_metrics()
 TIMELINE_EVENTS = [
     ("🏦", "Mar 19, 2024", "BOJ ends negative rates — first hike since 2007. *Everyone: it's fine, right?*"),
-    ("💱", "Jul 2024", "USD/JPY hits 161. Yen is basically on sale. Everyone is still vibing."),
-    ("⚡", "Jul 31, 2024", "BOJ drops a SECOND rate hike to 0.25%. Markets: *wait, you're serious??*"),
+    ("💱", "Jul 2024", "USD/JPY hits {usdjpy_peak:.0f}. Yen is basically on sale. Everyone is still vibing."),
+    ("⚡", "Jul 31, 2024", "BOJ drops a SECOND rate hike to {boj_rate:.2f}%. Markets: *wait, you're serious??*"),
     ("🌪️", "Aug 1–2, 2024", "Yen starts ripping higher. Carry trades unwinding. Cue the panic."),
-    ("💥", "Aug 5, 2024", "**Black Monday** — Topix -12%, Nikkei -12.4%. Portfolios in shambles."),
-    ("😱", "Aug 5, 2024", "VIX spikes above 60. That's not a number, that's a cry for help."),
+    ("💥", "Aug 5, 2024", "**Black Monday** — Topix {topix_aug5:.0%}, Nikkei {nikkei_aug5:.1%}. Portfolios in shambles."),
+    ("😱", "Aug 5, 2024", "VIX spikes to {vix_peak:.0f}. That's not a number, that's a cry for help."),
     ("🔄", "Aug 6–7, 2024", "BOJ: 'jk we'll chill.' Markets partially recover. Trust issues remain."),
     ("📊", "Post-crisis", "Transfer entropy shows who actually started the mess. Receipts secured."),
 ]
 
 LOTTIE_FINANCE_URL = "https://assets2.lottiefiles.com/packages/lf20_kyu7xb1v.json"
 LOTTIE_CHART_URL = "https://assets5.lottiefiles.com/packages/lf20_V9t630.json"
+LOTTIE_ASSETS_DIR = Path(__file__).parent / "assets" / "lottie"
+LOTTIE_VENDORED = {
+    LOTTIE_FINANCE_URL: LOTTIE_ASSETS_DIR / "finance.json",
+    LOTTIE_CHART_URL: LOTTIE_ASSETS_DIR / "chart.json",
+}
+
+# Transfer entropy lab: (source, target) pairs from the case's contagion chain
+TE_PAIRS = [("JPY", "SPX"), ("SPX", "MXN"), ("JPY", "MXN")]
+TE_METHODS = ["quantile", "ordinal"]
+TE_SURROGATES = 100
+TE_ALPHA = 0.05
+ROLLING_STEP = 50  # chart one point per this many ticks
 
 CONTAGION_FLOW_STEPS = [
-    {"label": "Tokyo 🇯🇵", "detail": "BOJ said 'surprise!' — yen goes brrr"},
-    {"label": "US Tech 🇺🇸", "detail": "Margin calls enter the chat"},
-    {"label": "Crypto ₿", "detail": "Liquidation cascade — oof"},
-    {"label": "Global 🌍", "detail": "VIX >60. Everyone panics. Cute."},
+    {
+        "label": "Tokyo 🇯🇵",
+        "detail": "BOJ said 'surprise!' — yen goes brrr",
+        "asset": "JPY",
+        "trigger": Trigger("USDJPY", "below", 150.0),
+    },
+    {
+        "label": "US Tech 🇺🇸",
+        "detail": "Margin calls enter the chat",
+        "asset": "SPX",
+        "trigger": Trigger("SPX", "below", 5400.0),
+    },
+    {
+        "label": "Crypto ₿",
+        "detail": "Liquidation cascade — oof",
+        "asset": "BTC",
+        "trigger": Trigger("BTC", "below", 60000.0),
+    },
+    {
+        "label": "Global 🌍",
+        "detail": "VIX >60. Everyone panics. Cute.",
+        "asset": "VIX",
+        "trigger": Trigger("VIX", "above", 30.0),
+    },
 ]
 
 # ---------------------------------------------------------------------------
@@ -317,6 +414,18 @@ div[data-testid="stHorizontalBlock"] > div:nth-child(4) div[data-testid="stMetri
     font-size: 1.4rem;
     animation: contagion-pulse 2s ease-in-out infinite;
 }
+.contagion-arrow .te-badge {
+    font-size: 0.65rem;
+    color: #888;
+    white-space: nowrap;
+}
+.contagion-step.lit {
+    border-color: #e94560;
+    box-shadow: 0 0 14px rgba(233, 69, 96, 0.6);
+}
+.contagion-flow.replay {
+    padding: 0.5rem 0;
+}
 .contagion-arrow:nth-child(4) { animation-delay: 0.5s; }
 .contagion-arrow:nth-child(6) { animation-delay: 1.0s; }
 .contagion-arrow:nth-child(8) { animation-delay: 1.5s; }
@@ -370,13 +479,19 @@ FLOATING_SYMBOLS_HTML = """
 </div>
 """
 
+HERO_HTML = (
+    '<div class="hero-title">🇯🇵💹 Japan Carry Trade Q&A 🏯</div>\n'
+    '<div class="bouncing-yen">¥</div>\n'
+    '<div class="hero-caption">the carry trade crashed so you don\'t have to — AI-powered case study Q&A</div>'
+)
+
 TICKER_ITEMS = [
-    "¥161→142 (ugh)",
-    "TOPIX -12% (ouch)",
-    "VIX >60 (excuse me??)",
-    "Nikkei -12.4% (yikes)",
+    "¥{usdjpy_peak:.0f}→{usdjpy_trough:.0f} (ugh)",
+    "TOPIX {topix_aug5:.0%} (ouch)",
+    "VIX {vix_peak:.0f} (excuse me??)",
+    "Nikkei {nikkei_aug5:.1%} (yikes)",
     "$4T Unwind (not a typo)",
-    "BOJ Rate 0.25% (finally)",
+    "BOJ Rate {boj_rate:.2f}% (finally)",
     "Black Monday Aug 5 (RIP portfolios)",
     "Transfer Entropy (the real MVP)",
     "Correlation could never",
@@ -387,10 +502,9 @@ TICKER_ITEMS = [
 # ---------------------------------------------------------------------------
 
 
-@st.cache_data
 def load_case_content() -> str:
-    """Load the case study markdown file."""
-    return CASE_DATA_PATH.read_text(encoding="utf-8")
+    """The main case file (full-case mode), decoded from the shared memory map."""
+    return get_corpus(corpus_fingerprint(CASE_DATA_DIR)).file_text(CASE_DATA_PATH.name)
 
 
 def build_system_prompt(case_content: str) -> str:
@@ -398,18 +512,387 @@ def build_system_prompt(case_content: str) -> str:
     return SYSTEM_PROMPT_TEMPLATE.format(case_content=case_content)
 
 
-@st.cache_data(ttl=3600)
-def load_lottie_url(url: str) -> dict | None:
-    """Fetch a Lottie animation JSON from a URL (cached 1 hr)."""
-    import requests
+@st.cache_resource(max_entries=1)
+def get_corpus(fingerprint: tuple) -> Corpus:
+    """Memory-mapped case corpus, reopened when files change."""
+    return Corpus(CASE_DATA_DIR, CORPUS_INDEX_PATH)
+
+
+@st.cache_resource(max_entries=1)
+def get_case_corpus(fingerprint: tuple) -> tuple[Corpus, BM25Index]:
+    """The case corpus + its BM25 index, rebuilt when files change."""
+    corpus = get_corpus(fingerprint)
+    return corpus, load_or_build_index(corpus, CASE_INDEX_PATH)
+
+
+def retrieve_case_sections(question: str, k: int) -> str | None:
+    """Prompt-ready text of the top-``k`` sections across all case files."""
+    corpus, index = get_case_corpus(corpus_fingerprint(CASE_DATA_DIR))
+    hits = index.search(question, k)
+    return render_sections(corpus, hits) if hits else None
+
+
+def build_api_messages(system_prompt: str, history: list[dict]) -> list[dict]:
+    """Assemble the chat request with a stable prefix.
 
+    Only ``role``/``content`` are forwarded, in order, so turn N's request is
+    a byte-for-byte prefix of turn N+1's and prompt caching keeps hitting.
+    """
+    return [{"role": "system", "content": system_prompt}] + [
+        {"role": m["role"], "content": m["content"]} for m in history
+    ]
+
+
+@st.cache_data
+def compute_te_results(
+    k: int = 1, lag: int = 1, bins: int = 3, method: str = "quantile"
+) -> list[TEResult]:
+    """Both-direction TE for every ``TE_PAIRS`` entry on the demo tick series."""
+    return pairwise_te(
+        demo_contagion_returns(), TE_PAIRS, k=k, l=k, lag=lag, bins=bins, method=method
+    )
+
+
+@st.cache_data
+def compute_contagion_matrix() -> TEMatrix:
+    """Surrogate-tested TE matrix over the Domino Effect assets (demo ticks).
+
+    Small enough to run in-process; pool start-up would cost more than it saves.
+    """
+    assets = tuple(step["asset"] for step in CONTAGION_FLOW_STEPS)
+    series = demo_contagion_returns(n=20_000, chain=assets)
+    return te_matrix(series, surrogates=TE_SURROGATES, workers=1)
+
+
+def te_badge(matrix: TEMatrix, source: str, target: str) -> str:
+    """Arrow label for one contagion link: TE and p-value, or "n.s."."""
+    te, p = matrix.edge(source, target)
+    return f"{te:.2f} bits · p={p:.2f}" if p < TE_ALPHA else "n.s."
+
+
+@st.cache_data
+def compute_compression(window: int) -> dict[str, list]:
+    """Rolling SPX/MXN correlation and JPY→SPX TE over the demo unwind."""
+    series = demo_unwind_returns()
+    corr = rolling_series(series["SPX"], series["MXN"], window, step=ROLLING_STEP)
+    te = rolling_series(series["JPY"], series["SPX"], window, step=ROLLING_STEP)
+    return {
+        "tick": corr["tick"].tolist(),
+        "corr(SPX, MXN)": corr["correlation"].tolist(),
+        "TE(JPY→SPX)": te["te"].tolist(),
+        "TE(SPX→JPY)": te["te_reverse"].tolist(),
+    }
+
+
+@st.cache_data
+def compute_regime_shift() -> dict:
+    """Hold/hike HMM on the demo USD/JPY history, plus the estimated break."""
+    returns, change = demo_regime_returns()
+    model = fit_series(returns)
+    shift = transition_breakpoint(returns, model)
+    days = np.busday_offset(BOJ_HIKE_DATE, np.arange(len(returns)) - change, roll="forward")
+    recent = slice(len(returns) - REGIME_CHART_DAYS, None)
+    hike = smoothed(returns[recent], model)[0, :, -1]
+    return {
+        "before": shift.before,
+        "after": shift.after,
+        "break_date": str(days[shift.index]),
+        "chart": {
+            "time": days[recent].astype(str).tolist(),
+            "series": ["P(hike regime)"] * REGIME_CHART_DAYS,
+            "value": hike.round(4).tolist(),
+        },
+    }
+
+
+@st.cache_data(show_spinner="Simulating 1,000,000 carry-trade paths…")
+def run_carry_sim(target: str, leverage: float, maintenance: float, surge_per_month: float) -> dict:
+    """Margin-call odds and the one-month P&L distribution for one position."""
+    result = simulate(
+        CarryPosition(target, leverage, maintenance),
+        MarketModel(p_stress=MarketModel.daily_hazard(surge_per_month)),
+        paths=CARRY_SIM_PATHS,
+    )
+    counts = result.return_counts.copy()
+    counts[1] += counts[0]  # fold the open-ended tails into the end bins
+    counts[-2] += counts[-1]
+    bars = counts[1:-1].reshape(-1, 5).sum(axis=1)
+    starts = RETURN_EDGES[:-1:5]
+    shown = bars > 0
+    return {
+        "margin_call": result.margin_call_probability,
+        "mean": result.mean,
+        "skew": result.skew,
+        "var_99": result.quantile(0.01),
+        "es_99": result.expected_shortfall(0.01),
+        "histogram": {
+            "return": starts[shown].round(3).tolist(),
+            "return_end": (starts[shown] + 0.025).round(3).tolist(),
+            "share": (bars[shown] / result.paths).round(6).tolist(),
+        },
+    }
+
+
+def histogram_spec(height: int = 180) -> dict:
+    return {
+        "height": height,
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "return", "type": "quantitative", "bin": {"binned": True}, "title": "1-month P&L / equity"},
+            "x2": {"field": "return_end"},
+            "y": {"field": "share", "type": "quantitative", "title": None, "axis": {"format": "%"}},
+        },
+    }
+
+
+def line_spec(fields: list[str], height: int = 180) -> dict:
+    """Vega-Lite spec for ``fields`` against ``tick``.
+
+    A plain spec skips the Altair build/validation behind ``st.line_chart``,
+    which costs ~100 ms per chart on every rerun.
+    """
+    return {
+        "height": height,
+        "transform": [{"fold": fields, "as": ["series", "value"]}],
+        "mark": "line",
+        "encoding": {
+            "x": {"field": "tick", "type": "quantitative"},
+            "y": {"field": "value", "type": "quantitative", "title": None},
+            "color": {"field": "series", "type": "nominal", "title": None},
+        },
+    }
+
+
+def timeline_spec(height: int = 110) -> dict:
+    """One row per series with its own y scale, against UTC time."""
+    return {
+        "height": height,
+        "mark": {"type": "line", "strokeWidth": 1},
+        "encoding": {
+            "x": {"field": "time", "type": "temporal", "title": None, "scale": {"type": "utc"}},
+            "y": {"field": "value", "type": "quantitative", "title": None, "scale": {"zero": False}},
+            "row": {"field": "series", "type": "nominal", "title": None},
+        },
+        "resolve": {"scale": {"y": "independent"}},
+    }
+
+
+def timeline_chart_data(tiles: dict[str, LODSeries], start, end) -> tuple[dict[str, list], int]:
+    """Long-format chart rows for every timeline series; also the coarsest bucket width."""
+    data: dict[str, list] = {"time": [], "series": [], "value": []}
+    resolution = 1
+    for symbol, label in TIMELINE_CHART_SYMBOLS.items():
+        tile = tiles[symbol].query(start, end)
+        data["time"] += (tile.minutes.astype("int64") * 60_000).tolist()  # epoch ms
+        data["series"] += [label] * len(tile)
+        data["value"] += tile.values.round(4).tolist()
+        resolution = max(resolution, tile.resolution)
+    return data, resolution
+
+
+def te_context_message(results: list[TEResult]) -> dict:
+    """System message giving the model the computed TE numbers.
+
+    Sent right after the case prompt; default parameters make it identical
+    on every turn, so the cached prefix now also covers it.
+    """
+    lines = [
+        f"TE({r.source}→{r.target}) = {r.forward:.4f} bits, "
+        f"TE({r.target}→{r.source}) = {r.reverse:.4f} bits, net {r.net:+.4f}"
+        for r in results
+    ]
+    return {
+        "role": "system",
+        "content": "--- COMPUTED TRANSFER ENTROPY (app's TE engine, synthetic demo "
+        "ticks with a one-tick JPY→SPX→MXN lead; k=l=1, lag=1, 3 quantile bins) ---\n"
+        + "\n".join(lines)
+        + "\nCite these as the app's own illustration, not as the case's market data.",
+    }
+
+
+@st.cache_resource
+def get_market_store() -> MarketStore:
+    """Memory-mapped market data (bundled fixture), shared by every session."""
+    return MarketStore(MARKET_DATA_DIR)
+
+
+def case_metrics(store: MarketStore) -> dict[str, float]:
+    """Header, ticker and timeline numbers, computed from the market store."""
+    closes = store.range("1d", "2024-08-02", "2024-08-06")  # Fri Aug 2, Mon Aug 5
+    black_monday = store.range("1m", BLACK_MONDAY, "2024-08-06")
+    topix, nikkei = closes["TOPIX"], closes["NIKKEI"]
+    return {
+        "topix_aug5": float(topix[1] / topix[0] - 1),
+        "nikkei_aug5": float(nikkei[1] / nikkei[0] - 1),
+        "vix_peak": float(black_monday["VIX"].max()),
+        "usdjpy_peak": float(store.range("1d", None, "2024-08-01")["USDJPY"].max()),
+        "usdjpy_trough": float(black_monday["USDJPY"].min()),
+        "boj_rate": store.asof("1d", "BOJ_RATE", BLACK_MONDAY),
+    }
+
+
+@st.cache_resource
+def get_chart_tiles() -> dict[str, LODSeries]:
+    """Min/max level-of-detail pyramids over the minute bars, built once."""
+    return build_tiles(get_market_store(), "1m", list(TIMELINE_CHART_SYMBOLS))
+
+
+@st.cache_resource
+def get_replay_tape() -> ReplayTape:
+    """Precomputed Jul 31 – Aug 5 replay arrays, shared by every session."""
+    triggers = [step["trigger"] for step in CONTAGION_FLOW_STEPS]
+    return ReplayTape(get_market_store(), REPLAY_START, REPLAY_END, triggers, ["BOJ_RATE"])
+
+
+def replay_metrics(frame: ReplayFrame) -> dict[str, float]:
+    """``case_metrics`` keys, as of a replay frame (extremes so far)."""
+    return {
+        "topix_aug5": frame.day_change("TOPIX"),
+        "nikkei_aug5": frame.day_change("NIKKEI"),
+        "vix_peak": frame.high["VIX"],
+        "usdjpy_peak": frame.high["USDJPY"],
+        "usdjpy_trough": frame.low["USDJPY"],
+        "boj_rate": frame.last["BOJ_RATE"],
+    }
+
+
+@st.cache_resource
+def get_fact_index() -> FactIndex:
+    """Case tables, key data points and timeline events as typed facts, parsed once."""
+    metrics = get_case_metrics()
+    events = [(date, description.format(**metrics)) for _, date, description in TIMELINE_EVENTS]
+    return FactIndex.from_sources(load_case_content(), events)
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache shared by every session."""
+    return AnswerCache(ANSWER_CACHE_PATH)
+
+
+@st.cache_resource
+def get_chat_store() -> ChatStore:
+    """Process-wide SQLite (WAL) store for every session's chat messages."""
+    return ChatStore(CHAT_DB_PATH)
+
+
+def chat_session_id() -> str:
+    """This conversation's id, kept in the URL so reloads find it again."""
+    if "chat_id" not in st.session_state:
+        st.session_state.chat_id = st.query_params.get("chat") or new_session_id()
+        st.query_params["chat"] = st.session_state.chat_id
+    return st.session_state.chat_id
+
+
+def remember(role: str, content: str) -> None:
+    """Persist a chat message and keep only the recent window in memory."""
+    msg = get_chat_store().append(chat_session_id(), role, content)
+    st.session_state.messages.append(msg)
+    trim_history(st.session_state.messages, st.session_state.history_state, CHAT_WINDOW)
+
+
+def show_older_messages() -> None:
+    st.session_state.chat_shown = st.session_state.get("chat_shown", CHAT_PAGE) + CHAT_PAGE
+
+
+def render_chat_history(messages: list[dict]) -> None:
+    """The latest page of messages, plus older pages from the store on request."""
+    store, session_id = get_chat_store(), chat_session_id()
+    shown = st.session_state.get("chat_shown", CHAT_PAGE)
+    visible = messages[-shown:]
+    if shown > len(messages) and messages:
+        visible = store.page(session_id, before=messages[0]["seq"], limit=shown - len(messages)) + messages
+    hidden = store.count(session_id) - len(visible)
+    if hidden > 0:
+        st.button(
+            f"⬆️ Load {min(hidden, CHAT_PAGE)} earlier messages ({hidden} hidden)",
+            on_click=show_older_messages,
+            use_container_width=True,
+        )
+    for msg in visible:
+        avatar = "🧑‍🎓" if msg["role"] == "user" else "🏦"
+        with st.chat_message(msg["role"], avatar=avatar):
+            st.markdown(msg["content"])
+
+
+@st.cache_resource
+def get_model_router() -> ModelRouter:
+    """Complexity router behind the "auto" model option (counts shared by every session)."""
+    return ModelRouter()
+
+
+def configured_rate_limits() -> dict[str, RateLimits]:
+    """Tier-1 defaults, overridden by CARRY_QA_RATE_LIMITS and then by secrets."""
+    limits = merge_limits(OPENAI_RATE_LIMITS, json.loads(os.environ.get("CARRY_QA_RATE_LIMITS", "{}")))
     try:
-        r = requests.get(url, timeout=3)
-        if r.status_code == 200:
-            return r.json()
-    except Exception:
-        pass
-    return None
+        overrides = st.secrets.get("openai_rate_limits")
+    except FileNotFoundError:  # no secrets.toml at all
+        overrides = None
+    return merge_limits(limits, overrides)
+
+
+@st.cache_resource
+def get_scheduler() -> AdmissionScheduler:
+    """Process-wide RPM/TPM admission control, fair across sessions."""
+    return AdmissionScheduler(configured_rate_limits())
+
+
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    """Process-wide registry that lets identical first-turn requests share one stream."""
+    return SingleFlight()
+
+
+@st.cache_resource
+def get_telemetry() -> Telemetry:
+    """Process-wide latency/token metrics (JSONL log + live window)."""
+    return Telemetry(TELEMETRY_PATH)
+
+
+@st.cache_resource
+def get_render_stats() -> RenderStats:
+    """Process-wide totals of the streamed-answer rendering work saved."""
+    return RenderStats()
+
+
+def render_stream(deltas) -> str:
+    """Draw a streamed answer in coalesced batches, freezing finished paragraphs."""
+    renderer = StreamRenderer(st.empty)
+    try:
+        return renderer.run(deltas)
+    finally:
+        get_render_stats().add(renderer.stats)
+
+
+@st.cache_resource
+def get_pool_stats() -> PoolStats:
+    """Connection-reuse counters for the shared OpenAI client."""
+    return PoolStats()
+
+
+@st.cache_resource
+def get_openai_client(api_key: str) -> OpenAI:
+    """One pooled keep-alive OpenAI client per process (per API key)."""
+    return make_client(
+        api_key,
+        get_pool_stats(),
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+@st.cache_resource
+def get_lottie_store() -> LottieStore:
+    """Process-wide Lottie store; starts background prefetch on first use."""
+    store = LottieStore(CACHE_DIR / "lottie", LOTTIE_VENDORED)
+    store.prefetch(list(LOTTIE_VENDORED))
+    return store
+
+
+def load_lottie_url(url: str) -> dict | None:
+    """Lottie animation JSON for a URL — never blocks on the network."""
+    return get_lottie_store().get(url)
 
 
 # ---------------------------------------------------------------------------
@@ -417,6 +900,82 @@ def load_lottie_url(url: str) -> dict | None:
 # ---------------------------------------------------------------------------
 
 
+def render_dashboard(
+    metrics: dict[str, float], when: str = "Aug 5", steps_lit: tuple[bool, ...] | None = None
+) -> None:
+    """Ticker tape, key-stat cards and (during replay) the lit contagion steps."""
+    ticker_text = " | ".join(item.format(**metrics) for item in TICKER_ITEMS)
+    doubled = f"{ticker_text}  |||  {ticker_text}"
+    st.markdown(
+        f'<div class="ticker-wrap">'
+        f'<div class="ticker-content"><span>{doubled}</span></div></div>',
+        unsafe_allow_html=True,
+    )
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="📉 Topix (yikes)", value=f"{metrics['topix_aug5']:.1%}", delta=when)
+    with col2:
+        st.metric(label="😱 VIX (ugh)", value=f"{metrics['vix_peak']:.1f}", delta="Panic mode")
+    with col3:
+        st.metric(
+            label="💱 USD/JPY",
+            value=f"{metrics['usdjpy_peak']:.0f}→{metrics['usdjpy_trough']:.0f}",
+            delta="ouch",
+        )
+    with col4:
+        st.metric(label="🏦 BOJ Rate", value=f"{metrics['boj_rate']:.2f}%", delta="finally lol")
+
+    if steps_lit is not None:
+        steps = "".join(
+            f'<div class="contagion-step{" lit" if lit else ""}">'
+            f'<div class="label">{step["label"]}</div></div>'
+            for step, lit in zip(CONTAGION_FLOW_STEPS, steps_lit, strict=True)
+        )
+        st.markdown(f'<div class="contagion-flow replay">{steps}</div>', unsafe_allow_html=True)
+
+
+def replay_clock() -> ReplayClock:
+    if "replay_clock" not in st.session_state:
+        st.session_state.replay_clock = clock_for(get_replay_tape())
+    return st.session_state.replay_clock
+
+
+def dashboard_fragment(metrics: dict[str, float]) -> None:
+    """Dashboard with the Aug 5 replay controls.
+
+    Runs as a fragment (every ``REPLAY_FRAME_SECONDS`` while playing), so a
+    replay frame reruns only this block — never the chat below it.
+    """
+    tape, clock = get_replay_tape(), replay_clock()
+    speed_col, play_col, reset_col = st.columns([3, 1, 1], vertical_alignment="bottom")
+    speed = speed_col.select_slider(
+        "🎬 Replay Jul 31 → Aug 5", SPEEDS, value=clock.speed, format_func=lambda s: f"{s}×"
+    )
+    if speed != clock.speed:
+        clock.set_speed(speed)
+    if play_col.button("⏸️ Pause" if clock.playing else "▶️ Play", use_container_width=True):
+        if clock.playing:
+            clock.pause()
+        else:
+            clock.play()
+        st.rerun()  # full rerun re-registers the fragment with/without its timer
+    if reset_col.button("⏹️ Reset", use_container_width=True):
+        clock.reset()
+        st.rerun()
+
+    if not clock.playing and clock.position() <= clock.start:
+        render_dashboard(metrics)
+        return
+    with get_telemetry().span("replay_frame_ms"):
+        frame = tape.frame_at(clock.position())
+    render_dashboard(replay_metrics(frame), when=frame.label[:10], steps_lit=frame.steps_lit)
+    st.progress(frame.progress, text=f"{frame.label} · {clock.speed}×")
+    if clock.playing and clock.finished:
+        clock.pause()
+        st.rerun()
+
+
 def render_sidebar(case_content: str) -> dict:
     """Render sidebar with case overview, settings, and example questions."""
     with st.sidebar:
@@ -451,16 +1010,91 @@ def render_sidebar(case_content: str) -> dict:
         st.subheader("⚙️ Nerd Settings")
         model = st.selectbox(
             "Model",
-            ["gpt-4.1", "gpt-4o-mini", "gpt-4.1-mini"],
+            [AUTO, "gpt-4.1", "gpt-4o-mini", "gpt-4.1-mini"],
             index=0,
+            format_func=lambda m: "🧭 auto (cheapest that fits)" if m == AUTO else m,
+            help="Auto scores each question locally and sends it to the cheapest model that can handle it.",
         )
         temperature = st.slider("Temperature", 0.0, 1.0, 0.3, 0.1)
+        history_budget = st.slider(
+            "History budget (tokens)",
+            500,
+            8000,
+            3000,
+            500,
+            help=f"Last {HISTORY_KEEP_TURNS} turns are sent verbatim; older ones get summarized.",
+        )
+        context_mode = st.radio(
+            "Case context",
+            CONTEXT_MODES,
+            horizontal=True,
+            help="Top-k sends only the case sections relevant to each question.",
+        )
+        top_k = 4
+        if context_mode == "Top-k sections":
+            top_k = st.slider("Sections per question", 1, 8, top_k)
+        stats = get_answer_cache().stats
+        st.caption(
+            f"🗄️ Answer cache: {stats.exact_hits} exact · {stats.near_hits} near · "
+            f"{stats.misses} miss ({stats.hit_rate:.0%} hit rate)"
+        )
+        facts = get_fact_index().stats
+        if facts.answered:
+            st.caption(f"📌 Fact index: {facts.answered} instant answers, no API call")
+        flights = get_single_flight().stats
+        if flights.joined:
+            st.caption(
+                f"🛫 Coalesced: {flights.joined} requests shared {flights.upstream} streams "
+                f"({flights.saved:.0%} fewer API calls)"
+            )
+        routed = get_model_router().counts
+        if routed:
+            st.caption("🧭 Auto routing: " + " · ".join(f"{n} → {m}" for m, n in routed.most_common()))
+        admissions = get_scheduler().stats
+        if admissions.queued:
+            st.caption(
+                f"🚦 Rate limits: {admissions.queued} of {admissions.admitted} requests queued "
+                f"(longest wait {admissions.longest_wait:.0f}s)"
+            )
+        rendering = get_render_stats()
+        if rendering.deltas:
+            st.caption(
+                f"🖌️ Streaming: {rendering.renders} screen updates for {rendering.deltas} tokens "
+                f"({rendering.saved:.0%} less markdown re-rendered)"
+            )
+        pool = get_pool_stats()
+        if pool.requests:
+            st.caption(
+                f"🔌 Connections: {pool.connections} opened for {pool.requests} requests "
+                f"({pool.reuse_rate:.0%} reused, {pool.tls_handshakes} TLS handshakes)"
+            )
+        usage = st.session_state.get("last_usage")
+        if usage:
+            st.caption(
+                f"⚡ Prompt cache: {usage['cached_tokens']:,} / "
+                f"{usage['prompt_tokens']:,} input tokens cached last turn"
+            )
+        if st.toggle("📈 Live latency panel (p50 / p95)"):
+            telemetry = get_telemetry()
+            rows = [
+                {"metric": m, "p50": round(v["p50"], 1), "p95": round(v["p95"], 1), "n": v["count"]}
+                for m, v in telemetry.summary().items()
+            ]
+            if rows:
+                st.table(rows)
+                with st.expander("Prometheus text"):
+                    st.code(telemetry.prometheus_text(), language="text")
+            else:
+                st.caption("No measurements yet — ask something.")
 
         st.markdown('<hr class="glow-divider">', unsafe_allow_html=True)
 
         # Clear chat button
         if st.button("🗑️ Nuke the Chat (start fresh)", use_container_width=True):
+            get_chat_store().clear(chat_session_id())
             st.session_state.messages = []
+            st.session_state.history_state = HistoryState()
+            st.session_state.pop("chat_shown", None)
             st.session_state.pop("welcomed", None)
             st.session_state.pop("first_question_asked", None)
             st.rerun()
@@ -471,112 +1105,215 @@ def render_sidebar(case_content: str) -> dict:
             "*no portfolios were harmed in the making of this app (just feelings)*"
         )
 
-    return {"model": model, "temperature": temperature}
+    return {
+        "model": model,
+        "temperature": temperature,
+        "history_budget": history_budget,
+        "context_mode": context_mode,
+        "top_k": top_k,
+    }
 
 
 # ---------------------------------------------------------------------------
-# Main app
+# Page sections
 # ---------------------------------------------------------------------------
 
 
-def main():
-    st.set_page_config(
-        page_title=APP_TITLE,
-        page_icon="💹",
-        layout="centered",
-    )
-
-    # Inject custom CSS + floating symbols
-    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
-    st.markdown(FLOATING_SYMBOLS_HTML, unsafe_allow_html=True)
+@st.cache_resource
+def get_case_metrics() -> dict[str, float]:
+    """Case numbers from the market store, computed once per process."""
+    return case_metrics(get_market_store())
 
-    # ── Animated Hero Header ──
-    st.markdown(
-        '<div class="hero-title">🇯🇵💹 Japan Carry Trade Q&A 🏯</div>',
-        unsafe_allow_html=True,
-    )
-    st.markdown(
-        '<div class="bouncing-yen">¥</div>',
-        unsafe_allow_html=True,
-    )
-    st.markdown(
-        '<div class="hero-caption">the carry trade crashed so you don\'t have to — AI-powered case study Q&A</div>',
-        unsafe_allow_html=True,
-    )
 
-    # ── Ticker Tape Banner ──
-    ticker_text = " | ".join(TICKER_ITEMS)
-    doubled = f"{ticker_text}  |||  {ticker_text}"
-    st.markdown(
-        f'<div class="ticker-wrap">'
-        f'<div class="ticker-content"><span>{doubled}</span></div></div>',
-        unsafe_allow_html=True,
+def timeline_html(metrics: dict[str, float]) -> str:
+    """Timeline cards with a staggered fade-in, as one HTML block."""
+    return "".join(
+        f'<div class="timeline-item" style="animation-delay:{i * 0.15}s">'
+        f"<strong>{emoji} {date}</strong><br>{description.format(**metrics)}</div>"
+        for i, (emoji, date, description) in enumerate(TIMELINE_EVENTS)
     )
 
-    # ── Key Stats Dashboard ──
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric(label="📉 Topix (yikes)", value="-12%", delta="Aug 5")
-    with col2:
-        st.metric(label="😱 VIX (ugh)", value=">60", delta="Panic mode")
-    with col3:
-        st.metric(label="💱 USD/JPY", value="161→142", delta="ouch")
-    with col4:
-        st.metric(label="🏦 BOJ Rate", value="0.25%", delta="finally lol")
 
-    # ── Visual Timeline (staggered animation) ──
+def contagion_flow_html(matrix: TEMatrix) -> str:
+    """Domino Effect steps with TE badges on the arrows between them."""
+    flow_parts: list[str] = []
+    for idx, step in enumerate(CONTAGION_FLOW_STEPS):
+        flow_parts.append(
+            f'<div class="contagion-step">'
+            f'<div class="label">{step["label"]}</div>'
+            f'<div class="detail">{step["detail"]}</div></div>'
+        )
+        if idx < len(CONTAGION_FLOW_STEPS) - 1:
+            badge = te_badge(matrix, step["asset"], CONTAGION_FLOW_STEPS[idx + 1]["asset"])
+            flow_parts.append(f'<div class="contagion-arrow">→<div class="te-badge">{badge}</div></div>')
+    return f'<div class="contagion-flow">{"".join(flow_parts)}</div>'
+
+
+@st.cache_resource
+def get_static_html() -> dict[str, str]:
+    """Page HTML that cannot change while the process runs, rendered once."""
+    with get_telemetry().span("te_matrix_ms"):
+        matrix = compute_contagion_matrix()
+    return {
+        "head": f"{CUSTOM_CSS}\n{FLOATING_SYMBOLS_HTML}\n{HERO_HTML}",
+        "timeline": timeline_html(get_case_metrics()),
+        "contagion": contagion_flow_html(matrix),
+    }
+
+
+@st.fragment
+def timeline_fragment() -> None:
+    """Timeline expander; its zoom slider reruns only this fragment."""
     with st.expander("📅 The Timeline of Chaos — How It All Went Down"):
-        for i, (emoji, date, description) in enumerate(TIMELINE_EVENTS):
-            delay = i * 0.15
-            st.markdown(
-                f'<div class="timeline-item" style="animation-delay:{delay}s">'
-                f"<strong>{emoji} {date}</strong><br>{description}</div>",
-                unsafe_allow_html=True,
-            )
+        st.markdown(get_static_html()["timeline"], unsafe_allow_html=True)
+
+        tiles = get_chart_tiles()
+        bounds = from_minutes(next(iter(tiles.values())).minutes[[0, -1]]).astype(object)
+        start, end = st.slider(
+            "Zoom (UTC)",
+            min_value=bounds[0],
+            max_value=bounds[1],
+            value=(bounds[0], bounds[1]),
+            step=timedelta(minutes=15),
+            format="MMM D HH:mm",
+        )
+        with get_telemetry().span("timeline_tiles_ms"):
+            data, resolution = timeline_chart_data(tiles, start, end + timedelta(minutes=1))
+        st.vega_lite_chart(data, timeline_spec())
+        detail = (
+            "every 1-minute bar"
+            if resolution == 1
+            else f"min/max per {resolution}-minute bucket; zoom in for finer bars"
+        )
+        st.caption(f"{len(data['time']):,} points drawn ({detail}). Synthetic bars pinned to published levels.")
 
-    # ── Contagion Flow Diagram ──
+
+def render_contagion_flow() -> None:
+    """Domino Effect expander (pre-rendered flow, no widgets)."""
     with st.expander("🔗 The Domino Effect — Who Broke What (and When)"):
-        flow_parts: list[str] = []
-        for idx, step in enumerate(CONTAGION_FLOW_STEPS):
-            flow_parts.append(
-                f'<div class="contagion-step">'
-                f'<div class="label">{step["label"]}</div>'
-                f'<div class="detail">{step["detail"]}</div></div>'
-            )
-            if idx < len(CONTAGION_FLOW_STEPS) - 1:
-                flow_parts.append('<div class="contagion-arrow">→</div>')
-        st.markdown(
-            f'<div class="contagion-flow">{"".join(flow_parts)}</div>',
-            unsafe_allow_html=True,
+        st.markdown(get_static_html()["contagion"], unsafe_allow_html=True)
+        st.caption(
+            f"Arrow badges: TE(left → right) with p-values from {TE_SURROGATES} shuffled "
+            f"surrogates (synthetic ticks; n.s. = p ≥ {TE_ALPHA})."
         )
         # Second Lottie animation
         lottie_chart = load_lottie_url(LOTTIE_CHART_URL)
         if lottie_chart:
             st_lottie(lottie_chart, height=120, key="contagion_lottie")
 
-    # Glowing divider instead of st.divider()
-    st.markdown('<hr class="glow-divider">', unsafe_allow_html=True)
 
-    # Load case content and build system prompt
-    case_content = load_case_content()
-    system_prompt = build_system_prompt(case_content)
-    settings = render_sidebar(case_content)
+@st.fragment
+def te_lab_fragment() -> None:
+    """Transfer Entropy Lab; its sliders rerun only this fragment."""
+    with st.expander("🧮 Transfer Entropy Lab — Who Leads Whom?"):
+        st.caption(
+            "TE(X → Y) = H(Y_future | Y_past) − H(Y_future | Y_past, X_past), "
+            "computed live on synthetic ticks where JPY leads SPX and SPX leads MXN by one tick."
+        )
+        col_k, col_lag, col_bins, col_method = st.columns(4)
+        k = col_k.slider("History k", 1, 3, 1)
+        lag = col_lag.slider("Lag (ticks)", 1, 5, 1)
+        bins = col_bins.slider("Bins / order", 2, 4, 3)
+        method = col_method.radio("Symbols", TE_METHODS, horizontal=True)
+        with get_telemetry().span("transfer_entropy_ms"):
+            te_results = compute_te_results(k, lag, bins, method)
+        matrix = compute_contagion_matrix()
+        st.table(
+            [
+                {
+                    "Pair": f"{r.source} → {r.target}",
+                    "TE forward (bits)": round(r.forward, 4),
+                    "TE reverse (bits)": round(r.reverse, 4),
+                    "Net": round(r.net, 4),
+                    "Leader": r.source if r.net > 0 else r.target,
+                }
+                for r in te_results
+            ]
+        )
+        st.caption("Surrogate p-values, row → column (Domino Effect assets)")
+        st.table(
+            {
+                "From": matrix.names,
+                **{
+                    f"→ {target}": [
+                        "—" if source == target else f"{p:.3f}"
+                        for source, p in zip(matrix.names, matrix.p_values[:, j], strict=True)
+                    ]
+                    for j, target in enumerate(matrix.names)
+                },
+            }
+        )
 
-    # Initialize OpenAI client
-    api_key = st.secrets.get("OPENAI_API_KEY", None)
-    if not api_key:
-        st.warning(
-            "⚠️ Can't do much without an API key. Pop your OpenAI key "
-            "into **Manage app → Settings → Secrets** like this:\n\n"
-            '`OPENAI_API_KEY = "sk-your-key-here"`\n\n'
+        st.markdown("**📉 Correlation compression into the unwind**")
+        window = st.slider("Rolling window (ticks)", 100, 2000, 500, 100)
+        compression = compute_compression(window)
+        st.vega_lite_chart(compression, line_spec(["corr(SPX, MXN)"]))
+        st.vega_lite_chart(compression, line_spec(["TE(JPY→SPX)", "TE(SPX→JPY)"]))
+        st.caption(
+            "Synthetic H1 2024 → August ticks: correlation compresses from ~0.4 to ~0.9 "
+            "(the case's SPX/MXN numbers) while JPY→SPX information flow switches on. "
+            "Each point is an O(1) update of the running window."
         )
-        st.stop()
 
-    client = OpenAI(api_key=api_key)
 
-    # Session state for chat history
+def render_markov_lab() -> None:
+    """Markov Lab expander (cached regime fit, no widgets)."""
+    with st.expander("🔮 Markov Lab — The Day the Matrix Changed"):
+        with get_telemetry().span("regime_fit_ms"):
+            shift = compute_regime_shift()
+        before_col, after_col, break_col = st.columns(3)
+        before_col.metric("P(hold → hike), before", f"{shift['before']:.1%}")
+        after_col.metric(
+            "P(hold → hike), after", f"{shift['after']:.1%}", delta=f"{shift['after'] / shift['before']:.0f}× jump"
+        )
+        break_col.metric("Estimated break", shift["break_date"])
+        st.vega_lite_chart(shift["chart"], timeline_spec(160))
+        st.caption(
+            "Two-state Gaussian HMM (Baum–Welch) fitted to 17 years of synthetic daily USD/JPY "
+            "returns; the break is where the fitted hold → hike probability most likely "
+            "changed. The case quotes <1% → 15%+."
+        )
+
+
+@st.fragment
+def carry_sim_fragment() -> None:
+    """Margin-Call Simulator; submitting the form reruns only this fragment."""
+    with st.expander("🎲 Margin-Call Simulator — Would Your Carry Trade Survive?"):
+        with st.form("carry_sim"):
+            target_col, lev_col, margin_col = st.columns(3)
+            target = target_col.radio("Borrow JPY, buy", ["MXN", "USD"], horizontal=True)
+            leverage = lev_col.slider("Leverage", 1, 25, 10)
+            maintenance = margin_col.slider("Margin call below equity / notional", 0.01, 0.2, 0.05, 0.01)
+            regime = st.radio("Yen-surge odds", list(CARRY_REGIMES), horizontal=True)
+            if st.form_submit_button(f"Run {CARRY_SIM_PATHS:,} paths"):
+                st.session_state.carry_sim_params = (target, float(leverage), maintenance, CARRY_REGIMES[regime])
+        if "carry_sim_params" in st.session_state:
+            with get_telemetry().span("carry_sim_ms"):
+                sim = run_carry_sim(*st.session_state.carry_sim_params)
+            call_col, mean_col, var_col, skew_col = st.columns(4)
+            call_col.metric("P(margin call)", f"{sim['margin_call']:.1%}")
+            mean_col.metric("Mean 1-month P&L", f"{sim['mean']:+.1%}")
+            var_col.metric("1% worst case", f"{sim['var_99']:+.0%}", delta=f"ES {sim['es_99']:+.0%}")
+            skew_col.metric("Skew", f"{sim['skew']:+.2f}")
+            st.vega_lite_chart(sim["histogram"], histogram_spec())
+            st.caption(
+                "Correlated USD/JPY, SPX and USD/MXN paths with calm/stress regimes and "
+                "liquidation feedback (yen-funded crowd losses force more selling). "
+                "Called paths are closed at that day's equity. Synthetic parameters."
+            )
+
+
+def render_chat(client: OpenAI, settings: dict, system_prompt: str) -> None:
+    """Chat history, input and the answer to a new question."""
+    telemetry = get_telemetry()
+
+    # Session state for chat history: the latest window of the stored conversation
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = get_chat_store().page(chat_session_id(), limit=CHAT_WINDOW)
+        if st.session_state.messages:
+            st.session_state.welcomed = True
+    if "history_state" not in st.session_state:
+        st.session_state.history_state = HistoryState()
 
     # Welcome message on first load
     if not st.session_state.get("welcomed"):
@@ -589,15 +1326,10 @@ def main():
             "💡 *Not sure where to start? The sidebar has some good ones. "
             "Pick one, I'll do the rest.*"
         )
-        st.session_state.messages.append(
-            {"role": "assistant", "content": welcome}
-        )
+        remember("assistant", welcome)
 
-    # Display chat history with custom avatars
-    for msg in st.session_state.messages:
-        avatar = "🧑‍🎓" if msg["role"] == "user" else "🏦"
-        with st.chat_message(msg["role"], avatar=avatar):
-            st.markdown(msg["content"])
+    # Display chat history with custom avatars, one page at a time
+    render_chat_history(st.session_state.messages)
 
     # Pulsing "Live" indicator above chat input
     st.markdown(
@@ -631,27 +1363,116 @@ def main():
         elif "driver" in prompt_lower:
             st.toast("DRIVER framework activated — slay", icon="🧭")
 
+        # Only first-turn answers are cacheable — later turns depend on history
+        turns = sum(m["role"] == "user" for m in st.session_state.messages)
+        first_turn = turns == 0
+
+        # "auto" picks the cheapest model that can handle this prompt; every
+        # decision is logged so routed latency and tokens can be compared
+        model = settings["model"]
+        if model == AUTO:
+            with telemetry.span("route_ms"):
+                decision = get_model_router().route(prompt, history_turns=turns)
+            model = decision.model
+            telemetry.record("route_score", decision.score, model=model, **decision.features)
+
         # Show user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        remember("user", prompt)
         with st.chat_message("user", avatar="🧑‍🎓"):
             st.markdown(prompt)
 
+        # Retrieval mode swaps the full case for the top-k sections (falls
+        # back to the full case when nothing matches)
+        if settings["context_mode"] == "Top-k sections":
+            sections = retrieve_case_sections(prompt, settings["top_k"])
+            if sections:
+                system_prompt = build_system_prompt(sections)
+
         # Build messages for OpenAI API call
-        api_messages = [{"role": "system", "content": system_prompt}] + [
-            {"role": m["role"], "content": m["content"]}
-            for m in st.session_state.messages
-        ]
+        history = compact_history(
+            st.session_state.messages,
+            st.session_state.history_state,
+            settings["history_budget"],
+            keep_turns=HISTORY_KEEP_TURNS,
+        )
+        # Computed TE numbers ride right behind the case prompt
+        te_message = te_context_message(compute_te_results())
+        api_messages = build_api_messages(system_prompt, [te_message, *history])
 
         # Stream assistant response
         with st.chat_message("assistant", avatar="🏦"):
+            # Plain numeric lookups are answered from the case's own tables
+            fact = get_fact_index().answer(prompt)
+            answer_cache = get_answer_cache()
+            cache_args = (model, settings["temperature"], system_prompt, prompt)
+            cached = answer_cache.get(*cache_args) if first_turn and fact is None else None
             try:
-                stream = client.chat.completions.create(
-                    model=settings["model"],
-                    messages=api_messages,
-                    temperature=settings["temperature"],
-                    stream=True,
-                )
-                response = st.write_stream(stream)
+                if fact is not None:
+                    with telemetry.span("fact_answer_ms"):
+                        st.markdown(fact.text)
+                        st.caption("⚡ From the case's fact index — no API call")
+                    response = fact.text
+                elif cached is not None:
+                    with telemetry.span("cache_replay_ms"):
+                        response = render_stream(replay_answer(cached))
+                else:
+                    report = StreamReport(requested_model=model)
+
+                    def upstream(report: StreamReport):
+                        return resilient_stream(
+                            client,
+                            model=model,
+                            messages=api_messages,
+                            temperature=settings["temperature"],
+                            report=report,
+                        )
+
+                    scheduler, waiting = get_scheduler(), st.empty()
+
+                    def admit():
+                        # Wait for RPM/TPM quota, showing the place in line meanwhile
+                        ticket = scheduler.admit(
+                            model,
+                            chat_session_id(),
+                            estimate_request_tokens(api_messages),
+                            on_wait=lambda place, eta: waiting.caption(
+                                f"🚦 You're #{place} in line for {model} — about {eta:.0f}s"
+                            ),
+                        )
+                        waiting.empty()
+                        return ticket
+
+                    # Sessions asking the same first question at once share one stream
+                    coalesced = False
+                    if first_turn:
+                        key = flight_key(model, settings["temperature"], api_messages)
+                        flight = get_single_flight().join(key, upstream, report, admit)
+                        # Only the session that started the stream was admitted (and settles)
+                        coalesced = flight.report is not report
+                        ticket = None if coalesced else flight.admission
+                        report, deltas = flight.report, flight.subscribe()
+                    else:
+                        ticket = admit()
+                        deltas = upstream(report)
+                    if settings["model"] == AUTO:
+                        st.caption(f"🧭 Auto-routed to **{model}**")
+                    routed = {"model": model, "auto": settings["model"] == AUTO, "coalesced": coalesced}
+                    # Token usage is recorded once, by the session that opened the stream
+                    usage = {} if coalesced else report.usage
+                    with telemetry.span("write_stream_ms", **routed):
+                        response = render_stream(timed_stream(deltas, telemetry, usage, **routed))
+                    if report.usage:
+                        st.session_state.last_usage = report.usage
+                        if ticket is not None:
+                            used = report.usage["prompt_tokens"] + report.usage["completion_tokens"]
+                            scheduler.settle(ticket, used, report.model)  # the fallback's lane if it answered
+                    if report.fell_back:
+                        st.caption(
+                            f"⏳ {report.requested_model} was rate limited — "
+                            f"answered by {report.model} instead."
+                        )
+                    elif first_turn and isinstance(response, str) and response:
+                        answer_cache.put(*cache_args, response)
             except Exception as exc:
                 err = str(exc).lower()
                 if "api_key" in err or "auth" in err:
@@ -673,10 +1494,74 @@ def main():
                     )
                 st.error(response)
 
-        st.session_state.messages.append(
-            {"role": "assistant", "content": response}
+        remember("assistant", response)
+
+
+@st.fragment
+def chat_fragment(client: OpenAI, settings: dict, system_prompt: str) -> None:
+    """The chat, as a fragment: a chat turn reruns only this block.
+
+    Settings come from the sidebar, outside the fragment, so changing them
+    triggers a full rerun that hands the fragment fresh arguments.
+    """
+    with get_telemetry().span("chat_fragment_ms"):
+        render_chat(client, settings, system_prompt)
+
+
+# ---------------------------------------------------------------------------
+# Main app
+# ---------------------------------------------------------------------------
+
+
+def main():
+    st.set_page_config(
+        page_title=APP_TITLE,
+        page_icon="💹",
+        layout="centered",
+    )
+
+    # CSS, floating symbols and the animated hero header: one block, built once per process
+    st.markdown(get_static_html()["head"], unsafe_allow_html=True)
+
+    with get_telemetry().span("market_metrics_ms"):
+        metrics = get_case_metrics()
+
+    # ── Ticker Tape + Key Stats (replayable) ──
+    run_every = REPLAY_FRAME_SECONDS if replay_clock().playing else None
+    st.fragment(dashboard_fragment, run_every=run_every)(metrics)
+
+    # Expanders: static HTML comes pre-rendered; sections with widgets are
+    # fragments, so using them never reruns the chat (and vice versa)
+    timeline_fragment()
+    render_contagion_flow()
+    te_lab_fragment()
+    render_markov_lab()
+    carry_sim_fragment()
+
+    # Glowing divider instead of st.divider()
+    st.markdown('<hr class="glow-divider">', unsafe_allow_html=True)
+
+    # Load case content and build system prompt
+    telemetry = get_telemetry()
+    with telemetry.span("case_load_ms"):
+        case_content = load_case_content()
+    with telemetry.span("prompt_build_ms"):
+        system_prompt = build_system_prompt(case_content)
+    settings = render_sidebar(case_content)
+
+    # Initialize OpenAI client
+    api_key = st.secrets.get("OPENAI_API_KEY", None)
+    if not api_key:
+        st.warning(
+            "⚠️ Can't do much without an API key. Pop your OpenAI key "
+            "into **Manage app → Settings → Secrets** like this:\n\n"
+            '`OPENAI_API_KEY = "sk-your-key-here"`\n\n'
         )
+        st.stop()
+
+    chat_fragment(get_openai_client(api_key), settings, system_prompt)
 
 
 if __name__ == "__main__":
-    main()
+    with get_telemetry().span("script_run_ms"):
+        main()
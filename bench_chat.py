@@ -0,0 +1,192 @@
+"""Offline benchmark for the chat request path (no network, no API key).
+
+Drives ``app.py`` headlessly with Streamlit's AppTest against the local
+``FakeOpenAI`` streaming server and reports, for each simulated user count:
+
+- ``rerun_ms``      — idle rerun (no new question) wall time, p50/p95
+- ``turn_ms``       — chat turn (question → full streamed answer), p50/p95
+- ``ttft_overhead_ms`` — app-side time-to-first-token minus the server's
+  configured TTFT, with all users streaming concurrently through the shared
+  pooled client, p50/p95
+- ``mem_per_session_kb`` — Python heap held per live AppTest session
+
+AppTest keeps a process-global runtime, so Streamlit sessions are driven one
+after another; the concurrent phase exercises the streaming request path
+(message assembly → resilient stream → telemetry) from N threads at once.
+
+    python bench_chat.py --users 1 10 100 --out bench_baseline.json
+    python bench_chat.py --compare bench_baseline.json   # exit 1 on regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+APP_PATH = Path(__file__).parent / "app.py"
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+
+# Metrics checked by --compare (lower is better)
+TRACKED = ["rerun_ms", "turn_ms", "ttft_overhead_ms"]
+
+
+def pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, round(q / 100 * (len(values) - 1))))]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {"p50": round(pct(values, 50), 2), "p95": round(pct(values, 95), 2)}
+
+
+def new_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    at.secrets["OPENAI_API_KEY"] = "sk-bench"
+    return at
+
+
+def drive_sessions(users: int) -> dict[str, list[float]]:
+    """Open ``users`` sessions, ask one question each, then idle-rerun."""
+    rerun_ms: list[float] = []
+    turn_ms: list[float] = []
+    sessions = []
+    for _ in range(users):
+        at = new_session()
+        at.run()
+        started = time.perf_counter()
+        at.chat_input[0].set_value(f"bench {uuid.uuid4().hex}").run()
+        turn_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        at.run()
+        rerun_ms.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        sessions.append(at)
+    return {"rerun_ms": rerun_ms, "turn_ms": turn_ms}
+
+
+def session_memory_kb(users: int) -> float:
+    """Heap retained per live session (tracemalloc, separate pass)."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sessions = []
+    for _ in range(users):
+        at = new_session()
+        at.run()
+        at.chat_input[0].set_value(f"bench {uuid.uuid4().hex}").run()
+        sessions.append(at)
+    held = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return round(held / users / 1024, 1)
+
+
+def concurrent_ttft(users: int, server_ttft: float) -> list[float]:
+    """TTFT overhead (ms) with ``users`` streams in flight at once."""
+    from app import build_api_messages, build_system_prompt, load_case_content
+    from openai_pool import PoolStats, make_client
+    from streaming import resilient_stream
+
+    client = make_client("sk-bench", PoolStats(), max_connections=max(users, 10))
+    system_prompt = build_system_prompt(load_case_content())
+    barrier = threading.Barrier(users)
+    overheads: list[float] = []
+    lock = threading.Lock()
+
+    def one_user() -> None:
+        messages = build_api_messages(system_prompt, [{"role": "user", "content": "Aug 5?"}])
+        barrier.wait()
+        started = time.perf_counter()
+        stream = resilient_stream(client, model="gpt-4.1", messages=messages, temperature=0.3)
+        next(stream)
+        ttft = time.perf_counter() - started
+        for _ in stream:
+            pass
+        with lock:
+            overheads.append((ttft - server_ttft) * 1000)
+
+    threads = [threading.Thread(target=one_user) for _ in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return overheads
+
+
+def run(levels: list[int], ttft: float, tokens_per_second: float) -> dict:
+    from fake_openai import FakeOpenAI
+
+    results: dict = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "server_ttft_s": ttft,
+            "server_tokens_per_second": tokens_per_second,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "levels": {},
+    }
+    with FakeOpenAI(ttft=ttft, tokens_per_second=tokens_per_second) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        for users in levels:
+            os.environ["CARRY_QA_CACHE_DIR"] = tempfile.mkdtemp(prefix="carry-bench-")
+            timings = drive_sessions(users)
+            overheads = concurrent_ttft(users, ttft)
+            results["levels"][str(users)] = {
+                "rerun_ms": summarize(timings["rerun_ms"]),
+                "turn_ms": summarize(timings["turn_ms"]),
+                "ttft_overhead_ms": summarize(overheads),
+                "mem_per_session_kb": session_memory_kb(users),
+            }
+            print(f"{users:>4} users: {json.dumps(results['levels'][str(users)])}", file=sys.stderr)
+    return results
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Tracked p50s that got worse than ``baseline`` by more than ``tolerance``."""
+    found = []
+    for users, metrics in current["levels"].items():
+        base = baseline.get("levels", {}).get(users)
+        if not base:
+            continue
+        for name in TRACKED:
+            now, then = metrics[name]["p50"], base[name]["p50"]
+            if then > 0 and now > then * (1 + tolerance):
+                found.append(f"{users} users {name}: {then} → {now} ms")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--ttft", type=float, default=0.05, help="server TTFT in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.users, args.ttft, args.tokens_per_second)
+    print(json.dumps(results, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        found = regressions(results, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Monte Carlo margin-call simulator for a yen-funded carry position.
+
+The position borrows JPY and holds ``leverage`` × equity of USD or MXN,
+earning the rate differential. Each path runs USD/JPY, SPX and USD/MXN
+daily returns through a calm/stress Markov chain (the stress regime is the
+yen surge: negative USD/JPY drift, higher vol, compressed correlations).
+Liquidation feeds back: the carry crowd (yen-funded US equities and pesos)
+turns yesterday's loss beyond a threshold into selling pressure today — the
+yen rallies further and the pressure spills into SPX and the peso, the
+case's JPY → SPX → MXN chain. A path is margin-called
+(and closed at that day's equity) once equity falls below
+``maintenance`` × notional.
+
+Paths run in fixed-size chunks: each chunk is a day loop over (chunk,)
+arrays, and results are folded into running moments and fixed-bin
+histograms, so memory is constant whatever the path count. Shocks are
+drawn in float32 and the stress Cholesky factor is applied only to the
+paths currently in stress.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+TRADING_DAYS = 252
+ASSETS = ("USDJPY", "SPX", "USDMXN")
+RATES = {"JPY": 0.0025, "USD": 0.053, "MXN": 0.11}  # policy rates, mid-2024
+RETURN_EDGES = np.linspace(-2.0, 1.0, 601)  # final P&L / initial equity
+
+
+@dataclass(frozen=True)
+class CarryPosition:
+    """Long ``target`` funded in JPY."""
+
+    target: str = "MXN"  # "USD" | "MXN"
+    leverage: float = 10.0
+    maintenance: float = 0.05  # equity / notional below which the broker closes you out
+    horizon_days: int = 21  # one month
+
+    @property
+    def carry(self) -> float:
+        """Daily rate differential earned on the notional."""
+        return (RATES[self.target] - RATES["JPY"]) / TRADING_DAYS
+
+
+@dataclass(frozen=True)
+class MarketModel:
+    """Daily dynamics per regime; rows/columns follow ``ASSETS``."""
+
+    p_stress: float = 0.0005  # P(calm → stress) per day: ~1% a month, the "old matrix"
+    p_recover: float = 0.2  # P(stress → calm) per day
+    drift_calm: tuple[float, float, float] = (0.0001, 0.0004, 0.0)
+    drift_stress: tuple[float, float, float] = (-0.008, -0.006, 0.006)
+    vol_calm: tuple[float, float, float] = (0.004, 0.008, 0.0045)
+    vol_stress: tuple[float, float, float] = (0.012, 0.02, 0.015)
+    corr_calm: tuple[tuple[float, ...], ...] = ((1.0, 0.2, 0.3), (0.2, 1.0, -0.4), (0.3, -0.4, 1.0))
+    corr_stress: tuple[tuple[float, ...], ...] = ((1.0, 0.6, -0.5), (0.6, 1.0, -0.9), (-0.5, -0.9, 1.0))
+    feedback: float = 0.25  # selling pressure per unit of crowd loss beyond the threshold
+    feedback_threshold: float = 0.01  # daily crowd loss that starts forced selling
+    spillover: tuple[float, float, float] = (-1.0, -0.8, 0.9)  # how that pressure moves each asset
+
+    @staticmethod
+    def daily_hazard(per_month: float) -> float:
+        """P(calm → stress) per day for a given chance of a surge within a month."""
+        return 1 - (1 - per_month) ** (1 / 21)
+
+    def cholesky(self, stress: bool) -> np.ndarray:
+        vol = np.array(self.vol_stress if stress else self.vol_calm)
+        corr = np.array(self.corr_stress if stress else self.corr_calm)
+        return np.linalg.cholesky(corr * np.outer(vol, vol))
+
+
+@dataclass
+class SimResult:
+    """Streaming summary of every path (constant size)."""
+
+    paths: int = 0
+    margin_calls: int = 0
+    return_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(RETURN_EDGES) + 1, dtype=np.int64))
+    call_day_counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    moments: np.ndarray = field(default_factory=lambda: np.zeros(3))  # Σr, Σr², Σr³
+    worst: float = math.inf
+
+    @property
+    def margin_call_probability(self) -> float:
+        return self.margin_calls / self.paths
+
+    @property
+    def mean(self) -> float:
+        return self.moments[0] / self.paths
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self.moments[1] / self.paths - self.mean**2, 0.0))
+
+    @property
+    def skew(self) -> float:
+        m1, m2, m3 = self.moments / self.paths
+        variance = m2 - m1 * m1
+        return (m3 - 3 * m1 * m2 + 2 * m1**3) / variance**1.5 if variance > 0 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Final-return quantile, to the histogram's bin width (0.005)."""
+        cumulative = np.cumsum(self.return_counts)
+        slot = int(np.searchsorted(cumulative, q * self.paths))
+        return float(RETURN_EDGES[np.clip(slot - 1, 0, len(RETURN_EDGES) - 1)])
+
+    def expected_shortfall(self, q: float = 0.01) -> float:
+        """Mean final return over the worst ``q`` of paths (bin midpoints)."""
+        mids = np.concatenate([[RETURN_EDGES[0]], (RETURN_EDGES[:-1] + RETURN_EDGES[1:]) / 2, [RETURN_EDGES[-1]]])
+        tail = max(1, round(q * self.paths))
+        taken = np.minimum(self.return_counts, np.maximum(tail - np.cumsum(self.return_counts) + self.return_counts, 0))
+        return float((taken * mids).sum() / taken.sum())
+
+    def add(self, final: np.ndarray, call_day: np.ndarray) -> None:
+        self.paths += len(final)
+        called = call_day >= 0
+        self.margin_calls += int(called.sum())
+        self.call_day_counts += np.bincount(call_day[called], minlength=len(self.call_day_counts))
+        self.return_counts += np.bincount(
+            np.searchsorted(RETURN_EDGES, final, "right"), minlength=len(self.return_counts)
+        )
+        self.moments += (final.sum(), (final * final).sum(), (final**3).sum())
+        self.worst = min(self.worst, float(final.min()))
+
+
+def simulate_chunk(
+    position: CarryPosition, market: MarketModel, paths: int, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Final return (P&L / initial equity) and margin-call day (−1 if none) per path."""
+    calm_chol, stress_chol = (market.cholesky(s).astype(np.float32) for s in (False, True))
+    calm_drift, stress_drift = (np.array(d, dtype=np.float32)[:, None] for d in (market.drift_calm, market.drift_stress))
+    spill = np.array(market.spillover, dtype=np.float32)[:, None]
+    notional = position.leverage
+    equity = np.ones(paths)
+    alive = np.ones(paths, dtype=bool)
+    call_day = np.full(paths, -1)
+    stress = np.zeros(paths, dtype=bool)
+    pressure = np.zeros(paths, dtype=np.float32)
+    for day in range(position.horizon_days):
+        switch = rng.random(paths, dtype=np.float32)
+        stress = np.where(stress, switch >= market.p_recover, switch < market.p_stress)
+        z = rng.standard_normal((3, paths), dtype=np.float32)
+        returns = calm_chol @ z
+        returns += calm_drift
+        hot = np.flatnonzero(stress)
+        if hot.size:
+            returns[:, hot] = stress_chol @ z[:, hot] + stress_drift
+        pushed = np.flatnonzero(pressure)
+        if pushed.size:
+            returns[:, pushed] += spill * pressure[pushed]
+        usdjpy, spx, usdmxn = returns
+        mxnjpy = usdjpy - usdmxn
+        fx = usdjpy if position.target == "USD" else mxnjpy
+        # The crowd holds yen-funded SPX and MXN; big losses force selling tomorrow
+        crowd = 0.5 * (usdjpy + spx) + 0.5 * mxnjpy
+        pressure = market.feedback * np.maximum(0.0, -crowd - market.feedback_threshold)
+        equity += alive * (notional * (fx + position.carry))
+        closed = alive & (equity < position.maintenance * notional)
+        call_day[closed] = day
+        alive &= ~closed
+    return equity - 1.0, call_day
+
+
+def simulate(
+    position: CarryPosition,
+    market: MarketModel | None = None,
+    paths: int = 1_000_000,
+    chunk: int = 50_000,
+    seed: int = 0,
+) -> SimResult:
+    """Run ``paths`` paths ``chunk`` at a time; memory does not grow with ``paths``."""
+    if position.target not in ("USD", "MXN"):
+        raise ValueError(f"unsupported target currency {position.target!r}")
+    if paths < 1 or chunk < 1:
+        raise ValueError("paths and chunk must be positive")
+    market = market or MarketModel()
+    result = SimResult(call_day_counts=np.zeros(position.horizon_days, dtype=np.int64))
+    sizes = [chunk] * (paths // chunk) + ([paths % chunk] if paths % chunk else [])
+    for size, child in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)), strict=True):
+        result.add(*simulate_chunk(position, market, size, np.random.default_rng(child)))
+    return result
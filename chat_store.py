@@ -0,0 +1,126 @@
+"""Durable chat sessions in SQLite (WAL) with batched writes and paging.
+
+Each browser conversation has an id (kept in the page URL, so a reload or a
+server restart finds it again) and its messages are rows keyed on
+(session, seq). Appends are buffered and written in one transaction once
+``batch_size`` rows are pending or ``max_delay`` seconds after the first
+one, whichever comes first, so a room full of students streaming answers
+costs a handful of commits rather than one per message. WAL mode lets those
+commits proceed while other sessions read.
+
+Sequence numbers are assigned inside the write transaction (``BEGIN
+IMMEDIATE``, then ``MAX(seq) + 1``) with a plain ``INSERT``, so two server
+processes appending to the same conversation interleave instead of
+overwriting each other. ``append`` returns a provisional ``seq`` at once;
+the flush corrects that same dict if another process got there first.
+
+Reads are paged from the newest message backwards, so the UI loads only the
+latest page on reload and fetches older turns when asked.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session    TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session, seq)
+) WITHOUT ROWID;
+"""
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class ChatStore:
+    """Process-wide message store shared by every session."""
+
+    def __init__(self, path: Path | str, batch_size: int = 32, max_delay: float = 0.5):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.commits = 0
+        self._pending: list[tuple[str, dict, float]] = []  # (session, message, created_at)
+        self._timer: threading.Timer | None = None
+        self._lock = threading.RLock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; WAL keeps it consistent
+        self._db.executescript(_SCHEMA)
+
+    def append(self, session: str, role: str, content: str) -> dict:
+        """Queue one message; returns it as a chat dict with its (provisional) ``seq``."""
+        with self._lock:
+            msg = {"role": role, "content": content, "seq": self.count(session)}
+            self._pending.append((session, msg, time.time()))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return msg
+
+    def flush(self) -> None:
+        """Write every pending message in one transaction, numbering them after what is stored."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            next_seq: dict[str, int] = {}
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")  # hold the write lock from MAX(seq) to INSERT
+                for session, msg, created_at in self._pending:
+                    if session not in next_seq:
+                        next_seq[session] = self._stored(session)
+                    msg["seq"] = next_seq[session]
+                    next_seq[session] += 1
+                    self._db.execute(
+                        "INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                        (session, msg["seq"], msg["role"], msg["content"], created_at),
+                    )
+            self._pending.clear()
+            self.commits += 1
+
+    def count(self, session: str) -> int:
+        """Messages in ``session``, stored and pending."""
+        with self._lock:
+            return self._stored(session) + sum(1 for row in self._pending if row[0] == session)
+
+    def page(self, session: str, before: int | None = None, limit: int = 20) -> list[dict]:
+        """Up to ``limit`` messages with ``seq < before`` (newest if ``None``), oldest first."""
+        with self._lock:
+            self.flush()
+            rows = self._db.execute(
+                "SELECT seq, role, content FROM messages WHERE session = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session, self._stored(session) if before is None else before, limit),
+            ).fetchall()
+        return [{"role": role, "content": content, "seq": seq} for seq, role, content in reversed(rows)]
+
+    def clear(self, session: str) -> None:
+        with self._lock:
+            self._pending = [row for row in self._pending if row[0] != session]
+            with self._db:
+                self._db.execute("DELETE FROM messages WHERE session = ?", (session,))
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def _stored(self, session: str) -> int:
+        """Next free sequence number (= stored message count) for ``session``."""
+        return self._db.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session = ?", (session,)
+        ).fetchone()[0]
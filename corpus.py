@@ -0,0 +1,147 @@
+"""Multi-case knowledge base: memory-mapped files + compact section index.
+
+Every ``*.md`` under the case directory is scanned once for its heading
+offsets; the result is stored in a small binary index (JSON header with file
+names/mtimes/titles, then packed ``uint64`` offset triples). Afterwards the
+files are only ``mmap``-ed, and a section's text is decoded when a prompt
+actually asks for it — so startup cost and per-process RSS stay flat as the
+corpus grows, and several Streamlit workers share the same page cache.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+INDEX_MAGIC = b"JCTIDX1\n"
+
+_HEADING_RE = re.compile(rb"(#{1,3})\s+(.+?)\s*$")
+
+
+class SectionRef(NamedTuple):
+    """Location of one heading-delimited section (byte offsets)."""
+
+    file: int
+    start: int
+    end: int
+    title: str
+
+
+def scan_sections(data: bytes) -> list[tuple[int, int, str]]:
+    """``(start, end, title)`` for each ``#``-``###`` section outside code fences.
+
+    ``###`` titles are prefixed with their parent ``##`` title so a hit on
+    "Formula" still reads as "Transfer Entropy › Formula" in the prompt.
+    Heading-only sections are dropped; their children carry the title.
+    """
+    heads: list[tuple[int, str]] = []
+    parent = ""
+    in_fence = False
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        if line.startswith(b"```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match:
+            level, title = len(match.group(1)), match.group(2).decode("utf-8").strip("*")
+            if level == 2:
+                parent = title
+            elif level == 3 and parent:
+                title = f"{parent} › {title}"
+            heads.append((offset, title))
+        offset += len(line)
+
+    bounds = [start for start, _ in heads] + [len(data)]
+    return [
+        (start, end, title)
+        for (start, title), end in zip(heads, bounds[1:], strict=True)
+        if b"\n" in data[start:end].strip()
+    ]
+
+
+def corpus_fingerprint(root: Path, pattern: str = "*.md") -> tuple:
+    """``((name, mtime_ns, size), ...)`` — changes whenever any case file does."""
+    return tuple(
+        (p.name, (st := p.stat()).st_mtime_ns, st.st_size) for p in sorted(root.glob(pattern))
+    )
+
+
+class Corpus:
+    """A directory of case files with lazily materialized sections."""
+
+    def __init__(self, root: Path | str, index_path: Path | str, pattern: str = "*.md"):
+        self.root = Path(root)
+        self.index_path = Path(index_path)
+        self.fingerprint = corpus_fingerprint(self.root, pattern)
+        self.names = [name for name, _, _ in self.fingerprint]
+        self.sections = self._load_index() or self._build_index()
+        self._maps: dict[int, mmap.mmap] = {}
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def text(self, ref: SectionRef) -> str:
+        """Decode one section straight from the memory map."""
+        return self._map(ref.file)[ref.start : ref.end].decode("utf-8").strip()
+
+    def file_text(self, name: str) -> str:
+        """Whole text of one case file (full-case mode)."""
+        return self._map(self.names.index(name))[:].decode("utf-8")
+
+    def close(self) -> None:
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
+
+    def _map(self, file: int) -> mmap.mmap:
+        if file not in self._maps:
+            with open(self.root / self.names[file], "rb") as f:
+                self._maps[file] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[file]
+
+    def _load_index(self) -> list[SectionRef] | None:
+        try:
+            raw = self.index_path.read_bytes()
+        except OSError:
+            return None
+        if not raw.startswith(INDEX_MAGIC):
+            return None
+        pos = len(INDEX_MAGIC)
+        try:
+            (header_len,) = struct.unpack_from("<I", raw, pos)
+            pos += 4
+            header = json.loads(raw[pos : pos + header_len])
+            if [tuple(f) for f in header["files"]] != list(self.fingerprint):
+                return None
+            offsets = array("Q")
+            offsets.frombytes(raw[pos + header_len :])
+            titles = header["titles"]
+        except (struct.error, ValueError, KeyError, TypeError):
+            return None  # corrupt or truncated: rebuild
+        if len(offsets) != 3 * len(titles):
+            return None
+        return [SectionRef(*offsets[i * 3 : i * 3 + 3], title) for i, title in enumerate(titles)]
+
+    def _build_index(self) -> list[SectionRef]:
+        sections: list[SectionRef] = []
+        for file, (name, _, size) in enumerate(self.fingerprint):
+            if not size:
+                continue
+            with open(self.root / name, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as m:
+                sections += [SectionRef(file, s, e, t) for s, e, t in scan_sections(m[:])]
+
+        header = json.dumps(
+            {"files": self.fingerprint, "titles": [s.title for s in sections]}
+        ).encode("utf-8")
+        offsets = array("Q", [v for s in sections for v in s[:3]])
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(INDEX_MAGIC + struct.pack("<I", len(header)) + header + offsets.tobytes())
+        os.replace(tmp, self.index_path)  # atomic, safe with several workers
+        return sections
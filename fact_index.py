@@ -0,0 +1,230 @@
+"""Structured fact index for instant answers to simple case lookups.
+
+At load time the case markdown's tables and bold-labelled bullets, plus the
+app's timeline events, become typed ``Fact`` records (subjects, date,
+numbers, source text). A question is answered from the index only when it
+reads like a lookup of a case value — exactly one market named ("VIX",
+"USD/JPY", "the Nikkei"), a value cue ("hit", "how much", "fell") or an
+explicit case date ("on Aug 5"), no analysis or timing cue ("why", "how
+did", "affect", "when", "happened"), and no other year or relative time
+("in 2020", "now", "before") — and one fact about that market alone carries
+a number (and states that date itself, when one is asked). Definitions
+("What is the VIX?") and everything else go to the LLM. A lookup is a couple of precompiled regex scans, well
+under a millisecond.
+"""
+
+import datetime as dt
+import re
+from dataclasses import dataclass, field
+
+# Canonical subject -> aliases as they appear in questions and case text
+SUBJECTS: dict[str, tuple[str, ...]] = {
+    "VIX": ("vix", "volatility index", "fear index", "fear gauge"),
+    "USD/JPY": ("usd/jpy", "usdjpy", "usd-jpy", "dollar-yen", "dollar yen"),
+    "TOPIX": ("topix",),
+    "NIKKEI": ("nikkei 225", "nikkei"),
+    "MXN": ("mexican peso", "peso", "usd/mxn", "mxn"),
+    "SPX": ("s&p 500", "s&p", "spx", "sp500"),
+    "BOJ": ("bank of japan", "boj"),
+}
+_ALIAS_RE = re.compile(
+    r"(?<![\w/&])(" + "|".join(re.escape(a) for _, aliases in SUBJECTS.items() for a in aliases) + r")(?![\w/&])",
+    re.IGNORECASE,
+)
+_SUBJECT_OF = {alias: subject for subject, aliases in SUBJECTS.items() for alias in aliases}
+
+MONTHS = {m.lower(): i for i, m in enumerate(
+    ["", "January", "February", "March", "April", "May", "June", "July", "August", "September",
+     "October", "November", "December"]) if m}  # fmt: skip
+MONTHS |= {name[:3]: i for name, i in MONTHS.items()} | {"sept": 9}
+_DATE_RE = re.compile(r"\b(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?\s+(\d{1,2})\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"(?<![\w.])[-−]?\d[\d,]*(?:\.\d+)?")
+_LABEL_RE = re.compile(r"^\s*[-*]\s+\*\*(.+?)\*\*:?\s*(.*)$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+
+VALUE_CUES = re.compile(
+    r"\b(how much|how far|how high|how low|hit|peak\w*|level|fell|fall|drop\w*|crash\w*|spike\w*|"
+    r"close\w*|reach\w*|bottom\w*|trough)\b",
+    re.IGNORECASE,
+)
+OUT_OF_CASE_CUES = re.compile(
+    r"\b(now|today|currently|current|latest|recent\w*|these days|before|prior|since|ever|histor\w*|"
+    r"(?:this|last|next) year)\b",
+    re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+ANALYSIS_CUES = re.compile(
+    r"\b(why|explain|compare|versus|vs|difference|relationship|cause\w*|transfer entropy|correlat\w*|"
+    r"should|would|could|what if|predict\w*|lead\w*|impact|mechanism|think|opinion|means?|"
+    r"affect\w*|effect\w*|when|happen\w*|how did)\b",
+    re.IGNORECASE,
+)
+CASE_YEAR = 2024
+
+
+def subjects_in(text: str) -> set[str]:
+    return {_SUBJECT_OF[m.lower()] for m in _ALIAS_RE.findall(text)}
+
+
+def dates_in(text: str) -> list[dt.date]:
+    """Month-day mentions (the case is all 2024)."""
+    found = []
+    for month, day in _DATE_RE.findall(text):
+        try:
+            found.append(dt.date(CASE_YEAR, MONTHS[month.lower()], int(day)))
+        except ValueError:
+            continue
+    return found
+
+
+def numbers_in(text: str) -> tuple[float, ...]:
+    return tuple(float(n.replace(",", "").replace("−", "-")) for n in _NUMBER_RE.findall(text))
+
+
+def measures_in(text: str) -> tuple[float, ...]:
+    """Numbers that are values, not names ("S&P 500"), dates or years."""
+    return numbers_in(_YEAR_RE.sub(" ", _DATE_RE.sub(" ", _ALIAS_RE.sub(" ", text))))
+
+
+@dataclass(frozen=True)
+class Fact:
+    """One table row, labelled bullet or timeline event."""
+
+    text: str
+    section: str
+    subjects: frozenset[str]
+    date: dt.date | None = None
+    dated: bool = False  # the fact states ``date`` itself (not inherited from its heading)
+    label: str = ""  # the bullet's bold label, when the fact is *about* one subject
+    values: tuple[float, ...] = ()  # measures only (see ``measures_in``)
+
+    @property
+    def primary(self) -> bool:
+        """Labelled by its subject ("**VIX**: ..."), not just mentioning it."""
+        return bool(self.label) and bool(subjects_in(self.label))
+
+
+@dataclass(frozen=True)
+class FactAnswer:
+    text: str
+    facts: tuple[Fact, ...]
+    subject: str
+
+
+@dataclass
+class FactStats:
+    answered: int = 0
+    passed: int = 0  # sent on to the LLM
+
+
+def _plain(text: str) -> str:
+    return text.replace("*", "").strip()
+
+
+def parse_markdown(markdown: str) -> list[Fact]:
+    """Facts from every table row and bold-labelled bullet in ``markdown``."""
+    facts: list[Fact] = []
+    section, section_date = "", None
+    header: list[str] | None = None
+    for line in markdown.splitlines():
+        heading = _HEADING_RE.match(line)
+        if heading:
+            section = _plain(heading.group(2))
+            dates = dates_in(section)
+            section_date = dates[0] if dates else None
+            header = None
+            continue
+        if line.startswith("|"):
+            cells = [_plain(c) for c in line.strip().strip("|").split("|")]
+            if header is None:
+                header = cells
+            elif not all(set(c) <= set("-: ") for c in cells):
+                row = dict(zip(header, cells, strict=False))
+                dates = dates_in(row.get("Date", ""))
+                text = " — ".join(c for h, c in row.items() if h != "Date")
+                facts.append(
+                    Fact(
+                        text=f"{row['Date']}: {text}" if "Date" in row else text,
+                        section=section,
+                        subjects=frozenset(subjects_in(text)),
+                        date=dates[0] if dates else section_date,
+                        dated=bool(dates),
+                        values=measures_in(text),
+                    )
+                )
+            continue
+        header = None
+        bullet = _LABEL_RE.match(line)
+        if bullet and bullet.group(2).strip():
+            label, body = _plain(bullet.group(1)), _plain(bullet.group(2))
+            about = subjects_in(label) or subjects_in(body)
+            dates = dates_in(body)
+            facts.append(
+                Fact(
+                    text=f"{label}: {body}",
+                    section=section,
+                    subjects=frozenset(about),
+                    date=dates[0] if dates else section_date,
+                    dated=bool(dates),
+                    label=label,
+                    values=measures_in(body),
+                )
+            )
+    return facts
+
+
+@dataclass
+class FactIndex:
+    facts: list[Fact]
+    stats: FactStats = field(default_factory=FactStats)
+
+    @classmethod
+    def from_sources(cls, markdown: str, events: list[tuple[str, str]] = ()) -> "FactIndex":
+        """Case markdown plus ``(date label, text)`` timeline events."""
+        facts = parse_markdown(markdown)
+        for when, text in events:
+            dates = dates_in(when)
+            facts.append(
+                Fact(
+                    text=f"{when}: {_plain(text)}",
+                    section="Timeline",
+                    subjects=frozenset(subjects_in(text)),
+                    date=dates[0] if dates else None,
+                    dated=bool(dates),
+                    values=measures_in(text),
+                )
+            )
+        return cls(facts)
+
+    def lookup(self, question: str) -> FactAnswer | None:
+        """A high-confidence answer, or ``None`` to let the LLM handle it."""
+        subjects = subjects_in(question)
+        asked = set(dates_in(question))
+        if len(subjects) != 1 or ANALYSIS_CUES.search(question) or not (asked or VALUE_CUES.search(question)):
+            return None
+        if OUT_OF_CASE_CUES.search(question) or any(int(y) != CASE_YEAR for y in _YEAR_RE.findall(question)):
+            return None  # another period: the case's numbers would be wrong
+        (subject,) = subjects
+        candidates = [
+            f
+            for f in self.facts
+            if f.values
+            and (f.primary or f.subjects == {subject})  # about this market, not just mentioning it
+            and subject in f.subjects
+            and (not asked or (f.dated and f.date in asked))
+        ]
+        if not candidates:
+            return None
+        # The fact labelled with the subject first, then source order
+        best = min(candidates, key=lambda f: not f.primary)
+        text = f"📌 Straight from the case notes:\n\n- {best.text}"
+        return FactAnswer(text=text, facts=(best,), subject=subject)
+
+    def answer(self, question: str) -> FactAnswer | None:
+        """``lookup`` plus hit/pass counting for the sidebar."""
+        found = self.lookup(question)
+        if found:
+            self.stats.answered += 1
+        else:
+            self.stats.passed += 1
+        return found
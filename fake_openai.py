@@ -0,0 +1,160 @@
+"""Local fake of the OpenAI chat completions endpoint (streaming only).
+
+Used by the tests and the benchmark: point an ``OpenAI`` client at
+``FakeOpenAI().base_url`` and it gets well-formed SSE chunks back. Each
+request pops the next entry of ``script`` to misbehave on purpose::
+
+    {"status": 429, "retry_after": 0.2}   # rate limited (Retry-After header)
+    {"status": 500}                       # server error
+    {"drop_after": 3}                     # stream 3 chunks, then cut the socket
+
+``ttft`` and ``tokens_per_second`` shape the timing of normal responses.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+DEFAULT_REPLY = (
+    "📊 Not gonna lie, August 5, 2024 was wild: Topix fell 12%, VIX spiked "
+    "above 60 and USD/JPY went from 161 to 142. 💀 Transfer entropy says "
+    "JPY → SPX → MXN."
+)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default (5) drops connects under a burst
+
+
+class FakeOpenAI:
+    """Threaded fake server; use as a context manager or call start/stop."""
+
+    def __init__(
+        self,
+        reply: str = DEFAULT_REPLY,
+        ttft: float = 0.0,
+        tokens_per_second: float | None = None,
+        prompt_tokens: int = 100,
+        cached_tokens: int = 0,
+    ):
+        self.reply = reply
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self.script: deque[dict] = deque()
+        self.requests: list[dict] = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self) -> Self:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def tokens(self) -> list[str]:
+        """The reply split into word-sized deltas (whitespace preserved)."""
+        words = self.reply.split(" ")
+        return [w if i == len(words) - 1 else w + " " for i, w in enumerate(words)]
+
+    def _next_behavior(self, body: dict) -> dict:
+        with self._lock:
+            self.requests.append(body)
+            return self.script.popleft() if self.script else {}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                behavior = fake._next_behavior(body)
+                status = behavior.get("status", 200)
+                if status != 200:
+                    self._error(status, behavior)
+                else:
+                    self._stream(body, behavior.get("drop_after"))
+
+            def _error(self, status: int, behavior: dict) -> None:
+                kind = "rate_limit_error" if status == 429 else "server_error"
+                payload = json.dumps({"error": {"message": f"fake {status}", "type": kind}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if "retry_after" in behavior:
+                    self.send_header("Retry-After", str(behavior["retry_after"]))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body: dict, drop_after: int | None) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                model = body.get("model", "fake")
+                if fake.ttft:
+                    time.sleep(fake.ttft)
+                tokens = fake.tokens()
+                for i, token in enumerate(tokens):
+                    if drop_after is not None and i >= drop_after:
+                        self.wfile.flush()
+                        self.close_connection = True
+                        self.connection.close()
+                        return
+                    delta = {"content": token, **({"role": "assistant"} if i == 0 else {})}
+                    self._event({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]}, model)
+                    if fake.tokens_per_second:
+                        time.sleep(1 / fake.tokens_per_second)
+                self._event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}, model)
+                if body.get("stream_options", {}).get("include_usage"):
+                    usage = {
+                        "prompt_tokens": fake.prompt_tokens,
+                        "completion_tokens": len(tokens),
+                        "total_tokens": fake.prompt_tokens + len(tokens),
+                        "prompt_tokens_details": {"cached_tokens": fake.cached_tokens},
+                    }
+                    self._event({"choices": [], "usage": usage}, model)
+                self._write(b"data: [DONE]\n\n")
+                self._write(b"")
+
+            def _event(self, fields: dict, model: str) -> None:
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    **fields,
+                }
+                self._write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+            def _write(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
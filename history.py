@@ -0,0 +1,103 @@
+"""Token-budgeted conversation history with a rolling summary.
+
+The last few turns are sent verbatim; anything older is folded (once, in
+order) into a short extractive summary that rides along as a system message.
+Token counts are estimated with a chars/4 heuristic and memoized on each
+message dict, so a rerun only counts messages it has not seen before.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_HEADER = "Earlier in this conversation (summarized, oldest first):"
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(msg: dict) -> int:
+    """Token cost of one chat message, memoized on the message itself."""
+    if "tokens" not in msg:
+        msg["tokens"] = estimate_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+    return msg["tokens"]
+
+
+def summarize_message(msg: dict, max_chars: int = 160) -> str:
+    """One summary line: the first sentence of a message, clipped."""
+    text = " ".join(msg["content"].split())
+    first = _SENTENCE_RE.split(text, maxsplit=1)[0]
+    if len(first) > max_chars:
+        first = first[: max_chars - 1].rstrip() + "…"
+    who = "Student asked" if msg["role"] == "user" else "You answered"
+    return f"- {who}: {first}"
+
+
+@dataclass
+class HistoryState:
+    """Per-session rolling summary; lives in ``st.session_state``."""
+
+    folded: int = 0
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def summary(self) -> str:
+        return "\n".join([SUMMARY_HEADER, *self.lines]) if self.lines else ""
+
+
+def compact_history(
+    messages: list[dict],
+    state: HistoryState,
+    budget_tokens: int,
+    keep_turns: int = 4,
+) -> list[dict]:
+    """Return the history to send, fitting within ``budget_tokens``.
+
+    At most ``keep_turns`` user turns (plus their replies) are kept verbatim,
+    fewer if they alone would blow the budget — the latest message is always
+    kept. Older messages are folded into ``state``; the oldest summary lines
+    are dropped when the summary no longer fits in what is left.
+    """
+    user_idx = [i for i, m in enumerate(messages) if m["role"] == "user"]
+    start = user_idx[-keep_turns] if len(user_idx) >= keep_turns else 0
+    start = max(start, state.folded)
+
+    used = sum(message_tokens(m) for m in messages[start:])
+    while used > budget_tokens and start < len(messages) - 1:
+        used -= message_tokens(messages[start])
+        start += 1
+
+    for msg in messages[state.folded : start]:
+        state.lines.append(summarize_message(msg))
+    state.folded = max(state.folded, start)
+
+    remaining = budget_tokens - used - estimate_tokens(SUMMARY_HEADER)
+    while state.lines and sum(estimate_tokens(line) for line in state.lines) > remaining:
+        state.lines.pop(0)
+
+    recent = messages[start:]
+    if not state.lines:
+        return list(recent)
+    return [{"role": "system", "content": state.summary}, *recent]
+
+
+def trim_history(messages: list[dict], state: HistoryState, keep: int) -> int:
+    """Drop all but the last ``keep`` messages in place; returns how many went.
+
+    Dropped messages that were not folded yet are summarized first, and
+    ``state.folded`` is shifted so it still indexes ``messages``.
+    """
+    drop = len(messages) - keep
+    if drop <= 0:
+        return 0
+    for msg in messages[state.folded : drop]:
+        state.lines.append(summarize_message(msg))
+    state.folded = max(state.folded, drop) - drop
+    del messages[:drop]
+    return drop
@@ -0,0 +1,107 @@
+"""Non-blocking Lottie animation loading.
+
+``LottieStore.get`` never touches the network: it answers from memory, then
+from a disk cache that survives restarts, then from a vendored JSON file
+shipped with the repo. Downloads happen on a background thread — at startup
+via ``prefetch`` and whenever a cached copy is missing or older than
+``max_age`` — and land in the disk cache for the next page load.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class LottieStore:
+    """Memory → disk cache → vendored fallback, refreshed in the background."""
+
+    def __init__(
+        self,
+        cache_dir: Path | str,
+        vendored: dict[str, Path] | None = None,
+        timeout: float = 3,
+        max_age: float = 24 * 3600,
+        retry_interval: float = 300,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.vendored = vendored or {}
+        self.timeout = timeout
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self._memory: dict[str, dict] = {}
+        self._pending: set[str] = set()
+        self._last_attempt: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lottie")
+
+    def cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()[:24]}.json"
+
+    def get(self, url: str) -> dict | None:
+        """Best local copy of ``url`` right now; schedules a refresh if stale."""
+        path = self.cache_path(url)
+        try:
+            fresh = time.time() - path.stat().st_mtime < self.max_age
+        except OSError:
+            fresh = False
+        if not fresh:
+            self.refresh(url)
+
+        if url in self._memory:
+            return self._memory[url]
+        for candidate in (path, self.vendored.get(url)):
+            data = _read_json(candidate) if candidate else None
+            if data is not None:
+                self._memory[url] = data
+                return data
+        return None
+
+    def prefetch(self, urls: list[str]) -> None:
+        """Warm the disk cache in the background."""
+        for url in urls:
+            self.refresh(url)
+
+    def refresh(self, url: str):
+        """Queue a background download of ``url``.
+
+        Deduplicated while in flight and rate-limited to one attempt per
+        ``retry_interval``, so an air-gapped host is not retried every rerun.
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_attempt.get(url)
+            if url in self._pending or (last is not None and now - last < self.retry_interval):
+                return None
+            self._pending.add(url)
+            self._last_attempt[url] = now
+        return self._pool.submit(self._download, url)
+
+    def _download(self, url: str) -> None:
+        import requests
+
+        try:
+            r = requests.get(url, timeout=self.timeout)
+            if r.status_code == 200:
+                data = r.json()
+                path = self.cache_path(url)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_text(json.dumps(data), encoding="utf-8")
+                os.replace(tmp, path)
+                self._memory[url] = data
+        except (requests.RequestException, ValueError, OSError):
+            pass  # offline / bad payload: keep serving the local copy
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
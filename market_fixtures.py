@@ -0,0 +1,191 @@
+"""Builds the bundled offline fixture under ``data/market/``.
+
+The series are synthetic but pinned to published 2024 levels: daily closes
+pass exactly through the anchors below, and the 1-minute bars around the
+unwind (Jul 29 – Aug 9, UTC) pass through every daily close plus the
+Aug 5 intraday extremes. Between anchors a seeded Brownian bridge adds
+noise, and equities stay flat outside their sessions. Rerun after editing
+the anchors:
+
+    python market_fixtures.py
+"""
+
+import itertools
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from market_store import to_minutes, write_frame
+
+FIXTURE_DIR = Path(__file__).parent / "data" / "market"
+SOURCE_NOTE = "Synthetic fixture pinned to published 2024 closes and Aug 5 extremes; not vendor data."
+
+DAILY_START, DAILY_END = "2024-01-02", "2024-08-31"
+INTRADAY_START, INTRADAY_END = "2024-07-29", "2024-08-10"
+
+UNWIND_DAYS = ["2024-07-26", "2024-07-29", "2024-07-30", "2024-07-31", "2024-08-01",
+               "2024-08-02", "2024-08-05", "2024-08-06", "2024-08-07", "2024-08-08", "2024-08-09"]  # fmt: skip
+
+# Daily closes: sparse anchors for H1, every session around the unwind
+DAILY_ANCHORS: dict[str, dict[str, float]] = {
+    "USDJPY": {
+        "2024-01-02": 141.0, "2024-02-13": 150.6, "2024-03-19": 150.9, "2024-04-26": 158.3,
+        "2024-04-29": 156.3, "2024-05-02": 153.0, "2024-06-28": 160.9, "2024-07-03": 161.45,
+        "2024-07-10": 161.3, "2024-07-11": 158.9, "2024-07-19": 157.4, "2024-08-30": 146.2,
+        **dict(zip(UNWIND_DAYS, [153.8, 154.0, 152.7, 150.0, 149.4, 146.5, 144.2, 144.3,
+                                 146.8, 147.2, 146.6], strict=True)),
+    },
+    "SPX": {
+        "2024-01-02": 4743, "2024-02-29": 5096, "2024-03-28": 5254, "2024-04-19": 4967,
+        "2024-05-31": 5278, "2024-06-28": 5460, "2024-07-16": 5667, "2024-07-24": 5427,
+        "2024-08-30": 5648,
+        **dict(zip(UNWIND_DAYS, [5459, 5464, 5436, 5522, 5446, 5346, 5186, 5240, 5199, 5319,
+                                 5344], strict=True)),
+    },
+    "USDMXN": {
+        "2024-01-02": 17.0, "2024-04-09": 16.3, "2024-05-31": 17.0, "2024-06-03": 17.7,
+        "2024-06-12": 18.6, "2024-06-28": 18.3, "2024-07-11": 17.8, "2024-08-30": 19.7,
+        **dict(zip(UNWIND_DAYS, [18.4, 18.5, 18.7, 18.6, 18.9, 19.1, 19.5, 19.3, 19.4, 19.0,
+                                 18.9], strict=True)),
+    },
+    "VIX": {
+        "2024-01-02": 13.2, "2024-03-28": 13.0, "2024-04-19": 18.7, "2024-05-31": 12.9,
+        "2024-07-03": 12.1, "2024-07-16": 13.2, "2024-07-24": 18.0, "2024-08-30": 15.0,
+        **dict(zip(UNWIND_DAYS, [16.4, 16.6, 17.7, 16.4, 18.6, 23.4, 38.6, 27.7, 27.9, 23.8,
+                                 20.4], strict=True)),
+    },
+    "TOPIX": {
+        "2024-01-02": 2366, "2024-03-22": 2814, "2024-04-19": 2626, "2024-07-11": 2929,
+        "2024-08-30": 2712,
+        **dict(zip(UNWIND_DAYS, [2806, 2838, 2829, 2794, 2701, 2537.6, 2227.15, 2435, 2446, 2430,
+                                 2457], strict=True)),
+    },
+    "NIKKEI": {
+        "2024-01-02": 33464, "2024-02-22": 39098, "2024-03-22": 40888, "2024-04-19": 37068,
+        "2024-07-11": 42224, "2024-08-30": 38648,
+        **dict(zip(UNWIND_DAYS, [37667, 38468, 38526, 39102, 38126, 35909.7, 31458.42, 34675,
+                                 35090, 34831, 35025], strict=True)),
+    },
+    "BTC": {
+        "2024-01-02": 45000, "2024-03-13": 73000, "2024-05-01": 57000, "2024-06-05": 71000,
+        "2024-07-05": 56700,
+        **dict(zip(UNWIND_DAYS, [67900, 66800, 66200, 64600, 65300, 61400, 54000, 56000, 55000,
+                                 61700, 60900], strict=True)),
+    },
+}  # fmt: skip
+
+# BOJ policy rate (upper bound, %) with the dates it took effect
+BOJ_RATE_STEPS = {"2024-01-02": -0.1, "2024-03-19": 0.1, "2024-07-31": 0.25}
+
+# Aug 5 intraday extremes: symbol -> (UTC time, "high" | "low", level)
+INTRADAY_EXTREMES = {
+    "USDJPY": ("2024-08-05T05:30", "low", 141.7),
+    "USDMXN": ("2024-08-05T04:00", "high", 20.2),
+    "VIX": ("2024-08-05T13:35", "high", 65.73),
+    "SPX": ("2024-08-05T13:40", "low", 5119.3),
+    "BTC": ("2024-08-05T03:00", "low", 49000),
+}
+
+# Trading session (UTC hour:minute open, close) per symbol; FX and BTC are
+# modelled as one session per weekday
+SESSIONS = {
+    "USDJPY": ("00:00", "21:00"),
+    "USDMXN": ("00:00", "21:00"),
+    "BTC": ("00:00", "21:00"),
+    "SPX": ("13:30", "20:00"),
+    "VIX": ("13:30", "20:00"),
+    "TOPIX": ("00:00", "06:00"),
+    "NIKKEI": ("00:00", "06:00"),
+}
+
+DAILY_VOL = {
+    "USDJPY": 0.004, "SPX": 0.006, "USDMXN": 0.005, "VIX": 0.05, "TOPIX": 0.007, "NIKKEI": 0.008,
+    "BTC": 0.02,
+}  # fmt: skip
+MINUTE_VOL = {s: v / 20 for s, v in DAILY_VOL.items()}
+
+
+def bridge_path(x: np.ndarray, anchor_x: np.ndarray, anchor_y: np.ndarray, vol: float, rng) -> np.ndarray:
+    """Log-linear interpolation through the anchors plus Brownian-bridge noise.
+
+    ``x`` must contain every anchor position; the noise is exactly zero there.
+    """
+    log_path = np.interp(x, anchor_x, np.log(anchor_y))
+    noise = np.zeros(len(x))
+    knots = np.searchsorted(x, anchor_x)
+    for a, b in itertools.pairwise(knots):
+        steps = rng.standard_normal(b - a) * vol
+        walk = np.concatenate([[0.0], np.cumsum(steps)])
+        noise[a : b + 1] = walk - np.linspace(0, 1, b - a + 1) * walk[-1]
+    return np.exp(log_path + noise)
+
+
+def business_days(start: str, end: str) -> np.ndarray:
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+    return days[np.is_busday(days)]
+
+
+def build_daily(rng) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    days = business_days(DAILY_START, DAILY_END)
+    x = np.arange(len(days))
+    columns = {}
+    for symbol, anchors in DAILY_ANCHORS.items():
+        dates = np.array(sorted(anchors), dtype="datetime64[D]")
+        levels = np.array([anchors[str(d)] for d in dates])
+        path = bridge_path(x, np.searchsorted(days, dates), levels, DAILY_VOL[symbol], rng)
+        # Published highs/lows stay the extremes of the series
+        columns[symbol] = np.clip(path, levels.min(), levels.max())
+    steps = np.array(sorted(BOJ_RATE_STEPS), dtype="datetime64[D]")
+    which = np.searchsorted(steps, days, "right") - 1
+    columns["BOJ_RATE"] = np.array([BOJ_RATE_STEPS[str(steps[i])] for i in which])
+    minutes = np.array([to_minutes(d) for d in days])
+    return minutes, columns
+
+
+def build_intraday(daily_minutes: np.ndarray, daily: dict[str, np.ndarray], rng):
+    start, end = to_minutes(INTRADAY_START), to_minutes(INTRADAY_END)
+    minutes = np.arange(start, end)
+    days = business_days(INTRADAY_START, INTRADAY_END)
+    columns = {}
+    for symbol, (open_at, close_at) in SESSIONS.items():
+        closes = dict(zip(daily_minutes.tolist(), daily[symbol].tolist(), strict=True))
+        prev_day = np.datetime64(INTRADAY_START, "D") - 1
+        while not np.is_busday(prev_day):
+            prev_day -= 1
+        prev_close = closes[to_minutes(prev_day)]
+        anchors = {start: prev_close}
+        session = np.zeros(len(minutes), dtype=bool)
+        for day in days:
+            t_open, t_close = to_minutes(f"{day}T{open_at}"), to_minutes(f"{day}T{close_at}")
+            anchors[t_open] = prev_close
+            prev_close = anchors[t_close] = closes[to_minutes(day)]
+            session[t_open - start : t_close - start + 1] = True
+        extreme = INTRADAY_EXTREMES.get(symbol)
+        if extreme:
+            anchors[to_minutes(extreme[0])] = extreme[2]
+        anchors[end - 1] = prev_close
+        xs = np.array(sorted(anchors))
+        path = bridge_path(minutes, xs, np.array([anchors[x] for x in xs]), MINUTE_VOL[symbol], rng)
+        # Flat outside sessions: carry the last in-session value forward
+        last = np.maximum.accumulate(np.where(session, np.arange(len(minutes)), 0))
+        path = np.where(session, path, path[last])
+        if extreme:
+            # The published high/low is the day's extreme; keep noise from overshooting it
+            day = to_minutes(extreme[0][:10]) - start
+            clip = np.minimum if extreme[1] == "high" else np.maximum
+            path[day : day + 1440] = clip(path[day : day + 1440], extreme[2])
+        columns[symbol] = path
+    return minutes, columns
+
+
+def build(root: Path = FIXTURE_DIR, seed: int = 2024) -> None:
+    rng = np.random.default_rng(seed)
+    daily_minutes, daily = build_daily(rng)
+    write_frame(root, "1d", daily_minutes, daily, {"units": "close (BOJ_RATE in %)", "source": SOURCE_NOTE})
+    minutes, intraday = build_intraday(daily_minutes, daily, rng)
+    write_frame(root, "1m", minutes, intraday, {"units": "last", "timezone": "UTC", "source": SOURCE_NOTE})
+
+
+if __name__ == "__main__":
+    build(Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURE_DIR)
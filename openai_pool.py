@@ -0,0 +1,86 @@
+"""Process-wide pooled OpenAI client with connection-reuse tracking.
+
+One client is shared by every session and rerun, so TCP connections and TLS
+sessions stay warm in its keep-alive pool instead of being rebuilt per
+keystroke. HTTP/2 is switched on when the optional ``h2`` package is
+installed. A transport trace counts requests vs. new TCP connects / TLS
+handshakes, which is the number that shows whether reuse is working.
+"""
+
+import importlib.util
+import threading
+from dataclasses import dataclass, field
+
+from openai import DefaultHttpxClient, OpenAI
+
+try:  # openai>=3 ships on the httpx2 fork; older releases on httpx
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
+
+@dataclass
+class PoolStats:
+    """Counters fed by the httpx trace extension."""
+
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+    http2_requests: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of requests that rode an already-open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.requests)
+
+    def trace(self, event: str, info: dict) -> None:
+        with self._lock:
+            if event == "connection.connect_tcp.started":
+                self.connections += 1
+            elif event == "connection.start_tls.started":
+                self.tls_handshakes += 1
+            elif event.endswith(".send_request_headers.started"):
+                self.requests += 1
+                if event.startswith("http2."):
+                    self.http2_requests += 1
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def make_http_client(
+    stats: PoolStats,
+    max_connections: int = 50,
+    max_keepalive: int = 20,
+    keepalive_expiry: float = 90.0,
+    http2: bool | None = None,
+) -> httpx.Client:
+    """httpx client for OpenAI with a sized keep-alive pool and tracing."""
+
+    def attach_trace(request: httpx.Request) -> None:
+        request.extensions["trace"] = stats.trace
+
+    return DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2_available() if http2 is None else http2,
+        event_hooks={"request": [attach_trace]},
+    )
+
+
+def make_client(
+    api_key: str, stats: PoolStats, base_url: str | None = None, **pool_options
+) -> OpenAI:
+    """OpenAI client backed by a pooled, traced httpx client."""
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=make_http_client(stats, **pool_options),
+    )
@@ -0,0 +1,330 @@
+"""Gaussian hidden-Markov regime model for the case's Markov perspective.
+
+Observations are return series; state 0 is the calm "BOJ on hold" regime
+and the last state the stressed "hike" regime (states are ordered by
+volatility after every fit). Everything is batched: ``obs`` has shape
+(batch, time) and each row is either an independent model (rolling windows,
+several assets) or, with ``tied=True``, a chunk of one long series sharing
+one set of parameters — which is how a decade of minute bars fits in
+seconds: the time loop runs over the chunk length, not the series length.
+
+Forward–backward is log-space by scaling: emissions are exponentiated
+once, vectorized, after subtracting each step's log maximum, and the loop
+carries normalized α/β, so every step is one small matmul and a
+normalization. The scales come back out as logs:
+
+    log L = Σ_t (log c_t + max_k log b_t(k))
+
+Posteriors and the transition statistics are then summed over time in a
+couple of ``einsum`` calls after the loop.
+"""
+
+import math
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+VAR_FLOOR = 1e-12
+
+
+@dataclass(frozen=True)
+class HMM:
+    """Per-row parameters: start (B, K), trans (B, K, K), mean/std (B, K)."""
+
+    start: np.ndarray
+    trans: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    loglik: np.ndarray | None = None  # (B,) at the last E-step
+
+    @property
+    def n_states(self) -> int:
+        return self.trans.shape[-1]
+
+
+@dataclass(frozen=True)
+class Breakpoint:
+    """Where the ``src → dst`` switching probability changed, and by how much."""
+
+    index: int
+    before: float
+    after: float
+    llr: float  # log-likelihood ratio against a single constant probability
+
+
+def log_emissions(obs: np.ndarray, hmm: HMM) -> np.ndarray:
+    """Gaussian log densities, laid out (T, K, B) like everything in the E-step.
+
+    Filled one state at a time: broadcasting along the short middle axis
+    runs several times slower than K passes over (T, B).
+    """
+    obs_t = np.ascontiguousarray(obs.T)
+    out = np.empty((len(obs_t), hmm.n_states, obs_t.shape[1]))
+    norm = np.log(hmm.std) + 0.5 * math.log(2 * math.pi)
+    for k in range(hmm.n_states):
+        z = out[:, k]
+        np.subtract(obs_t, hmm.mean[:, k], out=z)
+        z /= hmm.std[:, k]
+        z *= z
+        z *= -0.5
+        z -= norm[:, k]
+    return out
+
+
+def e_step(
+    obs: np.ndarray, hmm: HMM, tied: bool = False, per_step: bool = False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """State posteriors γ (T, K, B), transition posteriors and log-likelihood (B,).
+
+    Transition posteriors are summed over time, (B, K, K) — and over rows
+    too, (K, K), when ``tied`` — unless ``per_step`` asks for every ξ_t,
+    (T − 1, K, K, B). Arrays are state-major so sums over states add K
+    contiguous rows of length B.
+    """
+    emit = log_emissions(obs, hmm)
+    peak = emit[:, 0].copy()
+    for k in range(1, hmm.n_states):
+        np.maximum(peak, emit[:, k], out=peak)
+    for k in range(hmm.n_states):
+        emit[:, k] -= peak
+    np.exp(emit, out=emit)
+    n_steps = len(emit)
+    if tied:
+        shared = hmm.trans[0]
+        forward, backward = (lambda x: shared.T @ x), (lambda x: shared @ x)
+    else:
+        batched = hmm.trans.transpose(1, 2, 0)  # (K, K, B)
+        forward = lambda x: (x[:, None, :] * batched).sum(axis=0)
+        backward = lambda x: (batched * x[None, :, :]).sum(axis=1)
+
+    alpha = np.empty_like(emit)
+    beta = np.empty_like(emit)
+    scale = np.empty((n_steps, emit.shape[2]))
+    a = hmm.start.T * emit[0]
+    scale[0] = a.sum(axis=0)
+    alpha[0] = a / scale[0]
+    for t in range(1, n_steps):
+        a = forward(alpha[t - 1])
+        a *= emit[t]
+        scale[t] = a.sum(axis=0)
+        alpha[t] = a / scale[t]
+    # ξ_t(i, j) = α_t(i) A_ij b_{t+1}(j) β_{t+1}(j) / c_{t+1} = α_t(i) A_ij ahead_t(j),
+    # and β_t = A · ahead_t, so the backward pass fills ``ahead`` as it goes
+    ahead = np.empty_like(emit[1:])
+    beta[-1] = 1.0
+    for t in range(n_steps - 2, -1, -1):
+        np.multiply(emit[t + 1], beta[t + 1], out=ahead[t])
+        ahead[t] /= scale[t + 1]
+        beta[t] = backward(ahead[t])
+
+    loglik = (np.log(scale) + peak).sum(axis=0)
+    gamma = alpha * beta
+    if per_step:
+        transitions = hmm.trans.transpose(1, 2, 0) * alpha[:-1, :, None, :] * ahead[:, None, :, :]
+    elif tied:
+        transitions = hmm.trans[0] * np.tensordot(alpha[:-1], ahead, axes=([0, 2], [0, 2]))
+    else:
+        transitions = hmm.trans * np.einsum("tib,tjb->bij", alpha[:-1], ahead)
+    return gamma, transitions, loglik
+
+
+def smoothed(obs: np.ndarray, hmm: HMM) -> np.ndarray:
+    """P(state | all observations), shape (B, T, K)."""
+    gamma, _, _ = e_step(np.atleast_2d(np.asarray(obs, dtype=np.float64)), hmm)
+    return gamma.transpose(2, 0, 1)
+
+
+def _order_by_volatility(hmm: HMM) -> HMM:
+    order = np.argsort(hmm.std, axis=1)
+    rows = np.arange(len(order))[:, None]
+    return replace(
+        hmm,
+        start=hmm.start[rows, order],
+        trans=hmm.trans[rows[:, :, None], order[:, :, None], order[:, None, :]],
+        mean=hmm.mean[rows, order],
+        std=hmm.std[rows, order],
+    )
+
+
+def initial_hmm(obs: np.ndarray, n_states: int = 2, stay: float = 0.95) -> HMM:
+    """Volatility-quantile initial guess: state k gets the k-th |return| quantile."""
+    batch = len(obs)
+    levels = np.quantile(np.abs(obs), np.linspace(0.5, 0.99, n_states), axis=1).T
+    trans = np.full((n_states, n_states), (1 - stay) / max(1, n_states - 1))
+    np.fill_diagonal(trans, stay)
+    return HMM(
+        start=np.full((batch, n_states), 1 / n_states),
+        trans=np.broadcast_to(trans, (batch, n_states, n_states)).copy(),
+        mean=np.broadcast_to(obs.mean(axis=1, keepdims=True), (batch, n_states)).copy(),
+        std=np.maximum(levels, math.sqrt(VAR_FLOOR)),
+    )
+
+
+def fit_hmm(
+    obs: np.ndarray,
+    n_states: int = 2,
+    iters: int = 30,
+    tol: float = 1e-6,
+    tied: bool = False,
+    init: HMM | None = None,
+) -> HMM:
+    """Baum–Welch over every row of ``obs`` (shape (B, T), or (T,) for one series).
+
+    Stops when the mean per-observation log-likelihood gains less than ``tol``.
+    """
+    obs = np.atleast_2d(np.asarray(obs, dtype=np.float64))
+    if obs.shape[1] < 2:
+        raise ValueError("need at least two observations per row")
+    obs_t = np.ascontiguousarray(obs.T)
+    hmm = init if init is not None else initial_hmm(obs, n_states)
+    previous = -math.inf
+    for _ in range(iters):
+        gamma, transitions, loglik = e_step(obs, hmm, tied)
+        if tied:
+            # Pool over time and rows at once (BLAS dots), then share across rows
+            pooled = (
+                gamma[0].sum(axis=1),
+                transitions,
+                gamma.sum(axis=(0, 2)),
+                np.tensordot(gamma, obs_t, axes=([0, 2], [0, 1])),
+                np.tensordot(gamma, obs_t * obs_t, axes=([0, 2], [0, 1])),
+            )
+            start, transitions, weight, first, second = (
+                np.broadcast_to(a, (len(obs), *a.shape)) for a in pooled
+            )
+        else:
+            start = gamma[0].T
+            weight = gamma.sum(axis=0).T
+            first = np.einsum("tkb,tb->bk", gamma, obs_t)
+            second = np.einsum("tkb,tb->bk", gamma, obs_t * obs_t)
+        mean = first / weight
+        hmm = HMM(
+            start=start / start.sum(axis=1, keepdims=True),
+            trans=transitions / transitions.sum(axis=2, keepdims=True),
+            mean=mean,
+            std=np.sqrt(np.maximum(second / weight - mean * mean, VAR_FLOOR)),
+            loglik=loglik,
+        )
+        score = loglik.sum() / obs.size
+        if score - previous < tol:
+            break
+        previous = score
+    return _order_by_volatility(hmm)
+
+
+def chunk_series(series: np.ndarray, length: int) -> np.ndarray:
+    """One long series as (B, length) rows for a ``tied`` fit.
+
+    The oldest ``len(series) % length`` points are dropped, so the most
+    recent data always makes it into the fit.
+    """
+    rows = len(series) // length
+    if rows < 1:
+        raise ValueError(f"series shorter than one chunk ({len(series)} < {length})")
+    return np.asarray(series[len(series) - rows * length :], dtype=np.float64).reshape(rows, length)
+
+
+def first_row(hmm: HMM) -> HMM:
+    """The model of row 0 as a one-row ``HMM`` (e.g. the shared one of a tied fit)."""
+    loglik = None if hmm.loglik is None else hmm.loglik[:1]
+    return HMM(hmm.start[:1], hmm.trans[:1], hmm.mean[:1], hmm.std[:1], loglik)
+
+
+def fit_series(series: np.ndarray, chunk: int = 252, n_states: int = 2, **kwargs) -> HMM:
+    """One model for one long series: a ``tied`` fit over ``chunk``-length rows.
+
+    Chunk boundaries drop one transition in ``chunk``; in exchange the time
+    loop runs ``chunk`` steps instead of ``len(series)``.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    rows = chunk_series(series, chunk) if len(series) >= chunk else series[None]
+    return first_row(fit_hmm(rows, n_states, tied=True, **kwargs))
+
+
+def transition_breakpoint(
+    series: np.ndarray, hmm: HMM, src: int = 0, dst: int = -1, chunk: int = 252
+) -> Breakpoint:
+    """Most likely single change in P(src → dst) along one series.
+
+    With ``n_t`` the model's expected src→dst switches and ``d_t`` the
+    expected time in src, every split τ is scored by the Bernoulli
+    likelihood of a constant rate before and after it — all splits at once
+    from cumulative sums. ``before``/``after`` then come from refitting each
+    side, starting from ``hmm``: the expected counts alone would shrink a
+    short post-break segment toward the pooled rate.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n = len(series)
+    hits, exposure = np.zeros(n - 1), np.zeros(n - 1)
+    # Chunked like ``fit_series``, oldest remainder as its own row; the one
+    # transition across each chunk boundary counts as zero
+    split_at = n % chunk if n >= chunk else n
+    pieces = [(0, series[None, :split_at])] if split_at >= 2 else []
+    if n >= chunk:
+        pieces.append((split_at, chunk_series(series, chunk)))
+    model = first_row(hmm)
+    for offset, rows in pieces:
+        gamma, xi, _ = e_step(rows, model, tied=True, per_step=True)
+        length = rows.shape[1]
+        steps = offset + np.arange(len(rows))[:, None] * length + np.arange(length - 1)
+        hits[steps] = xi[:, src, dst].T
+        exposure[steps] = gamma[:-1, src].T
+    hits = np.concatenate([[0.0], np.cumsum(hits)])
+    exposure = np.concatenate([[0.0], np.cumsum(exposure)])
+
+    def score(n, d):
+        p = np.clip(n / np.maximum(d, 1e-12), 1e-12, 1 - 1e-12)
+        return n * np.log(p) + (d - n) * np.log1p(-p)
+
+    total_n, total_d = hits[-1], exposure[-1]
+    split = score(hits, exposure) + score(total_n - hits, total_d - exposure)
+    split[[0, -1]] = -np.inf
+    tau = int(np.argmax(split))
+    before, after = (
+        fit_series(part, chunk, model.n_states, init=model).trans[0, src, dst]
+        for part in (series[:tau], series[tau:])
+    )
+    return Breakpoint(
+        index=tau, before=float(before), after=float(after), llr=float(split[tau] - score(total_n, total_d))
+    )
+
+
+def rolling_switch_probability(
+    series: np.ndarray, window: int, step: int, n_states: int = 2, iters: int = 30, src: int = 0, dst: int = -1
+) -> dict[str, np.ndarray]:
+    """P(src → dst) fitted independently on every ``window`` (one batched fit).
+
+    Returns ``end`` (index one past each window) and ``p_switch``.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(series, dtype=np.float64), window)[::step]
+    hmm = fit_hmm(windows, n_states, iters)
+    ends = np.arange(len(windows)) * step + window
+    return {"end": ends, "p_switch": hmm.trans[:, src, dst]}
+
+
+def demo_regime_returns(
+    years: int = 17,
+    after_days: int = 250,
+    p_before: float = 0.005,
+    p_after: float = 0.15,
+    p_calm: float = 0.5,
+    seed: int = 31,
+) -> tuple[np.ndarray, int]:
+    """Synthetic daily USD/JPY returns: a stable hold/hike chain, then a switch.
+
+    The hold regime drifts up quietly (carry); the hike regime is a yen surge
+    (negative drift, 4x the volatility) lasting ``1 / p_calm`` days on
+    average. P(hold → hike) is ``p_before`` for ``years`` of trading days and
+    ``p_after`` afterwards. Returns the series and the index of the change.
+    """
+    rng = np.random.default_rng(seed)
+    change = years * 252
+    n = change + after_days
+    p_hike = np.where(np.arange(n) < change, p_before, p_after)
+    uniform = rng.random(n)
+    state = np.zeros(n, dtype=np.int8)
+    for t in range(1, n):
+        state[t] = uniform[t] < (p_hike[t] if state[t - 1] == 0 else 1 - p_calm)
+    mean = np.where(state == 0, 0.0002, -0.004)
+    std = np.where(state == 0, 0.004, 0.016)
+    return mean + std * rng.standard_normal(n), change
@@ -0,0 +1,167 @@
+"""Accelerated replay of the stored July 31 – August 5 minute bars.
+
+Work is split so concurrent viewers stay cheap:
+
+- ``ReplayTape`` is built once per process (shared by every session). It
+  precomputes, per minute row, everything a frame needs — previous close,
+  running high/low since the replay start, the row at which each contagion
+  trigger first fires — so a frame never scans history.
+- ``ReplayClock`` is the only per-session state: a few floats mapping wall
+  time to replay time at the chosen speed.
+- A frame is one ``searchsorted`` plus array lookups. Frames are rendered at
+  a fixed rate; however many bars elapsed since the last one are coalesced
+  into the latest snapshot (the running extremes still include them).
+  Snapshots are memoized by row, so sessions replaying in step share them.
+"""
+
+import functools
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from market_store import MarketStore
+
+SPEEDS = [1, 10, 60, 300, 1000]
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """A contagion step lights up the first time ``symbol`` crosses ``level``."""
+
+    symbol: str
+    direction: str  # "below" | "above"
+    level: float
+
+
+@dataclass(frozen=True)
+class ReplayFrame:
+    """Everything the dashboard shows at one replay minute."""
+
+    minute: int
+    progress: float
+    last: dict[str, float]
+    prev_close: dict[str, float]
+    high: dict[str, float]
+    low: dict[str, float]
+    steps_lit: tuple[bool, ...]
+
+    def day_change(self, symbol: str) -> float:
+        return self.last[symbol] / self.prev_close[symbol] - 1
+
+    @property
+    def label(self) -> str:
+        return np.datetime64(self.minute, "m").item().strftime("%a %b %d, %H:%M UTC")
+
+
+class ReplayTape:
+    """Read-only per-minute arrays for one replay window."""
+
+    def __init__(
+        self,
+        store: MarketStore,
+        start: str,
+        end: str,
+        triggers: list[Trigger],
+        daily_columns: list[str] | None = None,
+    ):
+        frame = store.range("1m", start, end)
+        if not len(frame):
+            raise ValueError(f"no minute bars between {start} and {end}")
+        self.minutes = np.asarray(frame.minutes)
+        self.symbols = list(frame.columns)
+        self.values = {s: np.asarray(frame[s], dtype=np.float64) for s in self.symbols}
+        self.high = {s: np.maximum.accumulate(v) for s, v in self.values.items()}
+        self.low = {s: np.minimum.accumulate(v) for s, v in self.values.items()}
+
+        # Previous daily close for every minute: the last daily row dated
+        # before the minute's own date
+        daily = store.frame("1d")
+        day_start = self.minutes - self.minutes % 1440
+        prev_row = np.searchsorted(np.asarray(daily.minutes), day_start, "left") - 1
+        self.prev_close = {s: np.asarray(daily[s], dtype=np.float64)[prev_row] for s in self.symbols}
+        # Daily-only series (e.g. the policy rate) as of each minute's date
+        today_row = np.searchsorted(np.asarray(daily.minutes), day_start, "right") - 1
+        for column in daily_columns or []:
+            self.values[column] = np.asarray(daily[column], dtype=np.float64)[today_row]
+
+        self.trigger_rows = []
+        for t in triggers:
+            hit = self.values[t.symbol] <= t.level if t.direction == "below" else self.values[t.symbol] >= t.level
+            self.trigger_rows.append(int(np.argmax(hit)) if hit.any() else len(self.minutes))
+
+    @property
+    def start(self) -> int:
+        return int(self.minutes[0])
+
+    @property
+    def end(self) -> int:
+        return int(self.minutes[-1])
+
+    def row_at(self, minute: float) -> int:
+        return max(0, int(np.searchsorted(self.minutes, minute, "right")) - 1)
+
+    def frame_at(self, minute: float) -> ReplayFrame:
+        return self._frame(self.row_at(minute))
+
+    @functools.lru_cache(maxsize=8192)  # noqa: B019 — tapes live for the process
+    def _frame(self, row: int) -> ReplayFrame:
+        return ReplayFrame(
+            minute=int(self.minutes[row]),
+            progress=row / max(1, len(self.minutes) - 1),
+            last={s: float(v[row]) for s, v in self.values.items()},
+            prev_close={s: float(v[row]) for s, v in self.prev_close.items()},
+            high={s: float(v[row]) for s, v in self.high.items()},
+            low={s: float(v[row]) for s, v in self.low.items()},
+            steps_lit=tuple(row >= r for r in self.trigger_rows),
+        )
+
+
+@dataclass
+class ReplayClock:
+    """Maps wall-clock time to replay minutes at ``speed``× real time."""
+
+    start: int
+    end: int
+    speed: int = 60
+    playing: bool = False
+    _anchor_minute: float = field(default=0.0, init=False, repr=False)
+    _anchor_wall: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self):
+        self._anchor_minute = float(self.start)
+
+    def position(self, now: float | None = None) -> float:
+        if not self.playing:
+            return self._anchor_minute
+        now = time.monotonic() if now is None else now
+        return min(self.end, self._anchor_minute + (now - self._anchor_wall) * self.speed / 60)
+
+    @property
+    def finished(self) -> bool:
+        return self.position() >= self.end
+
+    def _rebase(self, now: float) -> None:
+        self._anchor_minute, self._anchor_wall = self.position(now), now
+
+    def play(self, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        if self._anchor_minute >= self.end:
+            self._anchor_minute = float(self.start)
+        self._anchor_wall, self.playing = now, True
+
+    def pause(self, now: float | None = None) -> None:
+        self._rebase(time.monotonic() if now is None else now)
+        self.playing = False
+
+    def set_speed(self, speed: int, now: float | None = None) -> None:
+        self._rebase(time.monotonic() if now is None else now)
+        self.speed = speed
+
+    def reset(self) -> None:
+        self._anchor_minute, self.playing = float(self.start), False
+
+
+def clock_for(tape: ReplayTape, speed: int = 60) -> ReplayClock:
+    return ReplayClock(tape.start, tape.end, speed)
+
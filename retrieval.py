@@ -0,0 +1,89 @@
+"""Section-level BM25 retrieval over the case corpus.
+
+Sections come from :class:`corpus.Corpus` (heading-delimited, referenced by
+byte offset). Only their term frequencies are persisted — as JSON next to
+the other caches — and only rebuilt when the corpus fingerprint changes, so
+a restart (or another Streamlit worker) just loads them. Section text is
+read back from the memory-mapped files for the hits alone.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from corpus import Corpus
+
+INDEX_VERSION = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does",
+    "for", "from", "how", "in", "is", "it", "its", "me", "of", "on", "or",
+    "that", "the", "this", "to", "was", "what", "when", "who", "why", "with",
+})
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case alphanumeric terms minus stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a list of per-section term frequencies."""
+
+    def __init__(self, term_freqs: list[dict[str, int]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tf) for tf in term_freqs]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        doc_freq = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(self.term_freqs)
+        self.idf = {t: math.log(1 + (n - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()}
+
+    def search(self, query: str, k: int = 4) -> list[tuple[float, int]]:
+        """Top-``k`` ``(score, section_index)`` pairs (zero scores omitted)."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        scored = []
+        for i, (tf, length) in enumerate(zip(self.term_freqs, self.lengths, strict=True)):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length)
+            score = sum(
+                self.idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf
+            )
+            if score > 0:
+                scored.append((score, i))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:k]
+
+
+def load_or_build_index(corpus: Corpus, cache_path: Path) -> BM25Index:
+    """Load the persisted index if the corpus is unchanged, else rebuild it."""
+    fingerprint = [list(f) for f in corpus.fingerprint]
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached["version"] == INDEX_VERSION and cached["fingerprint"] == fingerprint:
+            return BM25Index(cached["term_freqs"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    index = BM25Index(
+        [Counter(tokenize(f"{ref.title}\n{corpus.text(ref)}")) for ref in corpus.sections]
+    )
+    payload = {"version": INDEX_VERSION, "fingerprint": fingerprint, "term_freqs": index.term_freqs}
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, cache_path)
+    return index
+
+
+def render_sections(corpus: Corpus, hits: list[tuple[float, int]]) -> str:
+    """Materialize the hit sections into prompt-ready case material."""
+    parts = []
+    for _, i in hits:
+        ref = corpus.sections[i]
+        parts.append(f"[{corpus.names[ref.file]} — {ref.title}]\n{corpus.text(ref)}")
+    return "\n\n".join(parts)
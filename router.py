@@ -0,0 +1,72 @@
+"""Local complexity router behind the sidebar's "auto" model option.
+
+Each prompt gets a linear complexity score from cheap features — length,
+framework/analysis keywords (DRIVER, transfer entropy, "why", "compare"),
+several questions at once, formulas, and how deep the conversation already
+is — and is sent to the cheapest model whose tier covers that score.
+Scoring is a handful of precompiled regex scans (a few microseconds), so it
+never shows up next to the API call it saves.
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+AUTO = "auto"
+
+# Cheapest first: (highest score the model handles, model)
+TIERS = [(0.5, "gpt-4o-mini"), (1.6, "gpt-4.1-mini"), (float("inf"), "gpt-4.1")]
+
+HEAVY_TERMS = re.compile(
+    r"\b(driver|transfer entropy|te\b|causal\w*|causation|information flow|granger|mechanism\w*|"
+    r"framework|derive|proof|prove|step[- ]by[- ]step|calculat\w*|estimate|matrix|surrogate\w*|"
+    r"significan\w*|regime|markov|counterfactual|what if|design|evaluate|critique)",
+    re.IGNORECASE,
+)
+REASONING_TERMS = re.compile(
+    r"\b(why|how come|explain|walk (?:me )?through|compare|contrast|versus|vs|difference|"
+    r"trade-?offs?|implications?|would|should|could|predict\w*)\b",
+    re.IGNORECASE,
+)
+FORMULA = re.compile(r"[=→∑σ]|->|\b(?:log|sum|corr|te)\s*\(", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    model: str
+    score: float
+    features: dict[str, float]
+
+
+def prompt_features(prompt: str, history_turns: int = 0) -> dict[str, float]:
+    """The router's inputs, each already scaled to its score contribution."""
+    words = len(prompt.split())
+    return {
+        "length": min(words / 40, 1.5),
+        "heavy": min(len(HEAVY_TERMS.findall(prompt)), 2) * 0.9,
+        "reasoning": min(len(REASONING_TERMS.findall(prompt)), 2) * 0.4,
+        "questions": 0.4 if prompt.count("?") > 1 else 0.0,
+        "formula": 0.5 if FORMULA.search(prompt) else 0.0,
+        "history": min(max(history_turns - 2, 0) * 0.15, 0.6),
+    }
+
+
+def choose_model(score: float) -> str:
+    return next(model for ceiling, model in TIERS if score <= ceiling)
+
+
+class ModelRouter:
+    """Scores prompts and counts where they went (shared by every session)."""
+
+    def __init__(self):
+        self.counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def route(self, prompt: str, history_turns: int = 0) -> RouteDecision:
+        features = prompt_features(prompt, history_turns)
+        score = round(sum(features.values()), 3)
+        decision = RouteDecision(choose_model(score), score, features)
+        with self._lock:
+            self.counts[decision.model] += 1
+        return decision
@@ -0,0 +1,258 @@
+"""Process-wide admission scheduler for OpenAI requests.
+
+Every session's request passes through one ``AdmissionScheduler`` before it
+opens a stream. Each model has two token buckets refilled continuously at
+the account's per-minute limits: one holding requests (RPM) and one holding
+tokens (TPM). A request is charged one request plus its estimated tokens
+(the prompt as sent plus an expected completion), and once the answer is in
+the estimate is settled against the real usage.
+
+Requests that do not fit wait in per-session queues served round-robin, so
+one session firing several questions cannot starve the rest of the room;
+within a session requests keep their order. Waiters poll their position
+and ETA for the UI, and whichever waiter wakes first dispatches for
+everyone, so no background thread is needed.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from history import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+COMPLETION_ESTIMATE = 700  # tokens assumed for an answer until usage comes back
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    rpm: int
+    tpm: int
+
+
+DEFAULT_LIMITS = RateLimits(rpm=500, tpm=30_000)  # OpenAI tier-1 gpt-4.1
+
+
+def merge_limits(defaults: dict[str, RateLimits], overrides: dict | None) -> dict[str, RateLimits]:
+    """``defaults`` with per-model overrides such as ``{"gpt-4.1": {"tpm": 800000}}`` applied.
+
+    Fields left out of an override keep the model's default.
+    """
+    limits = dict(defaults)
+    for model, fields in (overrides or {}).items():
+        base = limits.get(model, DEFAULT_LIMITS)
+        limits[model] = RateLimits(
+            rpm=int(fields.get("rpm", base.rpm)),
+            tpm=int(fields.get("tpm", base.tpm)),
+        )
+    return limits
+
+
+def estimate_request_tokens(messages: list[dict], completion: int = COMPLETION_ESTIMATE) -> int:
+    """Prompt tokens (chars/4 per message plus framing) and the expected answer."""
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages) + completion
+
+
+class TokenBucket:
+    """``per_minute`` capacity, refilled continuously; may go negative on settle."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self._stamp = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (after ``refill``)."""
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+@dataclass(eq=False)
+class Ticket:
+    model: str
+    session: str
+    cost: int
+    charged: int = 0
+    granted: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+@dataclass
+class SchedulerStats:
+    admitted: int = 0
+    queued: int = 0  # admitted after waiting
+    longest_wait: float = 0.0
+
+
+class _Lane:
+    """One model's buckets and its per-session queues (rotation order)."""
+
+    def __init__(self, limits: RateLimits, now: float):
+        self.requests = TokenBucket(limits.rpm, now)
+        self.tokens = TokenBucket(limits.tpm, now)
+        self.queues: OrderedDict[str, deque[Ticket]] = OrderedDict()
+
+    def order(self) -> list[Ticket]:
+        """Queued tickets in the order round-robin will serve them."""
+        queues = list(self.queues.values())
+        rounds = max((len(q) for q in queues), default=0)
+        return [q[r] for r in range(rounds) for q in queues if r < len(q)]
+
+    def cost_of(self, ticket: Ticket) -> int:
+        return min(ticket.cost, int(self.tokens.capacity))  # an oversized request still runs, alone
+
+    def head_wait(self) -> float:
+        if not self.queues:
+            return 0.0
+        head = next(iter(self.queues.values()))[0]
+        return max(self.requests.wait_time(1), self.tokens.wait_time(self.cost_of(head)))
+
+
+class AdmissionScheduler:
+    """RPM/TPM token buckets per model with fair queuing across sessions."""
+
+    def __init__(
+        self,
+        limits: dict[str, RateLimits],
+        default: RateLimits = DEFAULT_LIMITS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits
+        self.default = default
+        self.clock = clock
+        self.stats = SchedulerStats()
+        self._lanes: dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, model: str) -> _Lane:
+        if model not in self._lanes:
+            self._lanes[model] = _Lane(self.limits.get(model, self.default), self.clock())
+        return self._lanes[model]
+
+    def submit(self, model: str, session: str, cost: int) -> Ticket:
+        """Queue a request; it may be granted immediately."""
+        ticket = Ticket(model, session, cost)
+        with self._lock:
+            lane = self._lane(model)
+            lane.queues.setdefault(session, deque()).append(ticket)
+            self._dispatch(lane)
+        return ticket
+
+    def _dispatch(self, lane: _Lane) -> None:
+        now = self.clock()
+        lane.requests.refill(now)
+        lane.tokens.refill(now)
+        while lane.queues:
+            session, queue = next(iter(lane.queues.items()))
+            ticket = queue[0]
+            cost = lane.cost_of(ticket)
+            if lane.requests.level < 1 or lane.tokens.level < cost:
+                return
+            lane.requests.level -= 1
+            lane.tokens.level -= cost
+            ticket.charged = cost
+            queue.popleft()
+            # Served sessions go to the back of the rotation
+            del lane.queues[session]
+            if queue:
+                lane.queues[session] = queue
+            ticket.granted.set()
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place in line (0 once granted)."""
+        with self._lock:
+            if ticket.granted.is_set():
+                return 0
+            order = self._lane(ticket.model).order()
+            return order.index(ticket) + 1 if ticket in order else 0
+
+    def eta(self, ticket: Ticket) -> float:
+        """Rough seconds until ``ticket`` is granted, if nothing else arrives."""
+        with self._lock:
+            if ticket.granted.is_set():
+                return 0.0
+            lane = self._lane(ticket.model)
+            order = lane.order()
+            ahead = order[: order.index(ticket) + 1] if ticket in order else [ticket]
+            lane.requests.refill(self.clock())
+            lane.tokens.refill(self.clock())
+            return max(
+                lane.requests.wait_time(len(ahead)),
+                lane.tokens.wait_time(sum(lane.cost_of(t) for t in ahead)),
+            )
+
+    def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds for the grant; returns whether it came."""
+        deadline = time.monotonic() + timeout
+        while not ticket.granted.is_set():
+            with self._lock:
+                lane = self._lane(ticket.model)
+                self._dispatch(lane)
+                pause = lane.head_wait()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ticket.granted.wait(min(max(pause, 0.01), remaining))
+        return ticket.granted.is_set()
+
+    def cancel(self, ticket: Ticket) -> None:
+        """Leave the queue (no-op once granted)."""
+        with self._lock:
+            lane = self._lane(ticket.model)
+            queue = lane.queues.get(ticket.session)
+            if queue and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del lane.queues[ticket.session]
+            self._dispatch(lane)
+
+    def settle(self, ticket: Ticket, actual_tokens: int, model: str | None = None) -> None:
+        """Refund (or charge) the difference between estimate and real usage.
+
+        If the answer came from another ``model`` (a rate-limit fallback), the
+        ticket's lane gets its whole estimate back and that model's lane is
+        charged the request and its real usage instead.
+        """
+        with self._lock:
+            lane = self._lane(ticket.model)
+            if model is None or model == ticket.model:
+                lane.tokens.level = min(lane.tokens.capacity, lane.tokens.level + ticket.charged - actual_tokens)
+                ticket.charged = actual_tokens
+                self._dispatch(lane)
+                return
+            lane.tokens.level = min(lane.tokens.capacity, lane.tokens.level + ticket.charged)
+            used = self._lane(model)
+            used.requests.level -= 1
+            used.tokens.level -= actual_tokens
+            ticket.model, ticket.charged = model, actual_tokens
+            self._dispatch(lane)
+            self._dispatch(used)
+
+    def admit(
+        self,
+        model: str,
+        session: str,
+        cost: int,
+        on_wait: Callable[[int, float], None] | None = None,
+        poll: float = 0.5,
+    ) -> Ticket:
+        """Block until admitted, calling ``on_wait(position, eta)`` while queued."""
+        ticket = self.submit(model, session, cost)
+        queued, started = not ticket.granted.is_set(), time.monotonic()
+        try:
+            while not ticket.granted.is_set():
+                if on_wait:
+                    on_wait(self.position(ticket), self.eta(ticket))
+                self.wait(ticket, poll)
+        finally:
+            self.cancel(ticket)  # the session went away while queued
+        with self._lock:
+            self.stats.admitted += 1
+            if queued:
+                self.stats.queued += 1
+                self.stats.longest_wait = max(self.stats.longest_wait, time.monotonic() - started)
+        return ticket
@@ -0,0 +1,145 @@
+"""Single-flight coalescing of identical in-flight chat completions.
+
+When a class clicks the same example question at once, every session would
+otherwise open its own upstream stream for the same first-turn request.
+``SingleFlight.join`` keys requests on (model, temperature bucket, exact
+messages): the first caller registers the flight, runs its ``admit``
+callback (rate-limit admission) and starts one upstream stream on a pump
+thread, and every caller — first or later — reads the shared ``Flight``
+chunk by chunk. Lookup and registration are one step under the registry
+lock, so a request can never slip past admission between the two. Chunks
+are retained for the flight's lifetime, so a session that joins mid-answer
+replays what it missed and then follows live. The pump does not depend on
+any one session, so a leader that navigates away does not strand the
+others. Once the stream ends the key is freed; later repeats are the answer
+cache's job.
+"""
+
+import hashlib
+import json
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+
+from answer_cache import temperature_bucket
+from streaming import StreamReport
+
+IDLE_TIMEOUT = 120.0  # seconds a subscriber waits for the next chunk
+
+
+def flight_key(model: str, temperature: float, messages: list[dict]) -> str:
+    payload = json.dumps([model, temperature_bucket(temperature), messages], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class FlightStats:
+    upstream: int = 0  # streams actually opened
+    joined: int = 0  # requests that rode along on one
+
+    @property
+    def saved(self) -> float:
+        total = self.upstream + self.joined
+        return self.joined / total if total else 0.0
+
+
+@dataclass
+class Flight:
+    """One upstream stream and everything it has produced so far."""
+
+    key: str
+    report: StreamReport
+    chunks: list[str] = field(default_factory=list)
+    done: bool = False
+    error: BaseException | None = None
+    admission: object = None  # what the creator's ``admit`` returned (its scheduler ticket)
+    subscribers: int = 0  # readers currently following the stream
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def publish(self, text: str) -> None:
+        with self._cond:
+            self.chunks.append(text)
+            self._cond.notify_all()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        with self._cond:
+            self.done, self.error = True, error
+            self._cond.notify_all()
+
+    def subscribe(self, timeout: float = IDLE_TIMEOUT) -> Iterator[str]:
+        """Every chunk from the start, then live ones; re-raises upstream errors."""
+        seen = 0
+        with self._cond:
+            self.subscribers += 1
+        try:
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda seen=seen: self.done or len(self.chunks) > seen, timeout):
+                        raise TimeoutError(f"no stream output for {timeout:.0f}s")
+                    fresh, seen = self.chunks[seen:], len(self.chunks)
+                    finished, error = self.done, self.error
+                yield from fresh
+                if finished:
+                    if error is not None:
+                        raise error
+                    return
+        finally:  # finished, failed, or the session went away
+            with self._cond:
+                self.subscribers -= 1
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight streams, shared by every session."""
+
+    def __init__(self):
+        self._flights: dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = FlightStats()
+
+    def join(
+        self,
+        key: str,
+        produce: Callable[[StreamReport], Iterator[str]],
+        report: StreamReport,
+        admit: Callable[[], object] | None = None,
+    ) -> Flight:
+        """The flight for ``key``, starting ``produce(report)`` if none is running.
+
+        Only the caller that creates the flight runs ``admit()``, before the
+        stream starts; joiners arriving meanwhile already find the flight and
+        wait on it. Callers read ``flight.subscribe()``; ``flight.report`` is
+        the one report filled by whichever caller started the stream.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.joined += 1
+                return flight
+            flight = self._flights[key] = Flight(key, report)
+            self.stats.upstream += 1
+        try:
+            flight.admission = admit() if admit else None
+        except BaseException as exc:  # the creator gave up (or left) before it was admitted
+            with self._lock:
+                self._flights.pop(key, None)
+            cancelled = exc if isinstance(exc, Exception) else RuntimeError("request cancelled before it started")
+            flight.finish(cancelled)
+            raise
+        threading.Thread(target=self._pump, args=(flight, produce), daemon=True).start()
+        return flight
+
+    def _pump(self, flight: Flight, produce: Callable[[StreamReport], Iterator[str]]) -> None:
+        error = None
+        try:
+            for text in produce(flight.report):
+                flight.publish(text)
+        except Exception as exc:  # noqa: BLE001 — handed to every subscriber
+            error = exc
+        finally:
+            with self._lock:
+                self._flights.pop(flight.key, None)
+            flight.finish(error)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
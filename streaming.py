@@ -0,0 +1,156 @@
+"""Resilient chat-completion streaming: retry, backoff, resume, fallback.
+
+``resilient_stream`` wraps ``client.chat.completions.create(stream=True)``
+and yields text deltas like a plain stream, but:
+
+- retries 429s, 5xx and connection errors with full-jitter exponential
+  backoff, honoring ``Retry-After`` / ``retry-after-ms`` in full when the
+  server sends one (and giving up if it would blow the wait budget);
+- downgrades along ``FALLBACK_MODELS`` (``gpt-4.1`` → ``gpt-4o-mini``) on a
+  rate limit instead of waiting it out;
+- resumes a stream that drops mid-answer by asking the model to continue
+  from the text already shown, so nothing the user saw is thrown away.
+
+The SDK's own retries are disabled for these calls so the policy lives here.
+"""
+
+import random
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+
+import openai
+
+from openai_pool import httpx
+
+FALLBACK_MODELS = {"gpt-4.1": "gpt-4o-mini"}
+
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off mid-stream. Continue exactly where it "
+    "stopped — no repetition, no preamble."
+)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    httpx.TransportError,
+)
+
+
+def stream_text(stream, usage: dict) -> Iterator[str]:
+    """Yield content deltas from a chat completion stream.
+
+    The trailing usage chunk (``stream_options={"include_usage": True}``)
+    is recorded into ``usage``, including cached prompt tokens.
+    """
+    for chunk in stream:
+        if chunk.usage is not None:
+            details = getattr(chunk.usage, "prompt_tokens_details", None)
+            usage.update(
+                prompt_tokens=chunk.usage.prompt_tokens,
+                completion_tokens=chunk.usage.completion_tokens,
+                cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+            )
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    max_wait: float = 20.0  # total seconds of waiting before giving up
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Seconds to wait before ``attempt`` (1-based); the server hint wins, uncapped."""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+@dataclass
+class StreamReport:
+    """What it took to get the answer out (shown under the reply)."""
+
+    requested_model: str
+    model: str = ""
+    attempts: int = 0
+    resumed: int = 0
+    waited: float = 0.0
+    usage: dict = field(default_factory=dict)
+
+    @property
+    def fell_back(self) -> bool:
+        return self.model != self.requested_model
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Parse ``retry-after-ms`` / ``retry-after`` from an API error, if any."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def resilient_stream(
+    client: openai.OpenAI,
+    *,
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    report: StreamReport | None = None,
+    policy: RetryPolicy | None = None,
+    fallbacks: dict[str, str] | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[str]:
+    """Stream an answer, surviving rate limits and dropped connections."""
+    policy = policy or RetryPolicy()
+    fallbacks = FALLBACK_MODELS if fallbacks is None else fallbacks
+    report = report or StreamReport(requested_model=model)
+    report.model = model
+    client = client.with_options(max_retries=0)
+    emitted = ""
+
+    while True:
+        report.attempts += 1
+        request = messages
+        if emitted:
+            request = messages + [
+                {"role": "assistant", "content": emitted},
+                {"role": "user", "content": CONTINUE_PROMPT},
+            ]
+        try:
+            stream = client.chat.completions.create(
+                model=report.model,
+                messages=request,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for text in stream_text(stream, report.usage):
+                emitted += text
+                yield text
+            return
+        except RETRYABLE_ERRORS as exc:
+            if isinstance(exc, openai.RateLimitError) and report.model in fallbacks:
+                report.model = fallbacks[report.model]
+                continue
+            if report.attempts >= policy.max_attempts:
+                raise
+            if emitted:
+                report.resumed += 1
+            delay = policy.backoff(report.attempts, retry_after_seconds(exc))
+            if report.waited + delay > policy.max_wait:
+                raise  # retrying sooner than the server asked only earns more 429s
+            report.waited += delay
+            sleep(delay)
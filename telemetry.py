@@ -0,0 +1,155 @@
+"""Per-request latency and token telemetry.
+
+Measurements go two places: an append-only JSONL file (one object per
+sample, for offline analysis) and a bounded in-memory window per metric
+that backs the live p50/p95 panel and the Prometheus text rendering.
+
+``record`` sits on hot paths (every stream, fragment run and replay frame),
+so it only buffers the JSONL line; lines are appended in batches of
+``batch_size`` or ``max_delay`` seconds after the first one, outside the
+metrics lock. Once the file passes ``max_bytes`` it is rotated to
+``<name>.1`` (one backup kept), so the log stays bounded.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (``q`` in 0–100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class Telemetry:
+    """Thread-safe metric sink shared by every session in the process."""
+
+    def __init__(
+        self,
+        jsonl_path: Path | str | None = None,
+        window: int = 500,
+        batch_size: int = 256,
+        max_delay: float = 1.0,
+        max_bytes: int = 20_000_000,
+    ):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: dict[str, int] = defaultdict(int)
+        self._sums: dict[str, float] = defaultdict(float)
+        self._pending: list[str] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # serializes file writes, never held with ``_lock`` waiting on I/O
+        if self.jsonl_path:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, metric: str, value: float, **labels) -> None:
+        """Add one sample (``labels`` are only written to the JSONL log)."""
+        line = None
+        if self.jsonl_path:
+            line = json.dumps({"ts": time.time(), "metric": metric, "value": value, **labels}) + "\n"
+        with self._lock:
+            self._samples[metric].append(value)
+            self._counts[metric] += 1
+            self._sums[metric] += value
+            if line is None:
+                return
+            self._pending.append(line)
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append every buffered JSONL line, rotating the file when it is full."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch, self._pending = self._pending, []
+            if not batch or not self.jsonl_path:
+                return
+            data = "".join(batch)
+            try:
+                size = self.jsonl_path.stat().st_size
+            except OSError:
+                size = 0
+            if size and size + len(data) > self.max_bytes:
+                os.replace(self.jsonl_path, self.jsonl_path.with_name(self.jsonl_path.name + ".1"))
+            with self.jsonl_path.open("a", encoding="utf-8") as f:
+                f.write(data)
+
+    @contextmanager
+    def span(self, metric: str, **labels) -> Iterator[None]:
+        """Record the wall time of the ``with`` block in milliseconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(metric, (time.perf_counter() - started) * 1000, **labels)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """``{metric: {p50, p95, count}}`` over the recent window."""
+        with self._lock:
+            windows = {m: sorted(v) for m, v in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            m: {"p50": percentile(v, 50), "p95": percentile(v, 95), "count": counts[m]}
+            for m, v in sorted(windows.items())
+        }
+
+    def prometheus_text(self, prefix: str = "carry_qa") -> str:
+        """Prometheus exposition format (summaries with 0.5/0.95 quantiles)."""
+        lines = []
+        with self._lock:
+            sums = dict(self._sums)
+        for metric, stats in self.summary().items():
+            name = f"{prefix}_{metric}"
+            lines.append(f"# TYPE {name} summary")
+            lines.append(f'{name}{{quantile="0.5"}} {stats["p50"]:g}')
+            lines.append(f'{name}{{quantile="0.95"}} {stats["p95"]:g}')
+            lines.append(f"{name}_sum {sums[metric]:g}")
+            lines.append(f"{name}_count {stats['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def timed_stream(
+    deltas: Iterator[str], telemetry: Telemetry, usage: dict, **labels
+) -> Iterator[str]:
+    """Pass deltas through, recording time-to-first-token and tokens/second.
+
+    ``usage`` is read after the stream ends (it is filled by the streaming
+    engine's final chunk) for the token totals.
+    """
+    started = time.perf_counter()
+    first: float | None = None
+    for delta in deltas:
+        if first is None:
+            first = time.perf_counter()
+            telemetry.record("ttft_ms", (first - started) * 1000, **labels)
+        yield delta
+    if first is None:
+        return
+    generation = time.perf_counter() - first
+    completion = usage.get("completion_tokens")
+    if completion and generation > 0:
+        telemetry.record("tokens_per_second", completion / generation, **labels)
+    if usage:
+        telemetry.record(
+            "total_tokens", usage.get("prompt_tokens", 0) + (completion or 0), **labels
+        )
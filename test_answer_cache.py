@@ -0,0 +1,110 @@
+"""Tests for the persistent answer cache."""
+
+import time
+
+from answer_cache import AnswerCache, key_terms, normalize_question, replay_answer
+
+SYSTEM = "system prompt v1"
+
+
+def test_normalize_question_strips_noise():
+    """Emoji, punctuation and case should not affect the key."""
+    assert normalize_question("💥 What on earth happened on August 5, 2024?") == (
+        "what on earth happened on august 5 2024"
+    )
+
+
+def test_exact_hit_and_miss(tmp_path):
+    """Same question hits; different model misses."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "Walk me through the contagion chain", "JPY → SPX → MXN")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "walk me through the contagion chain!") == "JPY → SPX → MXN"
+    assert cache.get("gpt-4o-mini", 0.3, SYSTEM, "Walk me through the contagion chain") is None
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_near_duplicate_hit(tmp_path):
+    """A close rewording should reuse the cached answer."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "What on earth happened on August 5, 2024?", "Black Monday")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "what happened on august 5 2024") == "Black Monday"
+    assert cache.stats.near_hits == 1
+
+
+def test_direction_is_not_a_near_duplicate(tmp_path):
+    """Reversing the transfer entropy direction is a different question."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "TE from JPY to SPX", "large")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "TE from SPX to JPY") is None
+
+
+def test_different_number_is_not_a_near_duplicate(tmp_path):
+    """Long questions differing only in a number need their own answers."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    question = "What would happen to the carry trade if the BOJ raised its policy rate to {}% next year?"
+    cache.put("gpt-4.1", 0.3, SYSTEM, question.format("0.25"), "a little")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, question.format("0.5")) is None
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "What would happen to the carry trade if BOJ raised policy rate to 0.25%?")
+
+
+def test_other_asset_or_direction_is_not_a_near_duplicate(tmp_path):
+    """Swapping the target asset or the direction word needs a fresh answer."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "Explain transfer entropy from JPY to SPX during the unwind", "SPX answer")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "Why did the S&P 500 fall so hard in early August?", "fall answer")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "Explain transfer entropy from JPY to MXN during the unwind") is None
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "Why did the S&P 500 rise so hard in early August?") is None
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "why did the S&P 500 fall so hard in early august") == "fall answer"
+    assert cache.stats.near_hits == 0
+
+
+def test_key_terms_are_canonical_and_ordered():
+    assert key_terms(normalize_question("From the yen to the S&P 500")) == ("jpy", "spx")
+    assert key_terms(normalize_question("Did the peso drop?")) == ("mxn", "down")
+
+
+def test_miss_leaves_no_open_transaction(tmp_path):
+    """TTL expiry on a lookup is committed, not left pending."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "q", "a")
+    assert cache.get("gpt-4.1", 0.3, SYSTEM, "something else entirely") is None
+    assert not cache._db.in_transaction
+
+
+def test_system_prompt_change_invalidates(tmp_path):
+    """Editing the case material must not serve stale answers."""
+    cache = AnswerCache(tmp_path / "a.sqlite3")
+    cache.put("gpt-4.1", 0.3, SYSTEM, "q", "a")
+    assert cache.get("gpt-4.1", 0.3, "system prompt v2", "q") is None
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    """Over capacity the least recently used entry goes; the rest persist."""
+    path = tmp_path / "a.sqlite3"
+    cache = AnswerCache(path, max_entries=2)
+    cache.put("m", 0.3, SYSTEM, "alpha question", "1")
+    time.sleep(0.01)
+    cache.put("m", 0.3, SYSTEM, "beta question", "2")
+    time.sleep(0.01)
+    cache.get("m", 0.3, SYSTEM, "alpha question")
+    time.sleep(0.01)
+    cache.put("m", 0.3, SYSTEM, "gamma question", "3")
+    reopened = AnswerCache(path, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.get("m", 0.3, SYSTEM, "beta question") is None
+    assert reopened.get("m", 0.3, SYSTEM, "alpha question") == "1"
+
+
+def test_ttl_expiry(tmp_path):
+    """Entries older than the TTL are dropped."""
+    cache = AnswerCache(tmp_path / "a.sqlite3", ttl_seconds=0)
+    cache.put("m", 0.3, SYSTEM, "q", "a")
+    time.sleep(0.01)
+    assert cache.get("m", 0.3, SYSTEM, "q") is None
+
+
+def test_replay_answer_round_trips():
+    """Replayed chunks must reassemble to the exact cached text."""
+    text = "📊 USD/JPY went 161 → 142.\n\n- yikes\n- pain"
+    assert "".join(replay_answer(text, delay=0)) == text
@@ -1,14 +1,38 @@
 """Tests for the Japan Carry Trade Q&A app."""
 
+import numpy as np
+import pytest
+
+import app
 from app import (
     CASE_DATA_PATH,
     CONTAGION_FLOW_STEPS,
     EXAMPLE_QUESTIONS,
+    MARKET_DATA_DIR,
     SYSTEM_PROMPT_TEMPLATE,
+    TICKER_ITEMS,
+    TIMELINE_CHART_SYMBOLS,
     TIMELINE_EVENTS,
+    build_api_messages,
     build_system_prompt,
+    case_metrics,
+    compute_regime_shift,
+    configured_rate_limits,
+    get_fact_index,
+    get_static_html,
+    line_spec,
     load_case_content,
+    replay_metrics,
+    run_carry_sim,
+    te_badge,
+    te_context_message,
+    timeline_chart_data,
 )
+from chart_tiles import build_tiles
+from market_store import MarketStore
+from replay import ReplayTape
+from te_matrix import TEMatrix
+from transfer_entropy import TEResult
 
 
 def test_case_data_file_exists():
@@ -18,8 +42,9 @@ def test_case_data_file_exists():
 
 def test_load_case_content_not_empty():
     """Case content should load and be non-empty."""
-    content = load_case_content.__wrapped__()  # bypass st.cache_data
+    content = load_case_content()
     assert len(content) > 500, "Case content appears too short"
+    assert content == CASE_DATA_PATH.read_text(encoding="utf-8")
 
 
 def test_case_content_has_key_sections():
@@ -80,3 +105,138 @@ def test_contagion_flow_steps():
     for step in CONTAGION_FLOW_STEPS:
         assert "label" in step, "Each step needs a 'label' key"
         assert "detail" in step, "Each step needs a 'detail' key"
+
+
+def test_system_prompt_starts_with_case_material():
+    """Case text must lead the prompt so the cached prefix stays stable."""
+    prompt = build_system_prompt("TEST_CONTENT_HERE")
+    assert prompt.startswith("--- CASE MATERIAL ---\nTEST_CONTENT_HERE")
+
+
+def test_api_messages_prefix_is_stable_across_turns():
+    """Each turn's request is an exact prefix of the next turn's."""
+    history = [
+        {"role": "assistant", "content": "hi", "extra": 1},
+        {"role": "user", "content": "q1"},
+    ]
+    turn1 = build_api_messages("SYS", history)
+    history += [{"role": "assistant", "content": "a1"}, {"role": "user", "content": "q2"}]
+    turn2 = build_api_messages("SYS", history)
+    assert turn2[: len(turn1)] == turn1
+    assert all(set(m) == {"role", "content"} for m in turn2)
+
+
+
+def test_te_context_message_lists_both_directions():
+    """The chat gets forward and reverse TE for each pair."""
+    msg = te_context_message([TEResult("JPY", "SPX", 0.1234, 0.0001)])
+    assert msg["role"] == "system"
+    assert "TE(JPY→SPX) = 0.1234 bits" in msg["content"]
+    assert "TE(SPX→JPY) = 0.0001 bits" in msg["content"]
+
+
+def test_contagion_steps_name_te_assets():
+    """Every Domino Effect step maps to a series in the TE matrix."""
+    assets = [step["asset"] for step in CONTAGION_FLOW_STEPS]
+    assert len(set(assets)) == len(assets)
+
+
+def test_te_badge_hides_insignificant_links():
+    nan = float("nan")
+    matrix = TEMatrix(
+        ["JPY", "SPX"],
+        te=np.array([[nan, 0.14], [0.001, nan]]),
+        p_values=np.array([[nan, 0.01], [0.6, nan]]),
+        surrogates=99,
+    )
+    assert te_badge(matrix, "JPY", "SPX") == "0.14 bits · p=0.01"
+    assert te_badge(matrix, "SPX", "JPY") == "n.s."
+
+
+def test_line_spec_folds_requested_series():
+    spec = line_spec(["a", "b"])
+    assert spec["transform"] == [{"fold": ["a", "b"], "as": ["series", "value"]}]
+    assert spec["encoding"]["x"]["field"] == "tick"
+
+
+def test_case_metrics_match_case_facts():
+    """Header numbers computed from the bundled store agree with the case text."""
+    metrics = case_metrics(MarketStore(MARKET_DATA_DIR))
+    assert f"{metrics['topix_aug5']:.0%}" == "-12%"
+    assert f"{metrics['nikkei_aug5']:.1%}" == "-12.4%"
+    assert metrics["vix_peak"] > 60
+    assert f"{metrics['usdjpy_peak']:.0f}→{metrics['usdjpy_trough']:.0f}" == "161→142"
+    assert metrics["boj_rate"] == 0.25
+
+
+def test_ticker_and_timeline_templates_format():
+    metrics = case_metrics(MarketStore(MARKET_DATA_DIR))
+    for text in TICKER_ITEMS + [description for _, _, description in TIMELINE_EVENTS]:
+        assert "{" not in text.format(**metrics)
+
+
+def test_replay_metrics_fill_the_same_templates():
+    """Replay frames drive the ticker with the keys the static header uses."""
+    store = MarketStore(MARKET_DATA_DIR)
+    triggers = [step["trigger"] for step in CONTAGION_FLOW_STEPS]
+    tape = ReplayTape(store, "2024-07-31", "2024-08-06", triggers, ["BOJ_RATE"])
+    metrics = replay_metrics(tape.frame_at(tape.end))
+    assert metrics.keys() == case_metrics(store).keys()
+    for text in TICKER_ITEMS:
+        assert "{" not in text.format(**metrics)
+    assert f"{metrics['topix_aug5']:.0%}" == "-12%"
+
+
+def test_timeline_chart_data_stays_within_budget():
+    """The whole fixture is drawn from coarse tiles; one hour from raw bars."""
+    tiles = build_tiles(MarketStore(MARKET_DATA_DIR), "1m", list(TIMELINE_CHART_SYMBOLS))
+    full, coarse = timeline_chart_data(tiles, None, None)
+    assert coarse > 1
+    assert len(full["time"]) <= 1_000 * len(TIMELINE_CHART_SYMBOLS)
+    assert max(v for v, name in zip(full["value"], full["series"], strict=True) if name == "VIX") > 65
+    hour, fine = timeline_chart_data(tiles, "2024-08-05T13:00", "2024-08-05T14:00")
+    assert fine == 1
+    assert len(hour["time"]) == 60 * len(TIMELINE_CHART_SYMBOLS)
+
+
+def test_regime_shift_reproduces_the_case_jump():
+    """Markov Lab: <1% hike probability before, 15%-ish after, break at Jul 31."""
+    shift = compute_regime_shift.__wrapped__()  # bypass st.cache_data
+    assert shift["before"] < 0.01
+    assert shift["after"] > 0.1
+    assert "2024-07-26" <= shift["break_date"] <= "2024-08-07"
+    assert len(shift["chart"]["time"]) == len(shift["chart"]["value"])
+
+
+def test_carry_sim_summary_feeds_the_histogram(monkeypatch):
+    monkeypatch.setattr(app, "CARRY_SIM_PATHS", 20_000)
+    sim = run_carry_sim.__wrapped__("MXN", 10.0, 0.05, 0.15)  # bypass st.cache_data
+    assert 0 < sim["margin_call"] < 1
+    assert sim["es_99"] <= sim["var_99"] < sim["mean"]
+    assert sum(sim["histogram"]["share"]) == pytest.approx(1.0)
+
+
+def test_fact_index_answers_from_case_and_timeline():
+    index = get_fact_index.__wrapped__()  # bypass st.cache_resource
+    found = index.lookup("What did VIX hit on Aug 5?")
+    assert found is not None
+    assert f"{case_metrics(MarketStore(MARKET_DATA_DIR))['vix_peak']:.0f}" in found.text
+
+
+def test_static_html_is_prerendered_once_with_every_section():
+    html = get_static_html.__wrapped__()  # bypass st.cache_resource
+    metrics = case_metrics(MarketStore(MARKET_DATA_DIR))
+    assert html["head"].lstrip().startswith("<style>")
+    for _, date, description in TIMELINE_EVENTS:
+        assert date in html["timeline"]
+        assert description.format(**metrics) in html["timeline"]
+    for step in CONTAGION_FLOW_STEPS:
+        assert step["label"] in html["contagion"]
+
+
+def test_rate_limits_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CARRY_QA_RATE_LIMITS", '{"gpt-4.1": {"tpm": 2000000}}')
+    limits = configured_rate_limits()
+    assert limits["gpt-4.1"].tpm == 2_000_000
+    assert limits["gpt-4.1"].rpm == app.OPENAI_RATE_LIMITS["gpt-4.1"].rpm
+    assert limits["gpt-4o-mini"] == app.OPENAI_RATE_LIMITS["gpt-4o-mini"]
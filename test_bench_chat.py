@@ -0,0 +1,24 @@
+"""Tests for the benchmark's baseline comparison."""
+
+from bench_chat import regressions, summarize
+
+
+def level(rerun, turn, ttft):
+    return {
+        "rerun_ms": {"p50": rerun, "p95": rerun},
+        "turn_ms": {"p50": turn, "p95": turn},
+        "ttft_overhead_ms": {"p50": ttft, "p95": ttft},
+        "mem_per_session_kb": 100.0,
+    }
+
+
+def test_summarize_percentiles():
+    """p50/p95 use nearest rank over the samples."""
+    assert summarize([float(v) for v in range(1, 101)]) == {"p50": 51.0, "p95": 95.0}
+
+
+def test_regressions_flag_only_beyond_tolerance():
+    """A tracked p50 more than 25% slower than baseline is a regression."""
+    baseline = {"levels": {"10": level(50, 200, 10)}}
+    current = {"levels": {"10": level(60, 300, 12), "100": level(999, 999, 999)}}
+    assert regressions(current, baseline, tolerance=0.25) == ["10 users turn_ms: 200 → 300 ms"]
@@ -0,0 +1,50 @@
+"""Tests for the chunked carry-trade margin-call simulator."""
+
+import numpy as np
+import pytest
+
+from carry_sim import CarryPosition, MarketModel, simulate
+
+PATHS = 40_000
+
+
+def surge(per_month: float, **kwargs) -> MarketModel:
+    return MarketModel(p_stress=MarketModel.daily_hazard(per_month), **kwargs)
+
+
+def test_daily_hazard_compounds_to_the_monthly_odds():
+    assert 1 - (1 - MarketModel.daily_hazard(0.15)) ** 21 == pytest.approx(0.15)
+
+
+def test_counts_are_consistent_and_seeded():
+    result = simulate(CarryPosition(), paths=PATHS, chunk=7_000, seed=3)
+    again = simulate(CarryPosition(), paths=PATHS, chunk=7_000, seed=3)
+    assert result.paths == PATHS
+    assert result.return_counts.sum() == PATHS
+    assert result.call_day_counts.sum() == result.margin_calls
+    assert np.array_equal(result.return_counts, again.return_counts)
+
+
+def test_new_matrix_raises_margin_calls_and_skews_left():
+    old = simulate(CarryPosition(), surge(0.01), paths=PATHS)
+    new = simulate(CarryPosition(), surge(0.15), paths=PATHS)
+    assert new.margin_call_probability > 2 * old.margin_call_probability
+    assert new.skew < old.skew < 0
+
+
+def test_liquidation_feedback_deepens_the_tail():
+    with_feedback = simulate(CarryPosition(), surge(0.5), paths=PATHS)
+    without = simulate(CarryPosition(), surge(0.5, feedback=0.0), paths=PATHS)
+    assert with_feedback.margin_call_probability > without.margin_call_probability
+    assert with_feedback.quantile(0.01) < without.quantile(0.01)
+
+
+def test_unlevered_position_is_never_called():
+    result = simulate(CarryPosition(leverage=1.0), paths=PATHS)
+    assert result.margin_calls == 0
+    assert result.expected_shortfall(0.01) <= result.quantile(0.01) < result.mean
+
+
+def test_unsupported_target_raises():
+    with pytest.raises(ValueError):
+        simulate(CarryPosition(target="BRL"), paths=10)
@@ -0,0 +1,60 @@
+"""Tests for the min/max level-of-detail chart tiles."""
+
+import numpy as np
+import pytest
+
+from chart_tiles import LODSeries, build_tiles
+from market_fixtures import FIXTURE_DIR
+from market_store import MarketStore, from_minutes
+
+N = 200_000
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(1)
+    values = np.cumsum(rng.standard_normal(N))
+    values[123_457] = 1e6  # a one-bar spike
+    return LODSeries(np.arange(N) + 28_000_000, values)
+
+
+def when(series, row):
+    return from_minutes(series.minutes[row : row + 1])[0]
+
+
+def test_levels_shrink_by_factor(series):
+    widths = [width for width, _, _ in series.levels]
+    assert widths[:3] == [4, 16, 64]
+    assert len(series.levels[-1][1]) == 1
+
+
+def test_full_range_fits_budget_and_keeps_extremes(series):
+    tile = series.query(max_points=1_000)
+    assert 100 < len(tile) <= 1_000
+    assert tile.values.max() == 1e6
+    assert tile.values.min() == series.values.min()
+    assert np.all(np.diff(tile.minutes) > 0)
+
+
+def test_zoomed_window_is_raw_when_it_fits(series):
+    tile = series.query(when(series, 1_000), when(series, 1_500))
+    assert tile.resolution == 1
+    assert np.array_equal(tile.values, series.values[1_000:1_500])
+
+
+def test_window_bounds_are_half_open(series):
+    tile = series.query(when(series, 10_000), when(series, 90_000), max_points=300)
+    assert tile.resolution > 1
+    assert tile.minutes[0] == series.minutes[10_000]
+    assert tile.minutes[-1] == series.minutes[89_999]
+    assert len(tile) <= 300
+
+
+def test_build_tiles_covers_store_columns():
+    tiles = build_tiles(MarketStore(FIXTURE_DIR), "1m", ["VIX"])
+    assert tiles["VIX"].query().values.max() == pytest.approx(65.73, abs=0.01)
+
+
+def test_factor_must_group():
+    with pytest.raises(ValueError):
+        LODSeries(np.arange(4), np.arange(4.0), factor=1)
@@ -0,0 +1,66 @@
+"""Tests for the SQLite chat session store."""
+
+import sqlite3
+import time
+
+from chat_store import ChatStore
+
+
+def test_appends_are_batched(tmp_path):
+    """Rows reach the database in one commit per batch, not one per message."""
+    store = ChatStore(tmp_path / "chats.sqlite3", batch_size=4, max_delay=60)
+    for i in range(10):
+        store.append("s1", "user", f"q{i}")
+    assert store.commits == 2
+    on_disk = sqlite3.connect(tmp_path / "chats.sqlite3").execute("SELECT COUNT(*) FROM messages")
+    assert on_disk.fetchone()[0] == 8
+    assert store.count("s1") == 10
+    store.flush()
+    assert store.commits == 3
+
+
+def test_pending_rows_flush_after_max_delay(tmp_path):
+    store = ChatStore(tmp_path / "chats.sqlite3", batch_size=100, max_delay=0.05)
+    store.append("s1", "user", "hello")
+    deadline = time.time() + 5
+    while store.commits == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.commits == 1
+
+
+def test_pages_walk_back_from_the_newest(tmp_path):
+    store = ChatStore(tmp_path / "chats.sqlite3")
+    for i in range(25):
+        store.append("s1", "user" if i % 2 else "assistant", f"m{i}")
+    store.append("s2", "user", "other session")
+    latest = store.page("s1", limit=10)
+    assert [m["content"] for m in latest] == [f"m{i}" for i in range(15, 25)]
+    older = store.page("s1", before=latest[0]["seq"], limit=10)
+    assert [m["seq"] for m in older] == list(range(5, 15))
+    assert len(store.page("s1", before=older[0]["seq"], limit=10)) == 5
+
+
+def test_sessions_survive_a_restart_and_clear(tmp_path):
+    store = ChatStore(tmp_path / "chats.sqlite3")
+    store.append("s1", "user", "What happened on Aug 5?")
+    store.close()
+    reopened = ChatStore(tmp_path / "chats.sqlite3")
+    assert reopened.page("s1") == [{"role": "user", "content": "What happened on Aug 5?", "seq": 0}]
+    assert reopened.append("s1", "assistant", "Black Monday")["seq"] == 1
+    reopened.clear("s1")
+    assert reopened.page("s1") == []
+    assert reopened.append("s1", "user", "fresh")["seq"] == 0
+    assert reopened._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_two_processes_interleave_without_overwriting(tmp_path):
+    """Stores sharing one file number rows at flush time, so none is lost."""
+    a = ChatStore(tmp_path / "chats.sqlite3", max_delay=60)
+    b = ChatStore(tmp_path / "chats.sqlite3", max_delay=60)
+    first, second = a.append("s1", "user", "from a"), b.append("s1", "user", "from b")
+    assert first["seq"] == second["seq"] == 0  # both provisional
+    a.flush()
+    b.flush()
+    assert (first["seq"], second["seq"]) == (0, 1)  # b's dict corrected in place
+    assert [m["content"] for m in a.page("s1")] == ["from a", "from b"]
+    assert b.append("s1", "assistant", "reply")["seq"] == 2
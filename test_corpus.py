@@ -0,0 +1,75 @@
+"""Tests for the memory-mapped multi-case corpus."""
+
+import pytest
+
+from corpus import Corpus, scan_sections
+
+SAMPLE = """# Case
+
+## Background
+Yen funding was cheap for 17 years.
+
+### What Is a Carry Trade?
+Borrow low, invest high.
+
+```
+## not a heading inside a fence
+```
+
+## Key Data
+VIX spiked above 60 — 💀.
+"""
+
+
+def test_scan_sections_on_headings():
+    """Sections follow headings, ### titles carry their parent, fences are
+    ignored and heading-only sections are dropped."""
+    data = SAMPLE.encode("utf-8")
+    sections = scan_sections(data)
+    assert [title for _, _, title in sections] == [
+        "Background",
+        "Background › What Is a Carry Trade?",
+        "Key Data",
+    ]
+    assert data[sections[-1][0] : sections[-1][1]].decode("utf-8").endswith("💀.\n")
+
+
+def test_corpus_spans_multiple_files(tmp_path):
+    """Every markdown file in the directory contributes sections."""
+    (tmp_path / "a_case.md").write_text(SAMPLE, encoding="utf-8")
+    (tmp_path / "b_bis.md").write_text("## BIS\nNegative skew.\n", encoding="utf-8")
+    corpus = Corpus(tmp_path, tmp_path / "idx" / "sections.idx")
+    assert corpus.names == ["a_case.md", "b_bis.md"]
+    assert len(corpus) == 4
+    bis = corpus.sections[-1]
+    assert corpus.names[bis.file] == "b_bis.md"
+    assert corpus.text(bis) == "## BIS\nNegative skew."
+    assert corpus.file_text("a_case.md") == SAMPLE
+
+
+def test_index_reused_until_a_file_changes(tmp_path):
+    """The binary offset index is loaded, not rebuilt, while files are unchanged."""
+    case = tmp_path / "case.md"
+    case.write_text(SAMPLE, encoding="utf-8")
+    index_path = tmp_path / "sections.idx"
+    first = Corpus(tmp_path, index_path)
+    built_at = index_path.stat().st_mtime_ns
+
+    again = Corpus(tmp_path, index_path)
+    assert again.sections == first.sections
+    assert index_path.stat().st_mtime_ns == built_at
+
+    case.write_text(SAMPLE + "\n## Markov\nTransition matrix changed.\n", encoding="utf-8")
+    changed = Corpus(tmp_path, index_path)
+    assert changed.sections[-1].title == "Markov"
+    assert changed.text(changed.sections[-1]).endswith("matrix changed.")
+
+
+@pytest.mark.parametrize("damage", [lambda raw: raw[:10], lambda raw: raw[:-5], lambda raw: raw[:14] + b"{" + raw[15:]])
+def test_corrupt_index_is_rebuilt(tmp_path, damage):
+    """A truncated or garbled index file is rebuilt instead of crashing."""
+    (tmp_path / "case.md").write_text(SAMPLE, encoding="utf-8")
+    index_path = tmp_path / "sections.idx"
+    sections = Corpus(tmp_path, index_path).sections
+    index_path.write_bytes(damage(index_path.read_bytes()))
+    assert Corpus(tmp_path, index_path).sections == sections
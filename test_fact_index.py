@@ -0,0 +1,73 @@
+"""Tests for the case fact index."""
+
+import datetime as dt
+from pathlib import Path
+
+from fact_index import FactIndex, dates_in, parse_markdown, subjects_in
+
+CASE = (Path(__file__).parent / "case_data" / "japan_carry_trade.md").read_text(encoding="utf-8")
+EVENTS = [
+    ("Jul 2024", "USD/JPY hits 161. Yen is basically on sale."),
+    ("Aug 5, 2024", "VIX spikes to 66. That's not a number, that's a cry for help."),
+]
+
+
+def test_subjects_and_dates_are_normalized():
+    assert subjects_in("Where did dollar-yen and the S&P 500 go?") == {"USD/JPY", "SPX"}
+    assert subjects_in("What is the yen carry trade?") == set()  # the yen alone is the whole case
+    assert subjects_in("Did pesos move?") == set()  # whole words only
+    assert dates_in("on Aug. 5 and August 9") == [dt.date(2024, 8, 5), dt.date(2024, 8, 9)]
+
+
+def test_parse_tables_and_labelled_bullets():
+    """Table rows keep their own date; bullets inherit the heading's date."""
+    facts = parse_markdown(CASE)
+    vix = next(f for f in facts if f.label == "VIX")
+    assert vix.date == dt.date(2024, 8, 5)
+    assert 60 in vix.values
+    assert vix.primary
+    hike = next(f for f in facts if f.date == dt.date(2024, 7, 31))
+    assert "BOJ" in hike.subjects
+    assert 0.25 in hike.values
+    assert not any(set(f.text) <= set("-|: ") for f in facts)  # no separator rows
+    spx = next(f for f in facts if f.date == dt.date(2024, 8, 9))
+    assert spx.dated and spx.values == ()  # "S&P 500" and "August 9" are not measures
+
+
+def test_lookup_answers_from_the_case():
+    index = FactIndex.from_sources(CASE, EVENTS)
+    found = index.answer("What did VIX hit on Aug 5?")
+    assert found.subject == "VIX"
+    assert found.facts == (next(f for f in index.facts if "66" in f.text),)  # the fact dated Aug 5 itself
+    assert "4,451" in index.answer("How much did the Nikkei fall?").text  # the Nikkei's own bullet
+    assert "0.25%" in index.answer("Where did the BOJ take rates on Jul 31?").text
+
+
+def test_analysis_and_ambiguous_questions_go_to_the_llm():
+    index = FactIndex.from_sources(CASE, EVENTS)
+    assert index.answer("Why did the yen rally on Aug 5?") is None
+    assert index.answer("What did VIX and the Nikkei do?") is None  # two subjects
+    assert index.answer("Tell me about the peso") is None  # no lookup cue
+    assert index.answer("What did Bitcoin hit?") is None  # nothing indexed
+    assert index.answer("What did VIX hit on March 1?") is None  # no fact that day
+    # Definitions, other periods and "now" questions are not lookups of a case value
+    for question in [
+        "What is the yen carry trade?",
+        "How much money was in the yen carry trade?",
+        "What is the VIX?",
+        "How high did the VIX get during the COVID crash in 2020?",
+        "What was the Nikkei's biggest drop before 2024?",
+        "What's the policy rate now?",
+        "What's the VIX level today?",
+        # No fact states a USD/JPY level dated Aug 5 (the 161 → 142 bullet only sits under that heading)
+        "USD/JPY on Aug 5?",
+        # No S&P 500 or peso fact of its own carries a number (the correlation line is about both)
+        "How much did the S&P 500 fall?",
+        "How far did the peso drop?",
+        # Analysis and timing questions
+        "How did the VIX spike affect carry traders?",
+        "When did the VIX peak?",
+        "What happened to the peso on Aug 5?",
+    ]:
+        assert index.answer(question) is None, question
+    assert (index.stats.answered, index.stats.passed) == (0, 18)
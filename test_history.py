@@ -0,0 +1,78 @@
+"""Tests for token-budgeted history compaction."""
+
+from history import (
+    HistoryState,
+    compact_history,
+    estimate_tokens,
+    message_tokens,
+    trim_history,
+)
+
+
+def make_chat(turns: int, words: int = 20) -> list[dict]:
+    messages = [{"role": "assistant", "content": "Welcome! Ask me anything."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}? " + "yen " * words})
+        messages.append({"role": "assistant", "content": f"Answer {i}. " + "carry " * words})
+    return messages
+
+
+def test_message_tokens_memoized():
+    """Token counts are computed once and stored on the message."""
+    msg = {"role": "user", "content": "x" * 40}
+    assert message_tokens(msg) == estimate_tokens("x" * 40) + 4
+    msg["content"] = "changed"
+    assert message_tokens(msg) == msg["tokens"] == 14
+
+
+def test_short_chat_sent_verbatim():
+    """Under budget with few turns, nothing is summarized."""
+    messages = make_chat(2)
+    out = compact_history(messages, HistoryState(), budget_tokens=10_000)
+    assert out == messages
+
+
+def test_older_turns_folded_into_summary():
+    """Only the last N user turns stay verbatim; the rest become a summary."""
+    messages = make_chat(6)
+    state = HistoryState()
+    out = compact_history(messages, state, budget_tokens=10_000, keep_turns=2)
+    assert out[0]["role"] == "system"
+    assert "Student asked: Question 0?" in out[0]["content"]
+    assert out[1:] == messages[-4:]
+
+
+def test_budget_respected_and_latest_kept():
+    """A tight budget trims verbatim turns but never drops the latest message."""
+    messages = make_chat(5, words=100)
+    out = compact_history(messages, HistoryState(), budget_tokens=700, keep_turns=4)
+    assert out[-1] is messages[-1]
+    assert sum(estimate_tokens(m["content"]) + 4 for m in out) <= 700
+
+    huge = make_chat(1, words=1000)
+    assert compact_history(huge, HistoryState(), budget_tokens=100) == [huge[-1]]
+
+
+def test_rolling_summary_is_incremental():
+    """Messages are folded once; later calls only append new lines."""
+    messages = make_chat(4)
+    state = HistoryState()
+    compact_history(messages, state, budget_tokens=10_000, keep_turns=2)
+    folded, lines = state.folded, list(state.lines)
+    messages += make_chat(1)[1:]
+    compact_history(messages, state, budget_tokens=10_000, keep_turns=2)
+    assert state.lines[: len(lines)] == lines
+    assert state.folded == folded + 2
+
+
+def test_trim_keeps_the_summary_whole():
+    """Trimming the in-memory window summarizes what it drops exactly once."""
+    messages, trimmed = make_chat(6), make_chat(6)
+    full, state = HistoryState(), HistoryState()
+    compact_history(messages, full, budget_tokens=10_000, keep_turns=2)
+    compact_history(trimmed, state, budget_tokens=10_000, keep_turns=2)
+    assert trim_history(trimmed, state, keep=4) == len(messages) - 4
+    assert trimmed == messages[-4:]
+    assert state.folded == 0
+    assert compact_history(trimmed, state, 10_000, keep_turns=2) == compact_history(messages, full, 10_000, 2)
+    assert trim_history(trimmed, state, keep=10) == 0
@@ -0,0 +1,75 @@
+"""Tests for non-blocking Lottie loading."""
+
+import json
+import threading
+import time
+
+import requests
+
+from app import LOTTIE_VENDORED
+from lottie_assets import LottieStore
+
+URL = "https://example.invalid/anim.json"
+
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        return {"nm": "remote"}
+
+
+def test_vendored_assets_are_valid_lottie():
+    """Bundled fallbacks must be loadable Lottie documents."""
+    for path in LOTTIE_VENDORED.values():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert {"v", "fr", "w", "h", "layers"} <= data.keys()
+
+
+def test_get_never_waits_for_the_network(tmp_path, monkeypatch):
+    """A hanging download must not delay get(); the vendored copy is served."""
+    release = threading.Event()
+
+    def slow_get(url, timeout):
+        release.wait(5)
+        raise requests.ConnectionError("air-gapped")
+
+    monkeypatch.setattr(requests, "get", slow_get)
+    vendored = tmp_path / "local.json"
+    vendored.write_text('{"nm": "local"}', encoding="utf-8")
+    store = LottieStore(tmp_path / "cache", {URL: vendored})
+
+    started = time.perf_counter()
+    assert store.get(URL) == {"nm": "local"}
+    assert time.perf_counter() - started < 0.5
+    release.set()
+
+
+def test_download_lands_in_disk_cache_across_restarts(tmp_path, monkeypatch):
+    """A background download is persisted and preferred by a new process."""
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse())
+    store = LottieStore(tmp_path / "cache")
+    store.refresh(URL).result(timeout=5)
+    assert store.cache_path(URL).exists()
+
+    def offline(url, timeout):
+        raise requests.Timeout()
+
+    monkeypatch.setattr(requests, "get", offline)
+    assert LottieStore(tmp_path / "cache").get(URL) == {"nm": "remote"}
+
+
+def test_failed_download_is_not_retried_every_call(tmp_path, monkeypatch):
+    """Offline hosts get one attempt per retry interval."""
+    calls = []
+
+    def offline(url, timeout):
+        calls.append(url)
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests, "get", offline)
+    store = LottieStore(tmp_path / "cache", retry_interval=60)
+    store.refresh(URL).result(timeout=5)
+    for _ in range(5):
+        assert store.get(URL) is None
+    assert len(calls) == 1
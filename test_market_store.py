@@ -0,0 +1,54 @@
+"""Tests for the memory-mapped columnar market store."""
+
+import numpy as np
+import pytest
+
+from market_fixtures import FIXTURE_DIR, build
+from market_store import MarketStore, from_minutes, to_minutes, write_frame
+
+
+@pytest.fixture
+def store(tmp_path):
+    minutes = np.arange(to_minutes("2024-08-05"), to_minutes("2024-08-05T00:10"))
+    write_frame(tmp_path, "1m", minutes, {"USDJPY": np.arange(10.0)}, {"units": "last"})
+    return MarketStore(tmp_path)
+
+
+def test_range_is_half_open_and_zero_copy(store):
+    frame = store.range("1m", "2024-08-05T00:02", "2024-08-05T00:05")
+    assert frame["USDJPY"].tolist() == [2.0, 3.0, 4.0]
+    assert np.shares_memory(frame["USDJPY"], store.frame("1m")["USDJPY"])
+    assert isinstance(store.frame("1m")["USDJPY"], np.memmap)
+    assert str(frame.times()[0]) == "2024-08-05T00:02"
+
+
+def test_open_bounds_and_asof(store):
+    assert len(store.range("1m")) == 10
+    assert len(store.range("1m", end="2024-08-05T00:03")) == 3
+    assert store.asof("1m", "USDJPY", "2024-08-05T01:00") == 9.0
+    with pytest.raises(KeyError):
+        store.asof("1m", "USDJPY", "2024-08-04")
+
+
+def test_write_frame_validates(tmp_path):
+    with pytest.raises(ValueError):
+        write_frame(tmp_path, "1m", np.array([2, 1]), {"X": np.zeros(2)})
+    with pytest.raises(ValueError):
+        write_frame(tmp_path, "1m", np.array([1, 2]), {"X": np.zeros(3)})
+
+
+def test_minutes_round_trip():
+    assert str(from_minutes([to_minutes("2024-08-05T13:35")])[0]) == "2024-08-05T13:35"
+
+
+def test_bundled_fixture_is_current(tmp_path):
+    """The committed fixture is exactly what market_fixtures.py builds."""
+    build(tmp_path)
+    bundled, rebuilt = MarketStore(FIXTURE_DIR), MarketStore(tmp_path)
+    assert bundled.frequencies() == rebuilt.frequencies() == ["1d", "1m"]
+    for frequency in bundled.frequencies():
+        assert bundled.meta(frequency) == rebuilt.meta(frequency)
+        a, b = bundled.frame(frequency), rebuilt.frame(frequency)
+        assert np.array_equal(a.minutes, b.minutes)
+        for symbol in a.columns:
+            assert np.array_equal(a[symbol], b[symbol])
@@ -0,0 +1,48 @@
+"""Tests for the pooled OpenAI client."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from openai_pool import PoolStats, make_client
+
+
+class ModelsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = json.dumps({"object": "list", "data": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ModelsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+
+
+def test_sequential_requests_reuse_one_connection(server_url):
+    """Keep-alive means one TCP connect for many requests."""
+    stats = PoolStats()
+    client = make_client("sk-test", stats, base_url=server_url, http2=False)
+    for _ in range(5):
+        client.models.list()
+    assert stats.requests == 5
+    assert stats.connections == 1
+    assert stats.reuse_rate == pytest.approx(0.8)
+
+
+def test_reuse_rate_empty():
+    """No traffic yet means no reuse to report."""
+    assert PoolStats().reuse_rate == 0.0
@@ -0,0 +1,111 @@
+"""Tests for the batched Gaussian HMM regime model."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from regime import (
+    HMM,
+    chunk_series,
+    demo_regime_returns,
+    e_step,
+    fit_hmm,
+    fit_series,
+    rolling_switch_probability,
+    smoothed,
+    transition_breakpoint,
+)
+
+
+def toy_hmm() -> HMM:
+    return HMM(
+        start=np.array([[0.6, 0.4]]),
+        trans=np.array([[[0.9, 0.1], [0.3, 0.7]]]),
+        mean=np.array([[0.0, 0.5]]),
+        std=np.array([[1.0, 2.0]]),
+    )
+
+
+def sample(hmm: HMM, n: int, rng) -> np.ndarray:
+    state, out = 0, np.empty(n)
+    for t in range(n):
+        out[t] = hmm.mean[0, state] + hmm.std[0, state] * rng.standard_normal()
+        state = int(rng.random() < hmm.trans[0, state, 1])
+    return out
+
+
+def test_e_step_matches_brute_force():
+    """Likelihood and posteriors agree with summing over every state path."""
+    hmm = toy_hmm()
+    obs = np.random.default_rng(0).standard_normal((1, 5))
+    gamma, transitions, loglik = e_step(obs, hmm)
+
+    density = np.exp(-0.5 * ((obs[0][:, None] - hmm.mean[0]) / hmm.std[0]) ** 2) / (
+        hmm.std[0] * np.sqrt(2 * np.pi)
+    )
+    total, expected_gamma, expected_xi = 0.0, np.zeros((5, 2)), np.zeros((2, 2))
+    for path in itertools.product(range(2), repeat=5):
+        p = hmm.start[0, path[0]] * density[0, path[0]]
+        for t in range(1, 5):
+            p *= hmm.trans[0, path[t - 1], path[t]] * density[t, path[t]]
+        total += p
+        for t in range(5):
+            expected_gamma[t, path[t]] += p
+        for t in range(4):
+            expected_xi[path[t], path[t + 1]] += p
+    assert loglik[0] == pytest.approx(np.log(total))
+    assert np.allclose(gamma[:, :, 0], expected_gamma / total)
+    assert np.allclose(transitions[0], expected_xi / total)
+
+
+def test_batched_fit_recovers_each_row():
+    """Independent rows (e.g. two assets) each get their own parameters."""
+    rng = np.random.default_rng(4)
+    truth = toy_hmm()
+    obs = np.stack([sample(truth, 2_500, rng), 3 * sample(truth, 2_500, rng)])
+    fitted = fit_hmm(obs, iters=15)
+    assert fitted.std[:, 1] / fitted.std[:, 0] == pytest.approx([2.0, 2.0], rel=0.2)
+    assert fitted.std[1, 0] == pytest.approx(3 * fitted.std[0, 0], rel=0.15)
+    assert fitted.trans[:, 0, 1] == pytest.approx([0.1, 0.1], abs=0.04)
+
+
+def test_tied_chunks_match_the_whole_series():
+    rng = np.random.default_rng(9)
+    series = sample(toy_hmm(), 3_000, rng)
+    whole = fit_hmm(series, iters=15)
+    chunked = fit_series(series, chunk=250)
+    assert chunked.trans[0] == pytest.approx(whole.trans[0], abs=0.02)
+    assert chunked.std[0] == pytest.approx(whole.std[0], rel=0.02)
+
+
+def test_breakpoint_finds_the_july_switch():
+    """The demo's hold → hike probability jumps from 0.5% to 15% at ``change``."""
+    returns, change = demo_regime_returns()
+    model = fit_series(returns)
+    shift = transition_breakpoint(returns, model)
+    assert abs(shift.index - change) <= 5
+    assert shift.before < 0.01
+    assert shift.after > 0.1
+    assert shift.llr > 0
+
+
+def test_smoothed_probabilities_are_distributions():
+    returns, _ = demo_regime_returns(years=1, after_days=50)
+    probabilities = smoothed(returns, fit_series(returns))
+    assert probabilities.shape == (1, len(returns), 2)
+    assert np.allclose(probabilities.sum(axis=2), 1.0)
+
+
+def test_rolling_windows_fit_in_one_batch():
+    returns, _ = demo_regime_returns(years=2, after_days=100)
+    result = rolling_switch_probability(returns, window=252, step=63, iters=5)
+    assert len(result["end"]) == len(result["p_switch"]) == (len(returns) - 252) // 63 + 1
+    assert np.all((result["p_switch"] >= 0) & (result["p_switch"] <= 1))
+
+
+def test_chunk_series_keeps_the_latest_points():
+    rows = chunk_series(np.arange(10.0), 4)
+    assert rows.tolist() == [[2, 3, 4, 5], [6, 7, 8, 9]]
+    with pytest.raises(ValueError):
+        chunk_series(np.arange(3.0), 4)
@@ -0,0 +1,77 @@
+"""Tests for the accelerated Aug 5 replay tape and clock."""
+
+import pytest
+
+from market_fixtures import FIXTURE_DIR
+from market_store import MarketStore, to_minutes
+from replay import ReplayClock, ReplayTape, Trigger, clock_for
+
+TRIGGERS = [
+    Trigger("USDJPY", "below", 150.0),
+    Trigger("SPX", "below", 5400.0),
+    Trigger("BTC", "below", 60000.0),
+    Trigger("VIX", "above", 30.0),
+]
+
+
+@pytest.fixture(scope="module")
+def tape():
+    return ReplayTape(MarketStore(FIXTURE_DIR), "2024-07-31", "2024-08-06", TRIGGERS, ["BOJ_RATE"])
+
+
+def test_clock_maps_wall_time_at_speed():
+    clock = ReplayClock(0, 10_000, speed=60)
+    clock.play(now=100.0)
+    assert clock.position(now=160.0) == pytest.approx(60)  # 60 s at 60x = 60 minutes
+    clock.set_speed(600, now=160.0)
+    assert clock.position(now=166.0) == pytest.approx(120)
+    clock.pause(now=166.0)
+    assert clock.position(now=999.0) == pytest.approx(120)
+    clock.play(now=1000.0)
+    assert clock.position(now=1001.0) == pytest.approx(130)
+
+
+def test_clock_stops_at_end_and_replays_from_start():
+    clock = ReplayClock(0, 100, speed=1000)
+    clock.play(now=0.0)
+    assert clock.position(now=3600.0) == 100
+    clock.pause(now=3600.0)
+    clock.play(now=4000.0)
+    assert clock.position(now=4000.0) == 0
+    clock.reset()
+    assert not clock.playing
+    assert clock.position() == 0
+
+
+def test_frame_matches_the_case_at_the_close(tape):
+    frame = tape.frame_at(to_minutes("2024-08-05T20:00"))
+    assert frame.day_change("TOPIX") == pytest.approx(-0.1223, abs=5e-4)
+    assert frame.high["VIX"] == pytest.approx(65.73, abs=0.01)
+    assert frame.high["USDJPY"] >= 150.0
+    assert frame.low["USDJPY"] == pytest.approx(141.7, abs=0.01)
+    assert frame.last["BOJ_RATE"] == 0.25
+    assert all(frame.steps_lit)
+
+
+def test_contagion_triggers_fire_in_order(tape):
+    rows = tape.trigger_rows
+    assert rows == sorted(rows)
+    assert rows[-1] < len(tape.minutes)
+    assert not any(tape.frame_at(tape.start).steps_lit)
+
+
+def test_running_extremes_never_see_the_future(tape):
+    before = tape.frame_at(to_minutes("2024-08-05T13:00"))
+    assert before.high["VIX"] < 30
+    assert before.steps_lit[-1] is False
+
+
+def test_frames_are_memoized_by_row(tape):
+    minute = to_minutes("2024-08-02T12:00")
+    assert tape.frame_at(minute) is tape.frame_at(minute + 0.5)
+    assert clock_for(tape).start == tape.start
+
+
+def test_empty_range_raises():
+    with pytest.raises(ValueError):
+        ReplayTape(MarketStore(FIXTURE_DIR), "2030-01-01", "2030-01-02", TRIGGERS)
@@ -0,0 +1,33 @@
+"""Tests for section-level BM25 retrieval."""
+
+from app import CASE_DATA_DIR
+from corpus import Corpus
+from retrieval import load_or_build_index, render_sections
+
+
+def test_search_finds_relevant_case_section(tmp_path):
+    """The formula question should surface the Formula section first."""
+    corpus = Corpus(CASE_DATA_DIR, tmp_path / "sections.idx")
+    index = load_or_build_index(corpus, tmp_path / "bm25.json")
+    hits = index.search("What is the transfer entropy formula?", k=3)
+    assert corpus.sections[hits[0][1]].title.endswith("Formula")
+    assert "TE(X → Y)" in render_sections(corpus, hits[:1])
+
+
+def test_index_persisted_and_rebuilt_on_change(tmp_path):
+    """A fresh load reuses the JSON index until the corpus changes."""
+    cases = tmp_path / "cases"
+    cases.mkdir()
+    case = cases / "case.md"
+    case.write_text("## Key Data\nVIX spiked above 60.\n", encoding="utf-8")
+    cache = tmp_path / "bm25.json"
+    load_or_build_index(Corpus(cases, tmp_path / "s.idx"), cache)
+    saved = cache.stat().st_mtime_ns
+
+    assert load_or_build_index(Corpus(cases, tmp_path / "s.idx"), cache).search("vix")
+    assert cache.stat().st_mtime_ns == saved
+
+    (cases / "markov.md").write_text("## Markov\nTransition matrix changed.\n", encoding="utf-8")
+    corpus = Corpus(cases, tmp_path / "s.idx")
+    (_, top), *_ = load_or_build_index(corpus, cache).search("transition matrix")
+    assert corpus.sections[top].title == "Markov"
@@ -0,0 +1,67 @@
+"""Tests for the O(1) rolling correlation and TE trackers."""
+
+import math
+
+import numpy as np
+import pytest
+
+from rolling import RollingCorrelation, RollingTE, demo_unwind_returns, rolling_series
+from transfer_entropy import joint_counts, te_from_counts
+
+
+@pytest.mark.parametrize(("k", "l", "lag"), [(1, 1, 1), (2, 1, 3), (2, 2, 2)])
+def test_rolling_te_matches_recount(k, l, lag):
+    """Add/remove updates give the same TE as recounting the window."""
+    rng = np.random.default_rng(1)
+    x = rng.integers(0, 3, 2000)
+    y = np.where(rng.random(2000) < 0.5, np.roll(x, 1), rng.integers(0, 3, 2000))
+    window = 300
+    tracker = RollingTE(window, 3, k, l, lag)
+    for t in range(len(x)):
+        value = tracker.update(int(x[t]), int(y[t]))
+        if t in (400, 1999):
+            span = window + tracker.first + 1
+            table = joint_counts(x[t + 1 - span : t + 1], y[t + 1 - span : t + 1], 3, k, l, lag)
+            assert value == pytest.approx(te_from_counts(table), abs=1e-9)
+
+
+def test_rolling_te_warms_up():
+    tracker = RollingTE(10, 3, k=2)
+    assert math.isnan(tracker.update(0, 0))
+    assert math.isnan(tracker.update(1, 1))
+    assert not math.isnan(tracker.update(2, 2))
+
+
+def test_rolling_correlation_matches_numpy():
+    rng = np.random.default_rng(2)
+    a = rng.standard_normal(3000)
+    b = a + rng.standard_normal(3000)
+    tracker = RollingCorrelation(250)
+    for t in range(len(a)):
+        value = tracker.update(a[t], b[t])
+    assert value == pytest.approx(np.corrcoef(a[-250:], b[-250:])[0, 1])
+
+
+def test_rolling_correlation_constant_input_is_nan():
+    tracker = RollingCorrelation(5)
+    for _ in range(5):
+        value = tracker.update(1.0, 2.0)
+    assert math.isnan(value)
+
+
+def test_demo_unwind_shows_compression():
+    """Correlation compresses from ~0.4 to ~0.9 and JPY→SPX TE switches on."""
+    series = demo_unwind_returns()
+    corr = rolling_series(series["SPX"], series["MXN"], 500, step=500)["correlation"]
+    te = rolling_series(series["JPY"], series["SPX"], 500, step=500)
+    assert corr[3] < 0.55
+    assert corr[-1] > 0.8
+    assert te["te"][3] < 0.05
+    assert te["te"][-1] > 0.2
+    assert te["te_reverse"][-1] < 0.05
+
+
+@pytest.mark.parametrize("window", [0, 1])
+def test_invalid_window_raises(window):
+    with pytest.raises(ValueError):
+        RollingCorrelation(window)
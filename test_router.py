@@ -0,0 +1,43 @@
+"""Tests for the local model router."""
+
+import time
+
+from router import TIERS, ModelRouter, choose_model, prompt_features
+
+
+def test_simple_lookups_go_to_the_cheapest_model():
+    router = ModelRouter()
+    assert router.route("What did VIX hit?").model == "gpt-4o-mini"
+    assert router.route("What's the carry trade?").model == TIERS[0][1]
+
+
+def test_analysis_escalates():
+    router = ModelRouter()
+    assert router.route("Why did the yen rally so fast after the BOJ hike?").model == "gpt-4.1-mini"
+    heavy = router.route(
+        "Compute TE(JPY→SPX) with 3 bins and explain whether it's significant vs the surrogates. "
+        "How does that fit the DRIVER framework?"
+    )
+    assert heavy.model == "gpt-4.1"
+    assert heavy.features["heavy"] > 0 and heavy.features["formula"] > 0
+    assert router.counts == {"gpt-4.1-mini": 1, "gpt-4.1": 1}
+
+
+def test_deep_conversations_score_higher():
+    assert prompt_features("and the peso?", history_turns=8)["history"] > prompt_features("and the peso?")["history"]
+
+
+def test_tiers_are_ordered_and_cover_every_score():
+    ceilings = [ceiling for ceiling, _ in TIERS]
+    assert ceilings == sorted(ceilings)
+    assert choose_model(0.0) == TIERS[0][1]
+    assert choose_model(1e9) == TIERS[-1][1]
+
+
+def test_routing_is_well_under_a_millisecond():
+    router = ModelRouter()
+    prompt = "Walk me through the contagion chain and how transfer entropy reveals its direction?" * 3
+    started = time.perf_counter()
+    for _ in range(1_000):
+        router.route(prompt, history_turns=5)
+    assert (time.perf_counter() - started) / 1_000 < 0.001
@@ -0,0 +1,122 @@
+"""Tests for the RPM/TPM admission scheduler."""
+
+import threading
+
+import pytest
+
+from scheduler import (
+    AdmissionScheduler,
+    RateLimits,
+    TokenBucket,
+    estimate_request_tokens,
+    merge_limits,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_refills_continuously_up_to_capacity():
+    bucket = TokenBucket(60, now=0.0)
+    bucket.level = 0
+    bucket.refill(now=30.0)
+    assert bucket.level == 30
+    assert bucket.wait_time(40) == pytest.approx(10.0)
+    bucket.refill(now=1_000.0)
+    assert bucket.level == 60
+
+
+def test_estimate_counts_prompt_and_expected_answer():
+    messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "Aug 5?"}]
+    assert estimate_request_tokens(messages, completion=0) == 100 + 4 + 2 + 4
+    assert estimate_request_tokens(messages) > estimate_request_tokens(messages, completion=0)
+
+
+def test_tpm_bucket_queues_excess_and_refills():
+    clock = FakeClock()
+    scheduler = AdmissionScheduler({"gpt-4.1": RateLimits(rpm=100, tpm=6_000)}, clock=clock)
+    first = scheduler.submit("gpt-4.1", "a", 4_000)
+    second = scheduler.submit("gpt-4.1", "b", 4_000)
+    assert first.granted.is_set() and not second.granted.is_set()
+    assert scheduler.position(second) == 1
+    assert scheduler.eta(second) == pytest.approx(20.0)  # 2,000 short at 100 tokens/s
+    clock.now = 20.0
+    assert scheduler.wait(second, timeout=0.1)
+
+
+def test_rpm_bucket_limits_request_count():
+    scheduler = AdmissionScheduler({"gpt-4o-mini": RateLimits(rpm=2, tpm=1_000_000)}, clock=FakeClock())
+    tickets = [scheduler.submit("gpt-4o-mini", f"s{i}", 10) for i in range(3)]
+    assert [t.granted.is_set() for t in tickets] == [True, True, False]
+
+
+def test_sessions_are_served_round_robin():
+    """A session with a backlog does not get ahead of one that just arrived."""
+    clock = FakeClock()
+    scheduler = AdmissionScheduler({"gpt-4.1": RateLimits(rpm=60, tpm=1_000_000)}, clock=clock)
+    for _ in range(60):
+        scheduler.submit("gpt-4.1", "warmup", 1)  # drain the request bucket
+    greedy = [scheduler.submit("gpt-4.1", "greedy", 1) for _ in range(3)]
+    polite = scheduler.submit("gpt-4.1", "polite", 1)
+    assert [scheduler.position(t) for t in greedy + [polite]] == [1, 3, 4, 2]
+    served = []
+    for _ in range(4):
+        clock.now += 1.0  # one request per second
+        scheduler.wait(greedy[-1], timeout=0)  # any waiter dispatches for everyone
+        served += [t for t in greedy + [polite] if t.granted.is_set() and t not in served]
+    assert served == [greedy[0], polite, greedy[1], greedy[2]]
+
+
+def test_settle_refunds_overestimates():
+    clock = FakeClock()
+    scheduler = AdmissionScheduler({"gpt-4.1": RateLimits(rpm=100, tpm=5_000)}, clock=clock)
+    ticket = scheduler.submit("gpt-4.1", "a", 4_000)
+    waiting = scheduler.submit("gpt-4.1", "b", 4_000)
+    scheduler.settle(ticket, 1_000)
+    assert waiting.granted.is_set()
+
+
+def test_settle_moves_the_charge_to_the_fallback_model():
+    """An answer from the fallback model is billed to that model's lane."""
+    clock = FakeClock()
+    scheduler = AdmissionScheduler(
+        {"gpt-4.1": RateLimits(rpm=100, tpm=5_000), "gpt-4o-mini": RateLimits(rpm=100, tpm=5_000)}, clock=clock
+    )
+    ticket = scheduler.submit("gpt-4.1", "a", 4_000)
+    waiting = scheduler.submit("gpt-4.1", "b", 4_000)
+    scheduler.settle(ticket, 4_500, model="gpt-4o-mini")
+    assert waiting.granted.is_set()  # gpt-4.1 got its estimate back
+    assert ticket.model == "gpt-4o-mini" and ticket.charged == 4_500
+    assert not scheduler.submit("gpt-4o-mini", "c", 1_000).granted.is_set()
+
+
+def test_merge_limits_overrides_per_field():
+    defaults = {"gpt-4.1": RateLimits(rpm=500, tpm=30_000)}
+    limits = merge_limits(defaults, {"gpt-4.1": {"tpm": 800_000}, "o3": {"rpm": 50}})
+    assert limits["gpt-4.1"] == RateLimits(rpm=500, tpm=800_000)
+    assert limits["o3"].rpm == 50
+    assert merge_limits(defaults, None) == defaults
+
+
+def test_admit_blocks_until_quota_and_reports_position():
+    scheduler = AdmissionScheduler({"gpt-4.1": RateLimits(rpm=600, tpm=1_000_000)})
+    for _ in range(600):
+        scheduler.submit("gpt-4.1", "warmup", 1)
+    seen = []
+    admitted = threading.Event()
+
+    def one():
+        scheduler.admit("gpt-4.1", "late", 1, on_wait=lambda place, eta: seen.append(place), poll=0.02)
+        admitted.set()
+
+    thread = threading.Thread(target=one)
+    thread.start()
+    assert admitted.wait(2)  # 10 requests/s refill
+    thread.join()
+    assert seen and seen[0] == 1
+    assert scheduler.stats.queued == 1
@@ -0,0 +1,118 @@
+"""Tests for in-flight request coalescing."""
+
+import threading
+
+import pytest
+
+from singleflight import SingleFlight, flight_key
+from streaming import StreamReport
+
+MESSAGES = [{"role": "user", "content": "Walk me through the contagion chain"}]
+
+
+def gated_stream(gate: threading.Event, calls: list):
+    """Upstream that emits one chunk, waits for ``gate``, then finishes."""
+
+    def produce(report: StreamReport):
+        calls.append(report)
+        report.usage["completion_tokens"] = 3
+        yield "JPY → "
+        gate.wait(5)
+        yield "SPX → "
+        yield "MXN"
+
+    return produce
+
+
+def test_flight_key_ignores_temperature_noise():
+    assert flight_key("gpt-4.1", 0.3, MESSAGES) == flight_key("gpt-4.1", 0.30000001, MESSAGES)
+    assert flight_key("gpt-4.1", 0.3, MESSAGES) != flight_key("gpt-4o-mini", 0.3, MESSAGES)
+
+
+def test_identical_requests_share_one_upstream_stream():
+    """A late joiner replays what it missed, then both see the whole answer."""
+    gate, calls = threading.Event(), []
+    coalescer = SingleFlight()
+    key = flight_key("gpt-4.1", 0.3, MESSAGES)
+    first = coalescer.join(key, gated_stream(gate, calls), StreamReport("gpt-4.1"))
+    leader = first.subscribe(timeout=5)
+    assert next(leader) == "JPY → "
+    second = coalescer.join(key, gated_stream(gate, calls), StreamReport("gpt-4.1"))
+    assert second is first
+    gate.set()
+    assert "".join(second.subscribe(timeout=5)) == "JPY → SPX → MXN"
+    assert "".join(leader) == "SPX → MXN"
+    assert len(calls) == 1
+    assert second.report.usage == {"completion_tokens": 3}
+    assert (coalescer.stats.upstream, coalescer.stats.joined) == (1, 1)
+    assert coalescer.in_flight() == 0  # a finished flight frees its key
+
+
+def test_upstream_error_reaches_every_subscriber():
+    def failing(report):
+        yield "partial"
+        raise ConnectionError("upstream dropped")
+
+    coalescer = SingleFlight()
+    flight = coalescer.join("k", failing, StreamReport("gpt-4.1"))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            list(flight.subscribe(timeout=5))
+
+
+def test_stalled_upstream_times_out():
+    gate = threading.Event()
+    flight = SingleFlight().join("k", gated_stream(gate, []), StreamReport("gpt-4.1"))
+    chunks = flight.subscribe(timeout=0.05)
+    assert next(chunks) == "JPY → "
+    with pytest.raises(TimeoutError):
+        next(chunks)
+    gate.set()
+
+
+def test_only_the_creator_is_admitted_and_joiners_wait_for_it():
+    """Admission runs once, before the stream starts; joiners arriving meanwhile ride along."""
+    admitted, release, calls = threading.Event(), threading.Event(), []
+    coalescer = SingleFlight()
+
+    def admit():
+        admitted.set()
+        release.wait(5)  # still queued for quota
+        return "ticket"
+
+    flights = []
+    produce = gated_stream(threading.Event(), calls)
+    leader = threading.Thread(target=lambda: flights.append(coalescer.join("k", produce, StreamReport("a"), admit)))
+    leader.start()
+    admitted.wait(5)
+    joiner = coalescer.join("k", gated_stream(threading.Event(), calls), StreamReport("b"), admit=lambda: 1 / 0)
+    assert not calls  # nothing upstream before admission
+    release.set()
+    leader.join(5)
+    assert flights == [joiner]
+    assert joiner.admission == "ticket" and joiner.report.requested_model == "a"
+    assert next(joiner.subscribe(timeout=5)) == "JPY → "
+    assert len(calls) == 1
+
+
+def test_failed_admission_frees_the_key():
+    def refused():
+        raise TimeoutError("queue abandoned")
+
+    coalescer = SingleFlight()
+    with pytest.raises(TimeoutError):
+        coalescer.join("k", gated_stream(threading.Event(), []), StreamReport("a"), refused)
+    assert coalescer.in_flight() == 0
+
+
+def test_subscribers_count_active_readers():
+    gate = threading.Event()
+    flight = SingleFlight().join("k", gated_stream(gate, []), StreamReport("gpt-4.1"))
+    first, second = flight.subscribe(timeout=5), flight.subscribe(timeout=5)
+    next(first), next(second)
+    assert flight.subscribers == 2
+    second.close()  # the session went away
+    assert flight.subscribers == 1
+    gate.set()
+    list(first)
+    assert flight.subscribers == 0
@@ -0,0 +1,123 @@
+"""Tests for coalesced stream rendering."""
+
+import pytest
+
+from stream_render import RenderStats, StreamRenderer, block_boundary, coalesce
+
+
+class FakeBlock:
+    def __init__(self, log: list):
+        self.body, self.log = "", log
+
+    def markdown(self, body: str) -> None:
+        self.body = body
+        self.log.append(body)
+
+
+def renderer():
+    blocks, log = [], []
+
+    def new_block():
+        blocks.append(FakeBlock(log))
+        return blocks[-1]
+
+    return StreamRenderer(new_block), blocks, log
+
+
+def tokens(text: str) -> list[str]:
+    return [text[i : i + 3] for i in range(0, len(text), 3)]
+
+
+def ticker(step: float):
+    """A clock that advances ``step`` seconds per call."""
+    ticks = iter(range(10_000))
+    return lambda: next(ticks) * step
+
+
+def test_coalesce_flushes_on_sentence_time_and_size():
+    batches = list(coalesce(iter(["The yen ", "rallied", ". VIX ", "spiked"]), clock=ticker(0.01)))
+    assert batches == ["The yen rallied. VIX ", "spiked"]
+    assert list(coalesce(iter("abcdef"), interval=0.02, clock=ticker(0.011))) == ["ab", "cd", "ef"]
+    assert list(coalesce(iter(["x" * 300, "y" * 200]), max_chars=400, clock=lambda: 0.0)) == ["x" * 300 + "y" * 200]
+
+
+def test_coalesce_keeps_buffered_text_when_upstream_fails():
+    def failing():
+        yield "partial"
+        raise ConnectionError
+
+    chunks = coalesce(failing(), clock=lambda: 0.0)
+    assert next(chunks) == "partial"
+    with pytest.raises(ConnectionError):
+        next(chunks)
+
+
+def test_block_boundary_skips_code_fences():
+    assert block_boundary("One.\n\nTwo") == len("One.\n\n")
+    assert block_boundary("```\nx = 1\n\ny = 2") == 0
+    assert block_boundary("```\nx\n```\n\nAfter") == len("```\nx\n```\n\n")
+
+
+def test_block_boundary_keeps_lists_and_indented_blocks_together():
+    assert block_boundary("- a\n\n- b") == 0  # loose list
+    assert block_boundary("1. a\n\n2) b") == 0
+    assert block_boundary("- a\n\n\n  more on a") == 0  # continuation paragraph
+    assert block_boundary("One.\n\n") == 0  # nothing after the break yet
+    assert block_boundary("One.\n\n1") == 0  # may still become "12. "
+    assert block_boundary("One.\n\n2024 was wild") == len("One.\n\n")
+    assert block_boundary("- a\n\n**Bold** paragraph") == len("- a\n\n")
+    assert block_boundary("Intro.\n\n- a\n\n- b") == len("Intro.\n\n")  # a new list may start
+
+
+def test_finished_paragraphs_are_frozen_and_text_is_unchanged():
+    answer = "📊 Topix fell 12%.\n\n- VIX spiked above 60\n- USD/JPY went 161 → 142\n\n💀 JPY → SPX → MXN."
+    r, blocks, _ = renderer()
+    assert r.run(iter(tokens(answer)), clock=lambda: 0.0) == answer
+    assert [b.body for b in blocks] == answer.split("\n\n")
+
+
+def test_loose_lists_render_in_one_element():
+    answer = (
+        "Contagion:\n\n- JPY → SPX\n\n- SPX → MXN\n\n  (the peso lagged)\n\n"
+        "Then:\n\n1. Unwind\n\n2. Margin calls\n\nYikes."
+    )
+    r, blocks, _ = renderer()
+    assert r.run(iter(tokens(answer)), clock=lambda: 0.0) == answer
+    assert [b.body for b in blocks] == [
+        "Contagion:",
+        "- JPY → SPX\n\n- SPX → MXN\n\n  (the peso lagged)",
+        "Then:",
+        "1. Unwind\n\n2. Margin calls",
+        "Yikes.",
+    ]
+
+
+def test_reference_links_stay_with_their_definitions():
+    answer = "See [the case][1].\n\nVIX spiked above 60.\n\n[1]: https://example.com/case"
+    assert block_boundary(answer) == 0
+    assert block_boundary("Intro.\n\nSee [the case][1].\n\nMore") == len("Intro.\n\n")
+    r, blocks, _ = renderer()
+    assert r.run(iter(tokens(answer)), clock=lambda: 0.0) == answer
+    assert [b.body for b in blocks] == [answer]
+
+
+def test_html_blocks_are_not_split():
+    answer = "<details>\n<summary>Math</summary>\n\nTE = Σ p log p\n\n</details>\n\nDone."
+    assert block_boundary("<details>\n<summary>Math</summary>\n\nTE = Σ p log p") == 0
+    r, blocks, _ = renderer()
+    assert r.run(iter(tokens(answer)), clock=lambda: 0.0) == answer
+    assert [b.body for b in blocks] == [answer.removesuffix("\n\nDone."), "Done."]
+
+
+def test_rendering_work_is_much_smaller_than_per_delta_rerender():
+    paragraph = "The carry trade unwound as the yen rallied and margin calls hit. " * 4
+    answer = "\n\n".join([paragraph] * 6)
+    r, _, log = renderer()
+    r.run(iter(tokens(answer)), clock=ticker(0.005))  # 200 deltas/s
+    assert r.stats.deltas == len(tokens(answer))
+    assert r.stats.renders == len(log) < r.stats.deltas / 3
+    assert r.stats.saved > 0.9
+    total = RenderStats()
+    total.add(r.stats)
+    total.add(r.stats)
+    assert total.deltas == 2 * r.stats.deltas
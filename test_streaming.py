@@ -0,0 +1,121 @@
+"""Tests for the resilient streaming engine (against the local fake server)."""
+
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from fake_openai import FakeOpenAI
+from streaming import (
+    CONTINUE_PROMPT,
+    RetryPolicy,
+    StreamReport,
+    resilient_stream,
+    stream_text,
+)
+
+MESSAGES = [{"role": "system", "content": "case"}, {"role": "user", "content": "Aug 5?"}]
+
+
+@pytest.fixture
+def fake():
+    with FakeOpenAI() as server:
+        yield server
+
+
+def run(fake, model="gpt-4.1", **kwargs):
+    client = openai.OpenAI(api_key="sk-test", base_url=fake.base_url)
+    report = StreamReport(requested_model=model)
+    waits: list[float] = []
+    text = "".join(
+        resilient_stream(
+            client,
+            model=model,
+            messages=MESSAGES,
+            temperature=0.3,
+            report=report,
+            sleep=waits.append,
+            **kwargs,
+        )
+    )
+    return text, report, waits
+
+
+def test_stream_text_records_cached_tokens():
+    """Content deltas are yielded and the final usage chunk is captured."""
+
+    def chunk(content=None, usage=None):
+        choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+        return SimpleNamespace(choices=choices, usage=usage)
+
+    usage_chunk = SimpleNamespace(
+        prompt_tokens=7000,
+        completion_tokens=12,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=6912),
+    )
+    usage: dict = {}
+    text = "".join(stream_text([chunk("ugh, "), chunk("yikes"), chunk(usage=usage_chunk)], usage))
+    assert text == "ugh, yikes"
+    assert usage == {"prompt_tokens": 7000, "completion_tokens": 12, "cached_tokens": 6912}
+
+
+def test_plain_stream_passes_through(fake):
+    """No faults: one request, full reply, usage recorded."""
+    text, report, waits = run(fake)
+    assert text == fake.reply
+    assert report.attempts == 1 and not waits
+    assert report.usage["completion_tokens"] == len(fake.tokens())
+
+
+def test_rate_limit_downgrades_model(fake):
+    """A 429 on gpt-4.1 retries immediately on gpt-4o-mini."""
+    fake.script.append({"status": 429, "retry_after": 5})
+    text, report, waits = run(fake)
+    assert text == fake.reply
+    assert report.fell_back and report.model == "gpt-4o-mini"
+    assert [r["model"] for r in fake.requests] == ["gpt-4.1", "gpt-4o-mini"]
+    assert not waits
+
+
+def test_retry_after_is_honored(fake):
+    """Without a fallback, the server's Retry-After sets the wait."""
+    fake.script.append({"status": 429, "retry_after": 1.5})
+    text, _, waits = run(fake, model="gpt-4o-mini")
+    assert text == fake.reply
+    assert waits == [1.5]
+
+
+def test_retry_after_beyond_budget_gives_up(fake):
+    """A Retry-After longer than the wait budget is re-raised, not cut short."""
+    fake.script.append({"status": 429, "retry_after": 30})
+    with pytest.raises(openai.RateLimitError):
+        run(fake, model="gpt-4o-mini", policy=RetryPolicy(max_wait=10.0))
+    assert len(fake.requests) == 1
+
+
+def test_server_errors_back_off_then_give_up(fake):
+    """5xx is retried with bounded jittered backoff, then re-raised."""
+    fake.script.extend([{"status": 500}] * 3)
+    with pytest.raises(openai.InternalServerError):
+        run(fake, policy=RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=1.0))
+    assert len(fake.requests) == 3
+
+
+def test_dropped_stream_is_resumed(fake):
+    """A cut connection keeps the partial text and asks for the rest."""
+    fake.script.append({"drop_after": 3})
+    fake.reply = "one two three four five"
+    text, report, _ = run(fake)
+    assert text == "one two three one two three four five"  # fake replays its script reply
+    assert report.resumed == 1
+    resume = fake.requests[-1]["messages"]
+    assert resume[-2] == {"role": "assistant", "content": "one two three "}
+    assert resume[-1]["content"] == CONTINUE_PROMPT
+
+
+def test_backoff_bounds():
+    """Full jitter stays within [0, min(max_delay, base * 2^(n-1))]."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    for attempt in range(1, 6):
+        assert 0 <= policy.backoff(attempt) <= min(2.0, 0.5 * 2 ** (attempt - 1))
+    assert policy.backoff(1, retry_after=30) == 30  # the server hint is never shortened
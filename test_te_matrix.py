@@ -0,0 +1,64 @@
+"""Tests for the parallel TE matrix and its surrogate p-values."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from te_matrix import te_matrix
+from transfer_entropy import demo_contagion_returns, transfer_entropy
+
+CHAIN = ("JPY", "SPX", "BTC")
+
+
+@pytest.fixture(scope="module")
+def series():
+    return demo_contagion_returns(n=20_000, chain=CHAIN)
+
+
+def test_matrix_matches_pairwise_te(series):
+    """Each cell equals the single-pair estimator on the same data."""
+    result = te_matrix(series, surrogates=5, workers=1)
+    for i, source in enumerate(CHAIN):
+        for j, target in enumerate(CHAIN):
+            if i == j:
+                assert np.isnan(result.te[i, j])
+            else:
+                expected = transfer_entropy(series[source], series[target])
+                assert result.te[i, j] == pytest.approx(expected)
+
+
+def test_only_chain_links_are_significant(series):
+    result = te_matrix(series, surrogates=99, workers=1)
+    assert {(s, t) for s, t, _, _ in result.significant()} == {("JPY", "SPX"), ("SPX", "BTC")}
+    assert result.edge("JPY", "SPX")[1] == pytest.approx(0.01)
+    assert result.edge("SPX", "JPY")[1] > 0.05
+
+
+def test_process_pool_matches_in_process(series):
+    """Workers read the shared symbol matrix; results depend only on the seed."""
+    inline = te_matrix(series, surrogates=20, workers=1, seed=3)
+    pooled = te_matrix(series, surrogates=20, workers=2, seed=3)
+    assert np.array_equal(inline.te, pooled.te, equal_nan=True)
+    assert np.array_equal(inline.p_values, pooled.p_values, equal_nan=True)
+
+
+def test_in_process_runs_from_several_threads(series):
+    """Concurrent in-process calls (one per Streamlit session) don't share state."""
+    other = demo_contagion_returns(n=5_000, chain=("MXN", "VIX"), seed=7)
+    expected = [te_matrix(series, surrogates=10, workers=1), te_matrix(other, surrogates=10, workers=1)]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda s: te_matrix(s, surrogates=10, workers=1), [series, other] * 4))
+    for i, result in enumerate(results):
+        assert np.array_equal(result.te, expected[i % 2].te, equal_nan=True)
+
+
+@pytest.mark.parametrize("kwargs", [{"surrogates": 0}, {"lag": 0}])
+def test_invalid_arguments_raise(series, kwargs):
+    with pytest.raises(ValueError):
+        te_matrix(series, workers=1, **kwargs)
+
+
+def test_needs_two_series(series):
+    with pytest.raises(ValueError):
+        te_matrix({"JPY": series["JPY"]}, workers=1)
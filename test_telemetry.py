@@ -0,0 +1,99 @@
+"""Tests for latency/token telemetry."""
+
+import json
+import time
+
+from telemetry import Telemetry, percentile, timed_stream
+
+
+def test_percentile_nearest_rank():
+    """p50/p95 of 1..100 land on the expected ranks."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 50) == 0.0
+
+
+def test_record_writes_jsonl_and_summary(tmp_path):
+    """Samples are logged with labels and summarized per metric."""
+    telemetry = Telemetry(tmp_path / "t.jsonl")
+    for ms in (10, 20, 30):
+        telemetry.record("ttft_ms", ms, model="gpt-4.1")
+    with telemetry.span("prompt_build_ms"):
+        pass
+    telemetry.flush()
+    lines = [json.loads(line) for line in (tmp_path / "t.jsonl").read_text().splitlines()]
+    assert lines[0]["metric"] == "ttft_ms" and lines[0]["model"] == "gpt-4.1"
+    summary = telemetry.summary()
+    assert summary["ttft_ms"] == {"p50": 20, "p95": 30, "count": 3}
+    assert summary["prompt_build_ms"]["count"] == 1
+
+
+def test_jsonl_is_written_in_batches(tmp_path):
+    """Lines are buffered until a batch fills or the delay passes."""
+    path = tmp_path / "t.jsonl"
+    telemetry = Telemetry(path, batch_size=3, max_delay=60)
+    telemetry.record("x", 1)
+    telemetry.record("x", 2)
+    assert not path.exists()
+    telemetry.record("x", 3)
+    assert len(path.read_text().splitlines()) == 3
+
+    telemetry = Telemetry(tmp_path / "timed.jsonl", batch_size=100, max_delay=0.05)
+    telemetry.record("x", 1)
+    time.sleep(0.3)
+    assert len((tmp_path / "timed.jsonl").read_text().splitlines()) == 1
+
+
+def test_jsonl_rotates_past_max_bytes(tmp_path):
+    """A full log moves to ``.1`` and a fresh file starts."""
+    path = tmp_path / "t.jsonl"
+    telemetry = Telemetry(path, batch_size=1, max_bytes=200)
+    for v in range(10):
+        telemetry.record("ttft_ms", v)
+    assert path.stat().st_size <= 200
+    backup = tmp_path / "t.jsonl.1"
+    assert backup.exists() and backup.stat().st_size <= 200
+    assert json.loads(path.read_text().splitlines()[-1])["value"] == 9
+
+
+def test_window_is_bounded():
+    """Only the recent window feeds percentiles; counts keep growing."""
+    telemetry = Telemetry(window=10)
+    for v in range(100):
+        telemetry.record("x", v)
+    assert telemetry.summary()["x"]["p50"] >= 90
+    assert telemetry.summary()["x"]["count"] == 100
+
+
+def test_prometheus_text():
+    """Summaries render in the Prometheus exposition format."""
+    telemetry = Telemetry()
+    telemetry.record("ttft_ms", 12.5)
+    text = telemetry.prometheus_text()
+    assert "# TYPE carry_qa_ttft_ms summary" in text
+    assert 'carry_qa_ttft_ms{quantile="0.95"} 12.5' in text
+    assert "carry_qa_ttft_ms_count 1" in text
+
+
+def test_timed_stream_records_ttft_and_tokens():
+    """The wrapper is transparent and reads usage once the stream ends."""
+    telemetry = Telemetry()
+    usage: dict = {}
+
+    def deltas():
+        yield "ugh "
+        yield "yikes"
+        usage.update(prompt_tokens=100, completion_tokens=2)
+
+    assert "".join(timed_stream(deltas(), telemetry, usage)) == "ugh yikes"
+    summary = telemetry.summary()
+    assert summary["ttft_ms"]["count"] == 1
+    assert summary["total_tokens"]["p50"] == 102
+
+
+def test_timed_stream_without_usage_records_only_ttft():
+    """Followers of a shared stream pass no usage, so tokens are not counted twice."""
+    telemetry = Telemetry()
+    assert "".join(timed_stream(iter(["a", "b"]), telemetry, {}, coalesced=True)) == "ab"
+    assert set(telemetry.summary()) == {"ttft_ms"}
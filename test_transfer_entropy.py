@@ -0,0 +1,84 @@
+"""Tests for the vectorized transfer-entropy engine."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from transfer_entropy import (
+    demo_contagion_returns,
+    entropy,
+    joint_counts,
+    ordinal_symbols,
+    pairwise_te,
+    quantile_symbols,
+    te_from_counts,
+    transfer_entropy,
+)
+
+
+def test_joint_counts_match_brute_force():
+    """bincount on packed codes equals counting (Yf, Yp, Xp) tuples by hand."""
+    rng = np.random.default_rng(0)
+    src, dst = rng.integers(0, 3, 500), rng.integers(0, 3, 500)
+    k, l, lag = 2, 2, 2
+    table = joint_counts(src, dst, 3, k, l, lag)
+    expected = np.zeros_like(table)
+    for t in range(max(k - 1, l - 1 + lag - 1), 499):
+        y_past = sum(dst[t - i] * 3**i for i in range(k))
+        x_past = sum(src[t + 1 - lag - i] * 3**i for i in range(l))
+        expected[dst[t + 1], y_past, x_past] += 1
+    assert np.array_equal(table, expected)
+
+
+def test_te_is_directional():
+    """JPY leads SPX in the demo data, so TE(JPY→SPX) ≫ TE(SPX→JPY)."""
+    series = demo_contagion_returns(n=50_000)
+    (jpy_spx,) = pairwise_te(series, [("JPY", "SPX")])
+    assert jpy_spx.forward > 0.05
+    assert jpy_spx.reverse < 0.005
+    assert jpy_spx.net > 0
+
+
+def test_lag_must_match_coupling():
+    """A two-tick lag misses a one-tick lead entirely."""
+    series = demo_contagion_returns(n=50_000)
+    assert transfer_entropy(series["JPY"], series["SPX"], lag=2) < 0.005
+
+
+def test_independent_series_have_near_zero_te():
+    rng = np.random.default_rng(1)
+    x, y = rng.standard_normal(50_000), rng.standard_normal(50_000)
+    for method in ["quantile", "ordinal"]:
+        assert transfer_entropy(x, y, method=method) < 0.005
+
+
+def test_ordinal_symbols_are_permutation_ranks():
+    """Each of the 3! orderings gets a distinct Lehmer code in 0..5."""
+    codes = {
+        tuple(p): int(ordinal_symbols(np.array(p, dtype=float))[0])
+        for p in itertools.permutations([1, 2, 3])
+    }
+    assert codes[(1, 2, 3)] == 0
+    assert codes[(3, 2, 1)] == 5
+    assert sorted(codes.values()) == list(range(6))
+
+
+def test_quantile_symbols_are_balanced():
+    counts = np.bincount(quantile_symbols(np.arange(900.0), bins=3))
+    assert counts.tolist() == [300, 300, 300]
+
+
+def test_entropy_and_te_edge_cases():
+    assert entropy(np.array([5, 5])) == pytest.approx(1.0)
+    assert te_from_counts(np.zeros((2, 2, 2), dtype=np.int64)) == 0.0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"lag": 0}, {"k": 0}, {"method": "kde"}, {"k": 12, "l": 12}],
+)
+def test_invalid_arguments_raise(kwargs):
+    x = np.arange(100.0)
+    with pytest.raises(ValueError):
+        transfer_entropy(x, x, **kwargs)
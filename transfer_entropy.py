@@ -0,0 +1,194 @@
+"""Vectorized transfer entropy, TE(X → Y), as defined in the case.
+
+    TE(X → Y) = H(Y_future | Y_past) − H(Y_future | Y_past, X_past)
+              = H(Yf, Yp) − H(Yp) − H(Yf, Yp, Xp) + H(Yp, Xp)
+
+Series are discretized into small alphabets (quantile bins of the values,
+or ordinal/permutation patterns), histories are packed into single integer
+codes, and the joint distribution is one ``np.bincount`` over those codes;
+every marginal entropy is a sum over axes of the same count table. No Python
+loop touches the samples, so millions of ticks take well under a second.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+MAX_TABLE_CELLS = 1 << 24
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """Log returns of a price series."""
+    return np.diff(np.log(np.asarray(prices, dtype=np.float64)))
+
+
+def quantile_symbols(x: np.ndarray, bins: int = 3) -> np.ndarray:
+    """Map values to ``0..bins-1`` by equal-frequency (quantile) bins."""
+    x = np.asarray(x, dtype=np.float64)
+    edges = np.quantile(x, np.linspace(0, 1, bins + 1)[1:-1])
+    return np.searchsorted(edges, x, side="right").astype(np.int64)
+
+
+def ordinal_symbols(x: np.ndarray, order: int = 3) -> np.ndarray:
+    """Permutation-pattern symbols (``order!`` letters) via Lehmer codes.
+
+    Symbol ``t`` describes the ordering of ``x[t : t + order]``, so the
+    output is ``order - 1`` shorter than the input.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(x, dtype=np.float64), order)
+    # Lehmer digit i = how many later elements in the window are smaller
+    smaller = (windows[:, None, :] < windows[:, :, None]) & np.triu(
+        np.ones((order, order), dtype=bool), k=1
+    )
+    digits = smaller.sum(axis=2)
+    weights = np.array([math.factorial(order - 1 - i) for i in range(order)], dtype=np.int64)
+    return digits @ weights
+
+
+def symbolize(x: np.ndarray, method: str = "quantile", bins: int = 3) -> tuple[np.ndarray, int]:
+    """Discretize ``x``; returns ``(symbols, alphabet_size)``."""
+    if method == "quantile":
+        return quantile_symbols(x, bins), bins
+    if method == "ordinal":
+        return ordinal_symbols(x, bins), math.factorial(bins)
+    raise ValueError(f"unknown discretization method: {method!r}")
+
+
+def pack_history(symbols: np.ndarray, length: int, alphabet: int, end: int, count: int) -> np.ndarray:
+    """Codes of ``length``-long histories ending at ``end .. end + count - 1``.
+
+    Code = Σ symbols[t - i] · alphabet^i, i.e. the most recent symbol is the
+    least significant digit.
+    """
+    code = np.zeros(count, dtype=np.int64)
+    for i in range(length):  # loops over lags, not samples
+        code += symbols[end - i : end - i + count] * alphabet**i
+    return code
+
+
+def history_layout(n: int, alphabet: int, k: int, l: int, lag: int) -> tuple[int, int, int]:
+    """Validate TE parameters; returns ``(first_t, sample_count, table_cells)``."""
+    if lag < 1 or k < 1 or l < 1:
+        raise ValueError("k, l and lag must all be >= 1")
+    cells = alphabet ** (1 + k + l)
+    if cells > MAX_TABLE_CELLS:
+        raise ValueError(f"count table too large ({cells} cells); lower bins/k/l")
+    first = max(k - 1, l - 1 + lag - 1)  # first usable "t"
+    count = n - 1 - first
+    if count <= 0:
+        raise ValueError("series too short for the requested history lengths")
+    return first, count, cells
+
+
+def joint_counts(
+    src: np.ndarray, dst: np.ndarray, alphabet: int, k: int = 1, l: int = 1, lag: int = 1
+) -> np.ndarray:
+    """Count table of shape ``(A, A^k, A^l)`` over (Y_future, Y_past, X_past).
+
+    ``k``/``l`` are the target/source history lengths; ``lag`` ≥ 1 delays
+    the source so X_past ends at ``t + 1 - lag`` when predicting ``y[t+1]``.
+    """
+    first, count, cells = history_layout(min(len(src), len(dst)), alphabet, k, l, lag)
+    y_future = dst[first + 1 : first + 1 + count]
+    y_past = pack_history(dst, k, alphabet, first, count)
+    x_past = pack_history(src, l, alphabet, first + 1 - lag, count)
+    codes = (y_future * alphabet**k + y_past) * alphabet**l + x_past
+    return np.bincount(codes, minlength=cells).reshape(alphabet, alphabet**k, alphabet**l)
+
+
+def entropy_rows(counts: np.ndarray, base: float = 2.0) -> np.ndarray:
+    """Shannon entropy of each row of a 2-D count array."""
+    c = counts.astype(np.float64)
+    n = np.maximum(c.sum(axis=1), 1.0)  # all-zero rows come out as 0
+    c_log_c = (c * np.log(np.maximum(c, 1.0))).sum(axis=1)
+    return (np.log(n) - c_log_c / n) / np.log(base)
+
+
+def entropy(counts: np.ndarray, base: float = 2.0) -> float:
+    """Shannon entropy of a count array (any shape)."""
+    return float(entropy_rows(counts.reshape(1, -1), base)[0])
+
+
+def te_from_count_batch(tables: np.ndarray, base: float = 2.0) -> np.ndarray:
+    """TE for a stack of ``(Yf, Yp, Xp)`` count tables, shape ``(B, A, A^k, A^l)``."""
+    b = len(tables)
+    h_fp = entropy_rows(tables.sum(axis=3).reshape(b, -1), base)
+    h_p = entropy_rows(tables.sum(axis=(1, 3)), base)
+    h_fpx = entropy_rows(tables.reshape(b, -1), base)
+    h_px = entropy_rows(tables.sum(axis=1).reshape(b, -1), base)
+    return np.maximum(0.0, h_fp - h_p - h_fpx + h_px)
+
+
+def te_from_counts(table: np.ndarray, base: float = 2.0) -> float:
+    """TE from a ``(Yf, Yp, Xp)`` count table."""
+    return float(te_from_count_batch(table[None], base)[0])
+
+
+def transfer_entropy(
+    source: np.ndarray,
+    target: np.ndarray,
+    k: int = 1,
+    l: int = 1,
+    lag: int = 1,
+    bins: int = 3,
+    method: str = "quantile",
+    base: float = 2.0,
+) -> float:
+    """TE(source → target) in bits (``base=2``) from raw (e.g. return) series."""
+    src, alphabet = symbolize(source, method, bins)
+    dst, _ = symbolize(target, method, bins)
+    return te_from_counts(joint_counts(src, dst, alphabet, k, l, lag), base)
+
+
+@dataclass(frozen=True)
+class TEResult:
+    source: str
+    target: str
+    forward: float
+    reverse: float
+
+    @property
+    def net(self) -> float:
+        """Positive when information flows source → target."""
+        return self.forward - self.reverse
+
+
+def pairwise_te(
+    series: dict[str, np.ndarray],
+    pairs: list[tuple[str, str]],
+    **options,
+) -> list[TEResult]:
+    """TE in both directions for each ``(source, target)`` pair."""
+    return [
+        TEResult(
+            a,
+            b,
+            transfer_entropy(series[a], series[b], **options),
+            transfer_entropy(series[b], series[a], **options),
+        )
+        for a, b in pairs
+    ]
+
+
+def demo_contagion_returns(
+    n: int = 200_000,
+    coupling: float = 0.6,
+    seed: int = 5,
+    chain: tuple[str, ...] = ("JPY", "SPX", "MXN"),
+) -> dict[str, np.ndarray]:
+    """Synthetic returns where each ``chain`` asset leads the next by one tick.
+
+    Stand-in data until real tick history is available: with the default
+    chain SPX reacts to last tick's JPY move and MXN to last tick's SPX
+    move, never the reverse.
+    """
+    rng = np.random.default_rng(seed)
+    series: dict[str, np.ndarray] = {}
+    previous = None
+    for name in chain:
+        x = rng.standard_normal(n)
+        if previous is not None:
+            x[1:] += coupling * previous[:-1]
+        series[name] = previous = x
+    return series